@@ -0,0 +1,12 @@
+"""Performance benchmarks for the admissions chatbot backend.
+
+Run the whole suite from the ``backend`` directory with::
+
+    python -m benchmarks.run --output bench.json
+
+and compare two result files with ``python -m benchmarks.compare old.json new.json``.
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
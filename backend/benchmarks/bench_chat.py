@@ -0,0 +1,194 @@
+"""Measure ``/chat`` latency percentiles under concurrent load.
+
+The real FastAPI app is served by uvicorn in a background thread, with the
+embedder and LLM replaced by the stand-ins from ``benchmarks.standins`` so
+the numbers reflect the server, retrieval, and prompt-building overhead plus
+a fixed, configurable generation cost.
+"""
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import socket
+import threading
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep
+from typing import List, Optional, Sequence
+
+from rag.config import (
+    ChatbotConfig,
+    DocumentMetadata,
+    ParseCacheConfig,
+    TableStoreConfig,
+    ThreadBudgetConfig,
+    VectorStoreConfig,
+)
+
+from ._common import latency_summary, write_results
+from .standins import HashingEmbeddingModel, StandInLLM
+from .synthetic import PROGRAMMES, generate_prospectus
+
+QUESTIONS = [f"Diem chuan nganh {programme} nam 2026 la bao nhieu?" for programme in PROGRAMMES]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def build_service(
+    root: Path,
+    pages: int,
+    tables: int,
+    llm: StandInLLM,
+    coalescing: bool = True,
+    embedder: Optional[HashingEmbeddingModel] = None,
+    threads: Optional[ThreadBudgetConfig] = None,
+):
+    from rag.service import ChatbotService
+
+    config = ChatbotConfig()
+    config.coalescing.enabled = coalescing
+    if threads is not None:
+        config.threads = threads
+    config.pipeline.vector_store = VectorStoreConfig(
+        index_path=root / "index.faiss", metadata_path=root / "meta.json"
+    )
+    config.pipeline.parse_cache = ParseCacheConfig(enabled=False)
+    config.pipeline.tables = TableStoreConfig(path=root / "tables.sqlite3")
+    config.warmup.enabled = False
+    service = ChatbotService(config)
+    embedder = embedder or HashingEmbeddingModel()
+    service.pipeline.embedding_model = embedder
+    service.embedding_model = embedder
+    service.llm = llm  # type: ignore[assignment]
+    pdf_path = generate_prospectus(root / "prospectus.pdf", pages, tables)
+    service.ingest_pdf(pdf_path, DocumentMetadata(source="prospectus"))
+    return service
+
+
+def bench_chat(
+    concurrency_levels: Sequence[int],
+    requests_per_level: int = 200,
+    k: int = 6,
+    pages: int = 20,
+    tables: int = 10,
+    seconds_per_token: float = 0.002,
+    max_new_tokens: int = 32,
+    distinct_questions: int = len(QUESTIONS),
+    coalescing: bool = True,
+    serial_generation: bool = False,
+    llm: Optional[StandInLLM] = None,
+    embedder: Optional[HashingEmbeddingModel] = None,
+    threads: Optional[ThreadBudgetConfig] = None,
+) -> List[dict]:
+    import httpx
+    import uvicorn
+
+    from rag import server
+
+    results = []
+    with TemporaryDirectory() as tmp:
+        llm = llm or StandInLLM(
+            max_new_tokens=max_new_tokens, seconds_per_token=seconds_per_token, serial=serial_generation
+        )
+        server.service = build_service(Path(tmp), pages, tables, llm, coalescing, embedder, threads)
+        port = _free_port()
+        uvicorn_server = uvicorn.Server(
+            uvicorn.Config(server.app, host="127.0.0.1", port=port, log_level="warning")
+        )
+        thread = threading.Thread(target=uvicorn_server.run, daemon=True)
+        thread.start()
+        while not uvicorn_server.started:
+            sleep(0.05)
+        url = f"http://127.0.0.1:{port}/chat"
+        try:
+            with httpx.Client(timeout=120, limits=httpx.Limits(max_connections=max(concurrency_levels))) as client:
+                def send(index: int) -> tuple[float, int]:
+                    question = QUESTIONS[index % max(min(distinct_questions, len(QUESTIONS)), 1)]
+                    payload = {"messages": [{"role": "user", "content": question}], "k": k}
+                    begin = perf_counter()
+                    response = client.post(url, json=payload)
+                    return perf_counter() - begin, response.status_code
+
+                send(0)
+                flights = server.service.generation_flights
+                for concurrency in concurrency_levels:
+                    before = (flights.leaders, flights.followers) if flights else (0, 0)
+                    start = perf_counter()
+                    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                        outcomes = list(pool.map(send, range(requests_per_level)))
+                    elapsed = perf_counter() - start
+                    errors = sum(1 for _, status in outcomes if status != 200)
+                    leaders, followers = (
+                        (flights.leaders - before[0], flights.followers - before[1]) if flights else (0, 0)
+                    )
+                    results.append(
+                        {
+                            "concurrency": concurrency,
+                            "k": k,
+                            "errors": errors,
+                            "distinct_questions": distinct_questions,
+                            "coalescing_ratio": round(followers / (leaders + followers), 4) if followers else 0.0,
+                            "throughput_rps": round(requests_per_level / elapsed, 2),
+                            **latency_summary([latency for latency, _ in outcomes]),
+                        }
+                    )
+        finally:
+            uvicorn_server.should_exit = True
+            thread.join(timeout=10)
+            server.service = None
+    return results
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--chat-requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--chat-k", type=int, default=6)
+    parser.add_argument("--seconds-per-token", type=float, default=0.002)
+    parser.add_argument("--max-new-tokens", type=int, default=32)
+    parser.add_argument(
+        "--distinct-questions",
+        type=int,
+        default=len(QUESTIONS),
+        help="Cycle through this many questions; 1 simulates everyone asking the same thing",
+    )
+    parser.add_argument("--no-coalescing", action="store_true", help="Disable single-flight coalescing")
+    parser.add_argument(
+        "--serial-generation", action="store_true", help="Let one stand-in generation run at a time, like a CPU LLM"
+    )
+
+
+def run(args: argparse.Namespace) -> List[dict]:
+    return bench_chat(
+        args.concurrency,
+        args.chat_requests,
+        args.chat_k,
+        seconds_per_token=args.seconds_per_token,
+        max_new_tokens=args.max_new_tokens,
+        distinct_questions=args.distinct_questions,
+        coalescing=not args.no_coalescing,
+        serial_generation=args.serial_generation,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_arguments(parser)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    results = run(args)
+    for row in results:
+        print(
+            f"c={row['concurrency']:>3}  p50={row['p50_ms']:.1f} ms  p95={row['p95_ms']:.1f} ms  "
+            f"p99={row['p99_ms']:.1f} ms  {row['throughput_rps']:.1f} req/s  errors={row['errors']}  "
+            f"coalesced={row['coalescing_ratio']:.0%}"
+        )
+    if args.output:
+        write_results(args.output, {"chat": results})
+
+
+if __name__ == "__main__":
+    main()
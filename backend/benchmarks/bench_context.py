@@ -0,0 +1,83 @@
+"""Measure prompt size and answer retention of query-focused context compression.
+
+A synthetic prospectus is ingested with the hashing stand-in embedder. Every
+programme's cut-off score is then asked for, and each prompt is built from
+the full top-k chunks and from the compressed chunks, once per threshold::
+
+    python -m benchmarks.bench_context --thresholds 0.6 0.7 0.8 0.9
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List, Sequence
+
+from rag.compression import ContextCompressor
+from rag.config import CompressionConfig
+from rag.evaluation import GoldExample, evaluate_compression
+
+from ._common import write_results
+from .bench_chat import build_service
+from .standins import StandInLLM
+
+
+def gold_set(service, limit: int = 60) -> List[GoldExample]:
+    """Cut-off-score questions naming a programme and its code, answered by that table row."""
+    examples: List[GoldExample] = []
+    payload = json.loads(service.vector_store.config.metadata_path.read_text(encoding="utf-8"))
+    for item in payload:
+        if item.get("type") != "table":
+            continue
+        for line in item["text"].splitlines()[2:]:
+            cells = [cell.strip() for cell in line.strip().strip("|").split("|")]
+            if len(cells) >= 4 and len(examples) < limit:
+                question = f"Diem chuan nganh {cells[0]} ma nganh {cells[1]} la bao nhieu?"
+                examples.append(GoldExample(question=question, answer="|".join(cells[:4])))
+    return examples
+
+
+def bench_context(
+    thresholds: Sequence[float], k: int = 6, pages: int = 20, tables: int = 10, generate: bool = False
+) -> List[dict]:
+    results = []
+    with TemporaryDirectory() as tmp:
+        service = build_service(Path(tmp), pages, tables, StandInLLM(seconds_per_token=0.0, prefill_seconds_per_token=0.0))
+        service.load()
+        examples = gold_set(service)
+        for threshold in thresholds:
+            compressor = ContextCompressor(CompressionConfig(enabled=True, relative_threshold=threshold), service._embed)
+            row = evaluate_compression(service, examples, compressor, k=k, generate=generate).to_dict()
+            results.append({"relative_threshold": threshold, "k": k, **row})
+    return results
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.6, 0.7, 0.8, 0.9])
+    parser.add_argument("--context-k", type=int, default=6)
+
+
+def run(args: argparse.Namespace) -> List[dict]:
+    return bench_context(args.thresholds, args.context_k)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_arguments(parser)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    results = run(args)
+    for row in results:
+        tokens, rates = row["prompt_tokens"], row["context_answer_rate"]
+        print(
+            f"threshold={row['relative_threshold']:.2f}  prompt words {tokens['full']} -> {tokens['compressed']} "
+            f"(-{row['token_reduction']:.0%})  answer in context {rates['full']:.2f} -> {rates['compressed']:.2f}  "
+            f"compress={row['compress_ms']:.2f} ms"
+        )
+    if args.output:
+        write_results(args.output, {"context": results})
+
+
+if __name__ == "__main__":
+    main()
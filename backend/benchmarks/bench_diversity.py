@@ -0,0 +1,119 @@
+"""Measure how MMR diversification changes context redundancy, recall, and search latency.
+
+A synthetic prospectus is chunked into heavily overlapping windows (120
+words, 100 overlap by default) and embedded with the hashing stand-in. One
+question is asked per table row, and the top-k is retrieved at each
+``--diversities`` value::
+
+    python -m benchmarks.bench_diversity --diversities 0 0.3 0.5 --k 6
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import List, Sequence
+
+from rag.config import (
+    ChatbotConfig,
+    ChunkingConfig,
+    DocumentMetadata,
+    ParseCacheConfig,
+    TableStoreConfig,
+    VectorStoreConfig,
+)
+
+from ._common import latency_summary, write_results
+from .bench_tables import gold_set
+from .standins import HashingEmbeddingModel
+from .synthetic import generate_prospectus
+
+
+def distinct_share(texts: Sequence[str]) -> float:
+    """Share of context word occurrences that are not repeats of a (lowercased) word 4-gram seen earlier."""
+    seen, total, fresh = set(), 0, 0
+    for text in texts:
+        words = text.lower().split()
+        for start in range(max(len(words) - 3, 1)):
+            gram = tuple(words[start : start + 4])
+            total += 1
+            if gram not in seen:
+                seen.add(gram)
+                fresh += 1
+    return fresh / total if total else 1.0
+
+
+def bench_diversity(
+    diversities: Sequence[float],
+    k: int = 6,
+    chunk_size: int = 120,
+    overlap: int = 100,
+    pages: int = 20,
+    tables: int = 10,
+    questions: int = 120,
+) -> List[dict]:
+    from rag.service import ChatbotService
+
+    results = []
+    with TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        config = ChatbotConfig()
+        config.coalescing.enabled = False
+        config.warmup.enabled = False
+        config.pipeline.chunking = ChunkingConfig(text_chunk_size=chunk_size, text_chunk_overlap=overlap)
+        config.pipeline.dedup.enabled = False  # keep the overlapping windows MMR is meant to thin out
+        config.pipeline.parse_cache = ParseCacheConfig(enabled=False)
+        config.pipeline.tables = TableStoreConfig(path=root / "tables.sqlite3")
+        config.pipeline.vector_store = VectorStoreConfig(index_path=root / "index.faiss", metadata_path=root / "meta.json")
+        service = ChatbotService(config)
+        embedder = HashingEmbeddingModel()
+        service.pipeline.embedding_model = service.embedding_model = embedder
+        pdf_path = generate_prospectus(root / "prospectus.pdf", pages, tables)
+        service.ingest_pdf(pdf_path, DocumentMetadata(source="prospectus"))
+        service.load()
+        examples = gold_set(service.pipeline.parser.extract(pdf_path), questions)
+        for diversity in diversities:
+            service.search(examples[0].question, k=k, diversity=diversity)  # warm-up
+            samples, hits, shares = [], 0, []
+            for example in examples:
+                begin = perf_counter()
+                retrieved = service.search(example.question, k=k, diversity=diversity)
+                samples.append(perf_counter() - begin)
+                hits += any(example.matches(result.chunk) for result in retrieved)
+                shares.append(distinct_share([result.chunk.text for result in retrieved]))
+            results.append(
+                {
+                    "diversity": diversity,
+                    "k": k,
+                    "questions": len(examples),
+                    "recall": round(hits / len(examples), 4),
+                    "distinct_share": round(sum(shares) / len(shares), 4),
+                    **latency_summary(samples),
+                }
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--diversities", type=float, nargs="+", default=[0.0, 0.3, 0.5, 0.7])
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--chunk-size", type=int, default=120)
+    parser.add_argument("--overlap", type=int, default=100)
+    parser.add_argument("--questions", type=int, default=120)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    results = bench_diversity(args.diversities, args.k, args.chunk_size, args.overlap, questions=args.questions)
+    for row in results:
+        print(
+            f"diversity={row['diversity']:.1f}  recall@{row['k']}={row['recall']:.2f}  "
+            f"distinct={row['distinct_share']:.0%}  "
+            f"p50={row['p50_ms']:.2f} ms  p95={row['p95_ms']:.2f} ms"
+        )
+    if args.output:
+        write_results(args.output, {"diversity": results})
+
+
+if __name__ == "__main__":
+    main()
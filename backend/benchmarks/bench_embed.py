@@ -0,0 +1,115 @@
+"""Measure query-embedding throughput and tail latency with and without micro-batching.
+
+Each simulated request embeds one question, like ``ChatbotService.search``.
+The stand-in embedder charges a fixed per-call overhead plus a per-text
+cost and runs one call at a time, which is roughly how a transformer
+encoder behaves on a CPU. Override the costs with ``--call-overhead-ms`` and
+``--per-text-ms`` to match a measured model, or pass ``--real-embedder`` to
+use BGE-M3 itself.
+"""
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from time import perf_counter
+from typing import List, Sequence
+
+from rag.batching import EmbeddingBatcher
+from rag.config import EmbeddingConfig
+
+from ._common import latency_summary, write_results
+from .bench_chat import QUESTIONS
+from .standins import HashingEmbeddingModel
+
+
+def bench_embed(
+    concurrency_levels: Sequence[int],
+    requests_per_level: int = 500,
+    call_overhead_ms: float = 8.0,
+    per_text_ms: float = 0.5,
+    max_batch_size: int = 32,
+    max_batch_wait_ms: float = 2.0,
+    real_embedder: bool = False,
+) -> List[dict]:
+    if real_embedder:
+        from rag.embedding import BGEEmbeddingModel
+
+        model = BGEEmbeddingModel(EmbeddingConfig())
+    else:
+        model = HashingEmbeddingModel(
+            call_overhead_seconds=call_overhead_ms / 1000, seconds_per_text=per_text_ms / 1000
+        )
+    config = EmbeddingConfig(max_batch_size=max_batch_size, max_batch_wait_ms=max_batch_wait_ms)
+    batcher = EmbeddingBatcher.from_config(config)
+    modes = {"unbatched": lambda text: model.embed([text]), "batched": lambda text: batcher.embed(model, [text])}
+    modes["batched"](QUESTIONS[0])  # start the worker thread
+
+    results = []
+    for concurrency in concurrency_levels:
+        for mode, embed in modes.items():
+            batches, texts = batcher.batches, batcher.texts
+
+            def send(index: int) -> float:
+                begin = perf_counter()
+                embed(QUESTIONS[index % len(QUESTIONS)])
+                return perf_counter() - begin
+
+            start = perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                latencies = list(pool.map(send, range(requests_per_level)))
+            elapsed = perf_counter() - start
+            calls = batcher.batches - batches
+            results.append(
+                {
+                    "mode": mode,
+                    "concurrency": concurrency,
+                    "max_batch_size": max_batch_size,
+                    "max_batch_wait_ms": max_batch_wait_ms,
+                    "mean_batch_size": round((batcher.texts - texts) / calls, 2) if calls else 1.0,
+                    "throughput_rps": round(requests_per_level / elapsed, 2),
+                    **latency_summary(latencies),
+                }
+            )
+    return results
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--embed-concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--embed-requests", type=int, default=500, help="Requests per concurrency level")
+    parser.add_argument("--call-overhead-ms", type=float, default=8.0)
+    parser.add_argument("--per-text-ms", type=float, default=0.5)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-batch-wait-ms", type=float, default=2.0)
+
+
+def run(args: argparse.Namespace) -> List[dict]:
+    return bench_embed(
+        args.embed_concurrency,
+        args.embed_requests,
+        call_overhead_ms=args.call_overhead_ms,
+        per_text_ms=args.per_text_ms,
+        max_batch_size=args.max_batch_size,
+        max_batch_wait_ms=args.max_batch_wait_ms,
+        real_embedder=args.real_embedder,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_arguments(parser)
+    parser.add_argument("--real-embedder", action="store_true", help="Use BGE-M3 instead of the stand-in")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    results = run(args)
+    for row in results:
+        print(
+            f"{row['mode']:>9}  c={row['concurrency']:>3}  p50={row['p50_ms']:.1f} ms  "
+            f"p99={row['p99_ms']:.1f} ms  {row['throughput_rps']:.1f} req/s  batch={row['mean_batch_size']}"
+        )
+    if args.output:
+        write_results(args.output, {"embed": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Time each ingestion stage on synthetic prospectus PDFs."""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import List, Sequence
+
+from rag.config import DocumentMetadata, ParseCacheConfig, PipelineConfig, TableStoreConfig, VectorStoreConfig
+from rag.metrics import request_metrics
+from rag.pipeline import IngestionPipeline
+
+from ._common import write_results
+from .standins import HashingEmbeddingModel
+from .synthetic import generate_prospectus
+
+
+def bench_ingest(
+    sizes: Sequence[tuple[int, int]],
+    rows_per_table: int = 12,
+    real_embedder: bool = False,
+    concurrent_parsing: bool = False,
+    dedup: bool = True,
+) -> List[dict]:
+    """Ingest one synthetic PDF per ``(pages, tables)`` pair and time every stage."""
+    results = []
+    with TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        for pages, tables in sizes:
+            pdf_path = generate_prospectus(
+                root / f"prospectus_{pages}p_{tables}t.pdf", pages, tables, rows_per_table
+            )
+            config = PipelineConfig(
+                vector_store=VectorStoreConfig(
+                    index_path=root / "index.faiss", metadata_path=root / "meta.json"
+                ),
+                parse_cache=ParseCacheConfig(enabled=False),
+                tables=TableStoreConfig(path=root / "tables.sqlite3"),
+            )
+            config.parsing.concurrent = concurrent_parsing
+            config.dedup.enabled = dedup
+            pipeline = IngestionPipeline(config)
+            if not real_embedder:
+                pipeline.embedding_model = HashingEmbeddingModel()
+            start = perf_counter()
+            with request_metrics() as metrics:
+                pipeline.ingest(pdf_path, DocumentMetadata(source=pdf_path.stem))
+            total = perf_counter() - start
+            report = pipeline.parser.last_report
+            dedup_report = pipeline.deduplicator.last_report if pipeline.deduplicator else None
+            results.append(
+                {
+                    "pages": pages,
+                    "tables": tables,
+                    "chunks": pipeline.vector_store.index.ntotal,
+                    "index_bytes": pipeline.vector_store.config.index_path.stat().st_size,
+                    "dedup": dedup_report.to_dict() if dedup_report else None,
+                    "embedder": "bge" if real_embedder else "hashing",
+                    "stages_ms": {
+                        name.removeprefix("ingest_"): round(seconds * 1000, 2)
+                        for name, seconds in metrics.timings.items()
+                        if name.startswith("ingest_")
+                    },
+                    "total_ms": round(total * 1000, 2),
+                    "parsers": report.to_dict()["runs"] if report else [],
+                }
+            )
+    return results
+
+
+def _parse_size(value: str) -> tuple[int, int]:
+    pages, _, tables = value.partition("x")
+    return int(pages), int(tables or 0)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--ingest-sizes",
+        type=_parse_size,
+        nargs="+",
+        default=[(5, 2), (20, 10), (60, 30)],
+        help="PAGESxTABLES pairs, e.g. 20x10",
+    )
+    parser.add_argument("--rows-per-table", type=int, default=12)
+    parser.add_argument("--real-embedder", action="store_true", help="Use BGE-M3 instead of hashing")
+    parser.add_argument("--concurrent-parsing", action="store_true")
+    parser.add_argument("--no-dedup", action="store_true", help="Embed every chunk, duplicates included")
+
+
+def run(args: argparse.Namespace) -> List[dict]:
+    return bench_ingest(
+        args.ingest_sizes,
+        args.rows_per_table,
+        args.real_embedder,
+        args.concurrent_parsing,
+        dedup=not args.no_dedup,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_arguments(parser)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    results = run(args)
+    for row in results:
+        print(f"{row['pages']:>4}p {row['tables']:>3}t {row['chunks']:>5} chunks  {row['total_ms']:>9.1f} ms  {row['stages_ms']}")
+    if args.output:
+        write_results(args.output, {"ingest": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Compare LLM backends on tokens/sec, time to first token, load time, and RSS.
+
+Each backend is measured in a fresh subprocess so that resident memory
+reflects only that backend's weights::
+
+    python -m benchmarks.bench_llm --backends fp32 bf16 int8 \\
+        --model Qwen/Qwen2.5-0.5B-Instruct
+    python -m benchmarks.bench_llm --backends llama-cpp --gguf qwen2.5-7b-q4_k_m.gguf
+
+Backends that fail to load (missing package, unsupported hardware) are
+reported with their error instead of aborting the comparison.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+from pathlib import Path
+from time import perf_counter
+from typing import List, Optional, Sequence
+
+from rag.config import LLMConfig
+from rag.llm import LLM_BACKENDS, create_llm
+
+from ._common import write_results
+
+PROMPT = (
+    "SYSTEM: Bạn là trợ lý tuyển sinh của trường Đại học. Chỉ trả lời dựa trên NGỮ CẢNH cung cấp.\n\n"
+    "CONTEXT:\n[quy_che - Trang 12 - Bảng #3]\n| Ngành | Mã ngành | Chỉ tiêu | Điểm chuẩn |\n"
+    "| --- | --- | --- | --- |\n| Công nghệ thông tin | QHT40 | 200 | 26.10 |\n"
+    "| Khoa học máy tính | QHT41 | 120 | 25.75 |\n\n"
+    "USER QUESTION: Điểm chuẩn ngành Công nghệ thông tin là bao nhiêu?"
+)
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status", encoding="utf-8") as handle:
+            for line in handle:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure_backend(config: LLMConfig, max_new_tokens: int, runs: int) -> dict:
+    """Load one backend in this process and time streamed generations."""
+    baseline = _rss_mb()
+    model = create_llm(config)
+    start = perf_counter()
+    model.load()
+    load_seconds = perf_counter() - start
+    loaded_rss = _rss_mb()
+
+    model.generate(PROMPT, max_new_tokens=4)  # warm-up
+    first_token, rates = [], []
+    for _ in range(runs):
+        start = perf_counter()
+        first: Optional[float] = None
+        fragments = 0
+        for _fragment in model.stream(PROMPT, max_new_tokens=max_new_tokens):
+            if first is None:
+                first = perf_counter() - start
+            fragments += 1
+        elapsed = perf_counter() - start
+        first_token.append(first or elapsed)
+        rates.append(fragments / elapsed if elapsed else 0.0)
+    return {
+        "backend": config.backend,
+        "model": str(config.gguf_path or config.model_name),
+        "load_s": round(load_seconds, 2),
+        "ttft_ms": round(1000 * sorted(first_token)[len(first_token) // 2], 1),
+        "tokens_per_s": round(sorted(rates)[len(rates) // 2], 2),
+        "rss_mb": round(loaded_rss - baseline, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def bench_llm(
+    backends: Sequence[str],
+    model_name: str,
+    gguf_path: Optional[Path],
+    max_new_tokens: int = 64,
+    runs: int = 3,
+    threads: Optional[int] = None,
+) -> List[dict]:
+    results = []
+    for backend in backends:
+        command = [
+            sys.executable, "-m", "benchmarks.bench_llm", "--worker",
+            "--backends", backend, "--model", model_name,
+            "--max-new-tokens", str(max_new_tokens), "--runs", str(runs),
+        ]
+        if gguf_path is not None:
+            command += ["--gguf", str(gguf_path)]
+        if threads:
+            command += ["--threads", str(threads)]
+        completed = subprocess.run(
+            command, capture_output=True, text=True, cwd=Path(__file__).resolve().parents[1], env=dict(os.environ)
+        )
+        lines = completed.stdout.strip().splitlines()
+        if completed.returncode == 0 and lines:
+            results.append(json.loads(lines[-1]))
+        else:
+            error = (completed.stderr.strip().splitlines() or ["unknown error"])[-1]
+            results.append({"backend": backend, "error": error})
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", nargs="+", default=["fp32", "bf16", "int8"], choices=LLM_BACKENDS)
+    parser.add_argument("--model", default=LLMConfig().model_name, help="Hugging Face model id")
+    parser.add_argument("--gguf", type=Path, default=None, help="GGUF file for the llama-cpp backend")
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.worker:
+        config = LLMConfig(
+            model_name=args.model,
+            backend=args.backends[0],
+            gguf_path=args.gguf,
+            n_threads=args.threads,
+            temperature=0.0,
+        )
+        print(json.dumps(measure_backend(config, args.max_new_tokens, args.runs)))
+        return
+
+    results = bench_llm(args.backends, args.model, args.gguf, args.max_new_tokens, args.runs, args.threads)
+    for row in results:
+        if "error" in row:
+            print(f"{row['backend']:<10} failed: {row['error']}")
+            continue
+        print(
+            f"{row['backend']:<10} {row['tokens_per_s']:>7.2f} tok/s  ttft={row['ttft_ms']:>7.1f} ms  "
+            f"rss={row['rss_mb']:>8.1f} MB  load={row['load_s']:.1f}s"
+        )
+    if args.output:
+        write_results(args.output, {"llm": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Measure FAISS search latency and QPS across index sizes and k values."""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import List, Sequence
+
+import numpy as np
+
+from rag.config import Chunk, DocumentMetadata, VectorStoreConfig
+from rag.vector_store import FaissVectorStore
+
+from ._common import latency_summary, write_results
+
+
+def build_store(root: Path, size: int, dim: int, seed: int = 7) -> FaissVectorStore:
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((size, dim), dtype="float32")
+    chunks = [
+        Chunk(text=f"chunk {index}", metadata=DocumentMetadata(source="synthetic", page=index // 20 + 1))
+        for index in range(size)
+    ]
+    store = FaissVectorStore(
+        VectorStoreConfig(index_path=root / f"index_{size}.faiss", metadata_path=root / f"meta_{size}.json")
+    )
+    store.build(vectors, chunks)
+    return store
+
+
+def bench_search(
+    sizes: Sequence[int], ks: Sequence[int], dim: int = 1024, queries: int = 200, seed: int = 11
+) -> List[dict]:
+    results = []
+    rng = np.random.default_rng(seed)
+    with TemporaryDirectory() as tmp:
+        for size in sizes:
+            store = build_store(Path(tmp), size, dim)
+            query_vectors = rng.standard_normal((queries, dim), dtype="float32")
+            for k in ks:
+                store.search(query_vectors[0], k=k)  # warm caches
+                samples = []
+                start = perf_counter()
+                for vector in query_vectors:
+                    begin = perf_counter()
+                    store.search(vector, k=k)
+                    samples.append(perf_counter() - begin)
+                elapsed = perf_counter() - start
+                results.append(
+                    {
+                        "index_size": size,
+                        "dim": dim,
+                        "k": k,
+                        "qps": round(queries / elapsed, 1),
+                        **latency_summary(samples),
+                    }
+                )
+    return results
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--index-sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--ks", type=int, nargs="+", default=[1, 6, 20])
+    parser.add_argument("--dim", type=int, default=1024, help="Vector size (BGE-M3 uses 1024)")
+    parser.add_argument("--queries", type=int, default=200)
+
+
+def run(args: argparse.Namespace) -> List[dict]:
+    return bench_search(args.index_sizes, args.ks, args.dim, args.queries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_arguments(parser)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    results = run(args)
+    for row in results:
+        print(f"n={row['index_size']:>7} k={row['k']:>3}  p50={row['p50_ms']:.3f} ms  p99={row['p99_ms']:.3f} ms  {row['qps']:.0f} qps")
+    if args.output:
+        write_results(args.output, {"search": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Measure speculative decoding speedup and acceptance on a fixed question set.
+
+One ``LocalCausalLM`` is loaded and reused for every mode, switching
+``LLMConfig.speculative`` between runs. Decoding is greedy, so every mode
+should produce the same answers. The script checks that and reports when
+they differ::
+
+    python -m benchmarks.bench_speculative --model Qwen/Qwen2.5-7B-Instruct \\
+        --draft-model Qwen/Qwen2.5-0.5B-Instruct --backend int8
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from pathlib import Path
+from time import perf_counter
+from typing import List, Sequence
+
+from rag.config import LLMConfig
+from rag.llm import SPECULATIVE_MODES, LocalCausalLM, format_chat_prompt
+
+from ._common import write_results
+from .synthetic import TABLE_HEADER, _table_rows
+
+
+def question_set(count: int = 8, seed: int = 5) -> List[str]:
+    """Build prompts whose answers can be copied from a retrieved table."""
+    rng = random.Random(seed)
+    rows = _table_rows(rng, 15, 2026)
+    table = "\n".join(
+        ["| " + " | ".join(TABLE_HEADER) + " |", "| " + " | ".join("---" for _ in TABLE_HEADER) + " |"]
+        + ["| " + " | ".join(row) + " |" for row in rows]
+    )
+    context = f"[tuyen_sinh_2026 - Trang 4 - Bảng #1]\n{table}\n"
+    prompts = []
+    for row in rows[:count]:
+        question = f"Cho biết mã ngành, chỉ tiêu, điểm chuẩn và học phí của ngành {row[0]}."
+        prompts.append(format_chat_prompt([{"role": "user", "content": question}], context, question))
+    return prompts
+
+
+def bench_speculative(
+    model_name: str,
+    draft_model_name: str,
+    modes: Sequence[str],
+    backend: str = "auto",
+    max_new_tokens: int = 96,
+    questions: int = 8,
+) -> List[dict]:
+    config = LLMConfig(
+        model_name=model_name,
+        draft_model_name=draft_model_name,
+        backend=backend,
+        temperature=0.0,
+        max_new_tokens=max_new_tokens,
+    )
+    llm = LocalCausalLM(config)
+    llm.load()
+    prompts = question_set(questions)
+    llm.generate(prompts[0], max_new_tokens=4)  # warm-up
+
+    results: List[dict] = []
+    baseline_answers: List[str] = []
+    baseline_rate = None
+    for mode in modes:
+        config.speculative = mode
+        if mode == "draft":
+            llm.load()  # loads the draft model on top of the main one
+            llm.generate(prompts[0], max_new_tokens=4)
+        answers, tokens, steps, drafts, elapsed = [], 0, 0, 0, 0.0
+        for prompt in prompts:
+            start = perf_counter()
+            answer, stats = llm.generate_with_stats(prompt)
+            elapsed += perf_counter() - start
+            answers.append(answer)
+            tokens += stats.generated_tokens
+            steps += stats.main_steps
+            drafts += stats.draft_steps
+        rate = tokens / elapsed if elapsed else 0.0
+        if mode == "none":
+            baseline_answers, baseline_rate = answers, rate
+        accepted = max(tokens - steps, 0)
+        results.append(
+            {
+                "mode": mode,
+                "tokens": tokens,
+                "tokens_per_s": round(rate, 2),
+                "speedup": round(rate / baseline_rate, 2) if baseline_rate else None,
+                "tokens_per_step": round(tokens / steps, 2) if steps else None,
+                "acceptance_rate": round(min(accepted / drafts, 1.0), 3) if drafts else None,
+                "matches_baseline": answers == baseline_answers if baseline_answers else None,
+            }
+        )
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default=LLMConfig().model_name)
+    parser.add_argument("--draft-model", default=LLMConfig().draft_model_name)
+    parser.add_argument("--backend", default="auto")
+    parser.add_argument("--modes", nargs="+", default=list(SPECULATIVE_MODES), choices=SPECULATIVE_MODES)
+    parser.add_argument("--max-new-tokens", type=int, default=96)
+    parser.add_argument("--questions", type=int, default=8)
+    parser.add_argument("--output", type=Path, default=None)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    modes = list(dict.fromkeys(["none", *args.modes]))  # baseline always runs first
+    results = bench_speculative(
+        args.model, args.draft_model, modes, args.backend, args.max_new_tokens, args.questions
+    )
+    for row in results:
+        print(
+            f"{row['mode']:<14} {row['tokens_per_s']:>7.2f} tok/s  speedup={row['speedup']}  "
+            f"tokens/step={row['tokens_per_step']}  acceptance={row['acceptance_rate']}  "
+            f"same_output={row['matches_baseline']}"
+        )
+    if args.output:
+        write_results(args.output, {"speculative": results})
+
+
+if __name__ == "__main__":
+    main()
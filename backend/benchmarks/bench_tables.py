@@ -0,0 +1,144 @@
+"""Compare table renderings by token count and retrieval recall.
+
+A synthetic prospectus is parsed once. Its table chunks are then rendered
+in every format in ``rag.chunking.TABLE_FORMATS`` and token-counted. Each
+format is also embedded with the hashing stand-in (or BGE-M3 with
+``--real-embedder``) and scored with ``RetrievalEvaluator`` on one question
+per table row; prompts keep markdown, so the gold rows match every run::
+
+    python -m benchmarks.bench_tables --tokenizer BAAI/bge-m3
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import re
+from tempfile import TemporaryDirectory
+from typing import Callable, List, Optional, Sequence
+
+from rag.chunking import TABLE_FORMATS, ChunkBuilder, parse_markdown_table
+from rag.config import ChatbotConfig, ChunkingConfig, DocumentMetadata, ParseCacheConfig, TableStoreConfig
+from rag.evaluation import GoldExample, IndexSetting, RetrievalEvaluator
+
+from ._common import write_results
+from .standins import HashingEmbeddingModel
+from .synthetic import generate_prospectus
+
+_PIECE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+def approximate_tokens(text: str) -> int:
+    """Words plus punctuation marks: a tokenizer-free stand-in for subword token counts."""
+    return len(_PIECE.findall(text))
+
+
+def gold_set(document, limit: int) -> List[GoldExample]:
+    """One question per table row, naming the programme and its code."""
+    examples: List[GoldExample] = []
+    for table in document.tables:
+        lines = [line for line in table.markdown.splitlines() if line.strip()]
+        parsed = parse_markdown_table(lines)
+        if parsed is None:
+            continue
+        for line, cells in zip(lines[2:], parsed[1]):
+            if len(examples) >= limit:
+                return examples
+            question = f"Diem chuan nganh {cells[0]} ma nganh {cells[1]} la bao nhieu?"
+            examples.append(GoldExample(question=question, tables=[table.table_index], answer=line.strip()))
+    return examples
+
+
+def bench_tables(
+    formats: Sequence[str] = TABLE_FORMATS,
+    pages: int = 20,
+    tables: int = 10,
+    rows_per_table: int = 12,
+    questions: int = 120,
+    ks: Sequence[int] = (1, 3, 6),
+    real_embedder: bool = False,
+    count_tokens: Optional[Callable[[str], int]] = None,
+) -> List[dict]:
+    from rag.service import ChatbotService
+
+    results = []
+    with TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        config = ChatbotConfig()
+        config.pipeline.parse_cache = ParseCacheConfig(enabled=False)
+        config.pipeline.tables = TableStoreConfig(path=root / "tables.sqlite3")
+        config.pipeline.dedup.enabled = False  # dedup would drop different rows per format
+        config.warmup.enabled = False
+        service = ChatbotService(config)
+        if not real_embedder:
+            service.embedding_model = HashingEmbeddingModel()
+        pdf_path = generate_prospectus(root / "prospectus.pdf", pages, tables, rows_per_table)
+        document = service.pipeline.parser.extract(pdf_path)
+        metadata = DocumentMetadata(source="prospectus")
+        examples = gold_set(document, questions)
+        for table_format in formats:
+            chunking = ChunkingConfig(table_embed_format=table_format, table_prompt_format=table_format)
+            builder = ChunkBuilder(chunking)
+            table_texts = [
+                chunk.text
+                for table in document.tables
+                for chunk in builder.build_table_chunks(table.markdown, metadata.copy_with(table_index=table.table_index))
+            ]
+            row = {
+                "format": table_format,
+                "table_chunks": len(table_texts),
+                "chars": sum(len(text) for text in table_texts),
+                "approx_tokens": sum(approximate_tokens(text) for text in table_texts),
+            }
+            if count_tokens is not None:
+                row["tokens"] = sum(count_tokens(text) for text in table_texts)
+            evaluation = RetrievalEvaluator(service, examples, root / table_format).evaluate(
+                document, metadata, [ChunkingConfig(table_embed_format=table_format)], [IndexSetting()], ks=ks
+            )[0]
+            row.update(
+                questions=len(examples),
+                recall={f"@{k}": round(value, 4) for k, value in sorted(evaluation.recall.items())},
+                mrr=round(evaluation.mrr, 4),
+            )
+            results.append(row)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--formats", nargs="+", choices=TABLE_FORMATS, default=list(TABLE_FORMATS))
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--tables", type=int, default=10)
+    parser.add_argument("--rows-per-table", type=int, default=12)
+    parser.add_argument("--questions", type=int, default=120)
+    parser.add_argument("--real-embedder", action="store_true", help="Embed with BGE-M3 instead of the hashing stand-in")
+    parser.add_argument("--tokenizer", default=None, help="Hugging Face tokenizer for exact token counts")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    count_tokens = None
+    if args.tokenizer:
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+        count_tokens = lambda text: len(tokenizer(text, add_special_tokens=False)["input_ids"])  # noqa: E731
+    results = bench_tables(
+        args.formats,
+        args.pages,
+        args.tables,
+        args.rows_per_table,
+        args.questions,
+        real_embedder=args.real_embedder,
+        count_tokens=count_tokens,
+    )
+    for row in results:
+        recall = " ".join(f"R{k}={value:.2f}" for k, value in row["recall"].items())
+        tokens = f" tokens={row['tokens']}" if "tokens" in row else ""
+        print(
+            f"{row['format']:<9} chars={row['chars']:>6} approx_tokens={row['approx_tokens']:>6}{tokens}  "
+            f"{recall} MRR={row['mrr']:.3f}"
+        )
+    if args.output:
+        write_results(args.output, {"tables": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Compare concurrent ``/chat`` latency with and without the CPU thread budget.
+
+The embedder and LLM stand-ins do real torch matmuls (``TorchEmbeddingModel``
+and ``TorchLLM``), so, like BGE-M3 and Qwen, each call's intra-op pool
+defaults to every core. ``unbudgeted`` leaves them that way, and
+``budgeted`` installs ``ThreadBudgetConfig`` (``--embed-threads``,
+``--generate-threads``, ``--search-threads``, or the automatic split).
+Requires torch.
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from rag.config import ThreadBudgetConfig
+from rag.threads import ThreadBudget, available_cpus
+
+from . import bench_chat
+from ._common import write_results
+from .standins import TorchEmbeddingModel, TorchLLM
+
+
+def bench_threads(
+    concurrency_levels: Sequence[int],
+    requests_per_level: int = 100,
+    max_new_tokens: int = 16,
+    embed_threads: Optional[int] = None,
+    generate_threads: Optional[int] = None,
+    search_threads: Optional[int] = None,
+) -> List[dict]:
+    try:
+        import torch  # noqa: F401
+    except ImportError as exc:  # pragma: no cover - environment dependent
+        raise SystemExit("bench_threads needs torch: pip install torch") from exc
+
+    budget = ThreadBudgetConfig(
+        embed_threads=embed_threads, generate_threads=generate_threads, search_threads=search_threads
+    )
+    split = ThreadBudget(budget, available_cpus())
+    results = []
+    for mode, threads in (("unbudgeted", ThreadBudgetConfig(enabled=False)), ("budgeted", budget)):
+        rows = bench_chat.bench_chat(
+            concurrency_levels,
+            requests_per_level,
+            max_new_tokens=max_new_tokens,
+            distinct_questions=len(bench_chat.QUESTIONS),
+            coalescing=False,
+            llm=TorchLLM(max_new_tokens=max_new_tokens),
+            embedder=TorchEmbeddingModel(),
+            threads=threads,
+        )
+        for row in rows:
+            row["mode"] = mode
+            row["cpus"] = split.cpus
+            if threads.enabled:
+                row.update({f"{role}_threads": split.threads(role) for role in ("embed", "generate", "search")})
+        results.extend(rows)
+    return results
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--threads-concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--threads-requests", type=int, default=100, help="Requests per concurrency level")
+    parser.add_argument("--embed-threads", type=int, default=None)
+    parser.add_argument("--generate-threads", type=int, default=None)
+    parser.add_argument("--search-threads", type=int, default=None)
+
+
+def run(args: argparse.Namespace) -> List[dict]:
+    return bench_threads(
+        args.threads_concurrency,
+        args.threads_requests,
+        max_new_tokens=args.max_new_tokens,
+        embed_threads=args.embed_threads,
+        generate_threads=args.generate_threads,
+        search_threads=args.search_threads,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_arguments(parser)
+    parser.add_argument("--max-new-tokens", type=int, default=16)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    results = run(args)
+    for row in results:
+        print(
+            f"{row['mode']:>10}  c={row['concurrency']:>3}  p50={row['p50_ms']:.1f} ms  "
+            f"p95={row['p95_ms']:.1f} ms  p99={row['p99_ms']:.1f} ms  {row['throughput_rps']:.1f} req/s"
+        )
+    if args.output:
+        write_results(args.output, {"threads": results})
+
+
+if __name__ == "__main__":
+    main()
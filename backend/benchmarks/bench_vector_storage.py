@@ -0,0 +1,112 @@
+"""Compare vector storage codecs on memory per chunk, recall loss, and latency.
+
+Recall@k is measured against exact float32 search on clustered synthetic
+vectors that roughly mimic sentence embeddings::
+
+    python -m benchmarks.bench_vector_storage --size 100000 --storages float32 fp16 sq8 pq \\
+        --rescore 0 50
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import List, Sequence
+
+import numpy as np
+
+from rag.config import Chunk, DocumentMetadata, VectorStoreConfig
+from rag.vector_store import FaissVectorStore
+
+from ._common import latency_summary, write_results
+
+
+def clustered_vectors(size: int, dim: int, clusters: int = 256, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim), dtype="float32")
+    vectors = centers[rng.integers(0, clusters, size)] + 0.6 * rng.standard_normal((size, dim), dtype="float32")
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def bench_vector_storage(
+    size: int,
+    storages: Sequence[str],
+    rescores: Sequence[int],
+    dim: int = 1024,
+    k: int = 6,
+    queries: int = 200,
+    pq_m: int = 64,
+) -> List[dict]:
+    vectors = clustered_vectors(size, dim)
+    rng = np.random.default_rng(11)
+    picks = rng.integers(0, size, queries)
+    query_vectors = vectors[picks] + 0.3 * rng.standard_normal((queries, dim), dtype="float32") / np.sqrt(dim)
+    truth = [set(row[:k]) for row in np.argsort(-(query_vectors @ vectors.T), axis=1)]
+    chunks = [Chunk(text=str(index), metadata=DocumentMetadata(source="synthetic")) for index in range(size)]
+
+    results = []
+    with TemporaryDirectory() as tmp:
+        for storage in storages:
+            config = VectorStoreConfig(
+                index_path=Path(tmp) / f"{storage}.faiss",
+                metadata_path=Path(tmp) / f"{storage}.json",
+                storage=storage,
+                pq_m=pq_m,
+            )
+            store = FaissVectorStore(config)
+            start = perf_counter()
+            store.build(vectors.copy(), chunks)
+            build_seconds = perf_counter() - start
+            index_bytes = config.index_path.stat().st_size
+            for rescore in rescores if storage != "float32" else [0]:
+                config.rescore_candidates = rescore
+                store.search(query_vectors[0], k=k)  # warm caches
+                samples, hits = [], 0
+                for query, expected in zip(query_vectors, truth):
+                    begin = perf_counter()
+                    found = store.search(query.copy(), k=k)
+                    samples.append(perf_counter() - begin)
+                    hits += len(expected & {int(result.chunk.text) for result in found})
+                results.append(
+                    {
+                        "storage": storage,
+                        "rescore": rescore,
+                        "index_size": size,
+                        "dim": dim,
+                        "k": k,
+                        "bytes_per_vector": round(index_bytes / size, 1),
+                        "gb_per_million": round(index_bytes / size * 1e6 / 1e9, 3),
+                        f"recall@{k}": round(hits / (k * queries), 4),
+                        "build_s": round(build_seconds, 2),
+                        **latency_summary(samples),
+                    }
+                )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--storages", nargs="+", default=["float32", "fp16", "sq8", "pq"])
+    parser.add_argument("--rescore", type=int, nargs="+", default=[0, 50])
+    parser.add_argument("--pq-m", type=int, default=64)
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    results = bench_vector_storage(args.size, args.storages, args.rescore, args.dim, args.k, args.queries, args.pq_m)
+    for row in results:
+        print(
+            f"{row['storage']:<8} rescore={row['rescore']:>3}  {row['bytes_per_vector']:>7.1f} B/vec  "
+            f"{row['gb_per_million']:>6.3f} GB/M  recall@{args.k}={row[f'recall@{args.k}']:.3f}  "
+            f"p50={row['p50_ms']:.3f} ms"
+        )
+    if args.output:
+        write_results(args.output, {"vector_storage": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Compare two benchmark result files produced by ``benchmarks.run``.
+
+Rows are matched on their configuration keys (index size, k, concurrency,
+pages/tables, entry point) and every latency, throughput, and size metric is
+printed with its relative change. Positive percentages mean the new value is
+larger, which is a regression for latencies and an improvement for
+throughput.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+KEY_FIELDS = ("entry_point", "backend", "mode", "pages", "tables", "index_size", "dim", "k", "concurrency")
+
+
+def _rows(results: dict) -> Iterator[Tuple[str, dict]]:
+    for suite, rows in results.items():
+        if suite == "meta" or not isinstance(rows, list):
+            continue
+        for row in rows:
+            key = ", ".join(f"{field}={row[field]}" for field in KEY_FIELDS if field in row)
+            yield f"{suite}[{key}]", row
+
+
+def _flatten(row: dict, prefix: str = "") -> Dict[str, float]:
+    values: Dict[str, float] = {}
+    for name, value in row.items():
+        if name in KEY_FIELDS:
+            continue
+        if isinstance(value, dict):
+            values.update(_flatten(value, f"{prefix}{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[f"{prefix}{name}"] = float(value)
+    return values
+
+
+def compare(old: dict, new: dict, threshold: float = 0.0) -> Iterator[str]:
+    old_rows = dict(_rows(old))
+    for key, row in _rows(new):
+        if key not in old_rows:
+            yield f"{key}: new"
+            continue
+        before = _flatten(old_rows[key])
+        for metric, value in _flatten(row).items():
+            if metric not in before:
+                continue
+            base = before[metric]
+            change = (value - base) / base * 100 if base else 0.0
+            if abs(change) >= threshold:
+                yield f"{key} {metric}: {base:g} -> {value:g} ({change:+.1f}%)"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--threshold", type=float, default=5.0, help="Only show changes above this percentage")
+    args = parser.parse_args()
+    old = json.loads(args.old.read_text(encoding="utf-8"))
+    new = json.loads(args.new.read_text(encoding="utf-8"))
+    print(f"{old.get('meta', {}).get('commit', '?')} -> {new.get('meta', {}).get('commit', '?')}")
+    for line in compare(old, new, args.threshold):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Run the full benchmark suite and write one JSON result file.
+
+Example::
+
+    python -m benchmarks.run --output bench-$(git rev-parse --short HEAD).json
+    python -m benchmarks.run --skip chat --index-sizes 1000 10000
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from . import bench_chat, bench_context, bench_embed, bench_ingest, bench_search, startup
+from ._common import run_metadata, write_results
+
+SUITES = ("startup", "ingest", "search", "embed", "context", "chat")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the backend benchmark suite")
+    parser.add_argument("--output", type=Path, default=Path("bench.json"))
+    parser.add_argument("--skip", nargs="*", default=[], choices=SUITES, help="Suites to skip")
+    parser.add_argument("--startup-repeat", type=int, default=3)
+    bench_ingest.add_arguments(parser)
+    bench_search.add_arguments(parser)
+    bench_embed.add_arguments(parser)
+    bench_context.add_arguments(parser)
+    bench_chat.add_arguments(parser)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    results: dict = {"meta": run_metadata()}
+    if "startup" not in args.skip:
+        print("== startup")
+        results["startup"] = [
+            startup.summarize(name, module, [startup.measure(module) for _ in range(args.startup_repeat)], top=5)
+            for name, module in startup.ENTRY_POINTS.items()
+        ]
+    if "ingest" not in args.skip:
+        print("== ingest")
+        results["ingest"] = bench_ingest.run(args)
+    if "search" not in args.skip:
+        print("== search")
+        results["search"] = bench_search.run(args)
+    if "embed" not in args.skip:
+        print("== embed")
+        results["embed"] = bench_embed.run(args)
+    if "context" not in args.skip:
+        print("== context")
+        results["context"] = bench_context.run(args)
+    if "chat" not in args.skip:
+        print("== chat")
+        results["chat"] = bench_chat.run(args)
+    write_results(args.output, results)
+    print("Results written to", args.output)
+
+
+if __name__ == "__main__":
+    main()
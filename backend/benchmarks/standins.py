@@ -0,0 +1,154 @@
+"""Cheap stand-ins for the embedding model and LLM used by the benchmarks.
+
+They keep the real interfaces (``embed``/``load``/``is_loaded`` and
+``generate``) so the service, server, and metrics code paths are exercised
+unchanged, while letting the suite run on machines without model weights.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import hashlib
+import re
+import threading
+import time
+from typing import Any, Iterable, List, Optional
+
+import numpy as np
+
+from rag.config import EmbeddingConfig
+from rag.embedding import EmbeddingModel
+from rag.metrics import record_generation, span
+from rag.threads import thread_scope
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass(slots=True)
+class HashingEmbeddingModel(EmbeddingModel):
+    """Bag-of-words hashing embedder: deterministic, dependency-free, fast.
+
+    ``call_overhead_seconds`` and ``seconds_per_text`` add the fixed and
+    per-text cost of a transformer forward pass; calls take turns on one
+    simulated device, so batching pays off the way it does on a real model.
+    """
+
+    config: EmbeddingConfig = field(default_factory=lambda: EmbeddingConfig(model_name="hashing"))
+    dim: int = 256
+    call_overhead_seconds: float = 0.0
+    seconds_per_text: float = 0.0
+    _device: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def embed(self, texts: Iterable[str]) -> np.ndarray:
+        with span("embed"):
+            texts = list(texts)
+            cost = self.call_overhead_seconds + len(texts) * self.seconds_per_text
+            if cost:
+                with self._device:
+                    time.sleep(cost)
+            vectors = np.zeros((len(texts), self.dim), dtype="float32")
+            for row, text in enumerate(texts):
+                for token in _TOKEN.findall(text.lower()):
+                    digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+                    bucket = int.from_bytes(digest[:4], "little") % self.dim
+                    sign = 1.0 if digest[4] & 1 else -1.0
+                    vectors[row, bucket] += sign
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            np.divide(vectors, norms, out=vectors, where=norms > 0)
+            return vectors
+
+
+@dataclass(slots=True)
+class StandInLLM:
+    """Tiny local "model" that copies context words with a fixed per-token cost.
+
+    With ``serial`` set, generations take turns like a CPU-bound model that
+    saturates the machine; otherwise they overlap freely.
+    """
+
+    max_new_tokens: int = 32
+    seconds_per_token: float = 0.002
+    prefill_seconds_per_token: float = 0.00005
+    is_loaded: bool = True
+    serial: bool = False
+    _device: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def load(self) -> None:
+        self.is_loaded = True
+
+    def generate(self, prompt: str, max_new_tokens: Optional[int] = None) -> str:
+        with span("generate"):
+            prompt_tokens = len(prompt.split())
+            budget = max_new_tokens or self.max_new_tokens
+            words = prompt.split("CONTEXT:", 1)[-1].split()[:budget]
+            start = time.perf_counter()
+            seconds = prompt_tokens * self.prefill_seconds_per_token + len(words) * self.seconds_per_token
+            if self.serial:
+                with self._device:
+                    time.sleep(seconds)
+            else:
+                time.sleep(seconds)
+            record_generation(prompt_tokens, len(words), time.perf_counter() - start)
+            return " ".join(words)
+
+
+def _torch_layers(hidden: int, layers: int) -> List[Any]:
+    import torch
+
+    generator = torch.Generator().manual_seed(0)
+    return [torch.randn(hidden, hidden, generator=generator) / hidden**0.5 for _ in range(layers)]
+
+
+def _torch_forward(weights: List[Any], rows: int) -> None:
+    import torch
+
+    with torch.no_grad():
+        hidden = torch.ones(rows, weights[0].shape[0])
+        for weight in weights:
+            hidden = torch.relu(hidden @ weight)
+
+
+@dataclass(slots=True)
+class TorchEmbeddingModel(HashingEmbeddingModel):
+    """Hashing vectors, paid for with a torch encoder pass over ``tokens_per_text`` rows per text.
+
+    The matmuls use torch's intra-op thread pool like BGE-M3 does, so thread
+    oversubscription shows up in latency; retrieval still uses the hashing
+    vectors the index was built with.
+    """
+
+    hidden: int = 1024
+    layers: int = 8
+    tokens_per_text: int = 32
+    _weights: Optional[List[Any]] = field(default=None, repr=False)
+
+    def embed(self, texts: Iterable[str]) -> np.ndarray:
+        texts = list(texts)
+        with thread_scope("embed"):
+            if self._weights is None:
+                self._weights = _torch_layers(self.hidden, self.layers)
+            _torch_forward(self._weights, len(texts) * self.tokens_per_text)
+        return HashingEmbeddingModel.embed(self, texts)
+
+
+@dataclass(slots=True)
+class TorchLLM(StandInLLM):
+    """``StandInLLM`` whose cost is a torch prefill over the prompt plus one forward pass per token."""
+
+    hidden: int = 2048
+    layers: int = 8
+    _weights: Optional[List[Any]] = field(default=None, repr=False)
+
+    def generate(self, prompt: str, max_new_tokens: Optional[int] = None) -> str:
+        with span("generate"):
+            prompt_tokens = len(prompt.split())
+            budget = max_new_tokens or self.max_new_tokens
+            words = prompt.split("CONTEXT:", 1)[-1].split()[:budget]
+            start = time.perf_counter()
+            with thread_scope("generate"):
+                if self._weights is None:
+                    self._weights = _torch_layers(self.hidden, self.layers)
+                _torch_forward(self._weights, prompt_tokens)
+                for _ in words:
+                    _torch_forward(self._weights, 1)
+            record_generation(prompt_tokens, len(words), time.perf_counter() - start)
+            return " ".join(words)
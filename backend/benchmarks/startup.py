@@ -0,0 +1,126 @@
+"""Measure import-time cost of the CLI and server entry points.
+
+Each entry point is imported in a fresh interpreter with ``-X importtime``.
+The script reports the wall time, the slowest imports by cumulative time, and
+whether any heavy dependency (torch, transformers, ...) was pulled in at
+import time.
+
+Usage::
+
+    python benchmarks/startup.py --repeat 5 --output startup.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+ENTRY_POINTS: Dict[str, str] = {
+    "ingest-pdf": "rag.cli.ingest",
+    "query-chatbot": "rag.cli.query",
+    "server": "rag.server",
+}
+
+HEAVY_MODULES = (
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "docling",
+    "camelot",
+    "tabula",
+    "fitz",
+    "faiss",
+)
+
+
+def parse_importtime(stderr: str) -> List[dict]:
+    """Parse ``-X importtime`` output into ``{module, self_us, cumulative_us}`` rows."""
+    rows: List[dict] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, _, payload = line.partition(":")
+        parts = [part.strip() for part in payload.split("|")]
+        if len(parts) != 3:
+            continue
+        try:
+            rows.append(
+                {
+                    "module": parts[2].strip(),
+                    "self_us": int(parts[0]),
+                    "cumulative_us": int(parts[1]),
+                }
+            )
+        except ValueError:
+            continue
+    return rows
+
+
+def measure(module: str) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    wall = time.perf_counter() - start
+    rows = parse_importtime(completed.stderr)
+    return {"wall_s": wall, "ok": completed.returncode == 0, "rows": rows}
+
+
+def summarize(name: str, module: str, runs: List[dict], top: int) -> dict:
+    rows = runs[-1]["rows"]
+    imported = {row["module"] for row in rows}
+    slowest = sorted(rows, key=lambda row: row["cumulative_us"], reverse=True)
+    return {
+        "entry_point": name,
+        "module": module,
+        "ok": all(run["ok"] for run in runs),
+        "wall_ms_median": round(statistics.median(run["wall_s"] for run in runs) * 1000, 1),
+        "wall_ms_min": round(min(run["wall_s"] for run in runs) * 1000, 1),
+        "heavy_modules_imported": sorted(
+            heavy for heavy in HEAVY_MODULES if heavy in imported
+        ),
+        "slowest_imports": [
+            {"module": row["module"], "cumulative_ms": round(row["cumulative_us"] / 1000, 1)}
+            for row in slowest[:top]
+        ],
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark entry point import time")
+    parser.add_argument("--repeat", type=int, default=3, help="Interpreter launches per entry point")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to report")
+    parser.add_argument("--output", type=Path, default=None, help="Write results as JSON")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    results = []
+    for name, module in ENTRY_POINTS.items():
+        runs = [measure(module) for _ in range(max(args.repeat, 1))]
+        summary = summarize(name, module, runs, args.top)
+        results.append(summary)
+        heavy = ", ".join(summary["heavy_modules_imported"]) or "none"
+        print(f"{name:<14} {summary['wall_ms_median']:>8.1f} ms  heavy imports: {heavy}")
+
+    if args.output is not None:
+        args.output.write_text(json.dumps({"startup": results}, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Generate synthetic prospectus-style PDFs for benchmarks.
+
+The documents mimic an admissions prospectus: numbered sections of prose and
+ruled tables of programmes with codes, quotas, cut-off scores, and tuition.
+Text is ASCII-folded Vietnamese because the base-14 PDF fonts cannot encode
+Vietnamese diacritics.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from pathlib import Path
+from typing import List, Sequence
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN = 50
+LINE_HEIGHT = 14
+FONT_SIZE = 10
+
+PROGRAMMES = (
+    "Cong nghe thong tin",
+    "Khoa hoc may tinh",
+    "Toan hoc",
+    "Toan tin",
+    "Vat ly hoc",
+    "Hoa hoc",
+    "Sinh hoc",
+    "Khoa hoc moi truong",
+    "Dia chat hoc",
+    "Khi tuong va khi hau hoc",
+    "Hai duong hoc",
+    "Cong nghe ky thuat hoa hoc",
+    "Khoa hoc du lieu",
+    "Ky thuat dien tu",
+    "Quan ly tai nguyen",
+)
+
+PROSE = (
+    "Truong Dai hoc Khoa hoc Tu nhien tuyen sinh dai hoc chinh quy nam {year} theo cac "
+    "phuong thuc xet tuyen thang, xet ket qua thi tot nghiep THPT va xet ket qua danh gia "
+    "nang luc. Thi sinh can doc ky quy che, chi tieu va to hop mon xet tuyen cua tung nganh. "
+    "Hoc phi duoc tinh theo tin chi va co the dieu chinh theo lo trinh cua Nha nuoc. "
+    "Nganh {programme} co chi tieu {quota} sinh vien va diem chuan nam truoc la {score}. "
+)
+
+TABLE_HEADER = ("Nganh", "Ma nganh", "Chi tieu", "Diem chuan", "Hoc phi/tin chi")
+
+
+def _table_rows(rng: random.Random, count: int, year: int) -> List[Sequence[str]]:
+    rows = []
+    for index in range(count):
+        programme = PROGRAMMES[index % len(PROGRAMMES)]
+        if index >= len(PROGRAMMES):
+            programme = f"{programme} {index // len(PROGRAMMES) + 1}"
+        rows.append(
+            (
+                programme,
+                f"QHT{rng.randint(1, 99):02d}",
+                str(rng.randrange(40, 300, 10)),
+                f"{rng.uniform(18, 28):.2f}",
+                f"{rng.randrange(350, 650, 5)}000",
+            )
+        )
+    return rows
+
+
+def _draw_table(page, top: float, rows: List[Sequence[str]]) -> float:
+    columns = len(TABLE_HEADER)
+    widths = [170, 70, 60, 70, 125][:columns]
+    height = LINE_HEIGHT + 6
+    lines = [TABLE_HEADER, *rows]
+    bottom = top + height * len(lines)
+    x_positions = [MARGIN]
+    for width in widths:
+        x_positions.append(x_positions[-1] + width)
+    for row_index in range(len(lines) + 1):
+        y = top + row_index * height
+        page.draw_line((MARGIN, y), (x_positions[-1], y), width=0.6)
+    for x in x_positions:
+        page.draw_line((x, top), (x, bottom), width=0.6)
+    for row_index, row in enumerate(lines):
+        baseline = top + row_index * height + height - 6
+        for column, value in enumerate(row):
+            page.insert_text((x_positions[column] + 3, baseline), value, fontsize=FONT_SIZE - 1)
+    return bottom
+
+
+def generate_prospectus(
+    path: Path,
+    pages: int = 10,
+    tables: int = 5,
+    rows_per_table: int = 12,
+    year: int = 2026,
+    seed: int = 13,
+) -> Path:
+    """Write a synthetic admissions prospectus PDF and return its path.
+
+    Tables are spread evenly across the pages; every page also gets a section
+    heading and a few paragraphs of prose.
+    """
+    import fitz  # type: ignore
+
+    rng = random.Random(seed)
+    document = fitz.open()
+    table_pages = {int(index * pages / tables) for index in range(tables)} if tables else set()
+    tables_left = tables
+    for page_number in range(pages):
+        page = document.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        y = MARGIN + LINE_HEIGHT
+        page.insert_text((MARGIN, y), f"Muc {page_number + 1}. Thong tin tuyen sinh {year}", fontsize=13)
+        y += 2 * LINE_HEIGHT
+        paragraphs = rng.randint(2, 4)
+        for _ in range(paragraphs):
+            programme = rng.choice(PROGRAMMES)
+            text = PROSE.format(
+                year=year,
+                programme=programme,
+                quota=rng.randrange(40, 300, 10),
+                score=f"{rng.uniform(18, 28):.2f}",
+            )
+            rect = fitz.Rect(MARGIN, y, PAGE_WIDTH - MARGIN, y + 6 * LINE_HEIGHT)
+            page.insert_textbox(rect, text, fontsize=FONT_SIZE)
+            y += 6 * LINE_HEIGHT
+        per_page = 1 if page_number in table_pages else 0
+        if page_number == pages - 1:
+            per_page = tables_left
+        for _ in range(per_page):
+            if tables_left <= 0:
+                break
+            rows = _table_rows(rng, rows_per_table, year)
+            available = int((PAGE_HEIGHT - MARGIN - y) // (LINE_HEIGHT + 6)) - 2
+            if available < 2:
+                page = document.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+                y = MARGIN
+                available = int((PAGE_HEIGHT - 2 * MARGIN) // (LINE_HEIGHT + 6)) - 2
+            y = _draw_table(page, y + LINE_HEIGHT, rows[:available]) + LINE_HEIGHT
+            tables_left -= 1
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document.save(str(path))
+    document.close()
+    return path
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate a synthetic admissions PDF")
+    parser.add_argument("output", type=Path, help="Where to write the PDF")
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--tables", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=12, help="Rows per table")
+    parser.add_argument("--seed", type=int, default=13)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    path = generate_prospectus(args.output, args.pages, args.tables, args.rows, seed=args.seed)
+    print("Synthetic prospectus written to", path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Dynamic micro-batching of query embeddings across concurrent requests.
+
+Every chat request embeds a single question. At batch size 1 the
+transformer's per-call overhead dominates. ``EmbeddingBatcher`` queues
+small ``embed`` calls. One worker thread waits up to ``max_batch_wait_ms``
+(or until ``max_batch_size`` texts are queued), encodes the whole batch in
+one call, and hands each caller its rows. While a batch is being encoded,
+new arrivals queue up, so batches grow with load on their own. Calls with
+``max_batch_size`` texts or more (ingestion) bypass the queue.
+"""
+from __future__ import annotations
+
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .cancellation import check_deadline, remaining_timeout
+from .config import EmbeddingConfig
+from .metrics import EMBED_BATCH_SIZE, record_value, span
+
+
+@dataclass(slots=True)
+class _Pending:
+    model: Any
+    texts: List[str]
+    future: "Future[Tuple[Any, int]]" = field(default_factory=Future)
+
+
+@dataclass(slots=True)
+class EmbeddingBatcher:
+    """Queue of pending embed calls drained by one worker thread."""
+
+    max_batch_size: int = 32
+    max_wait: float = 0.002
+    batches: int = 0
+    texts: int = 0
+    _queue: "queue.SimpleQueue[_Pending]" = field(init=False, default_factory=queue.SimpleQueue, repr=False)
+    _worker: Optional[threading.Thread] = field(init=False, default=None, repr=False)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock, repr=False)
+
+    @classmethod
+    def from_config(cls, config: EmbeddingConfig) -> "EmbeddingBatcher":
+        return cls(max_batch_size=config.max_batch_size, max_wait=config.max_batch_wait_ms / 1000)
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.texts / self.batches if self.batches else 0.0
+
+    def embed(self, model: Any, texts: Iterable[str]) -> Any:
+        """Embed ``texts`` with ``model``, sharing the call with concurrent requests."""
+        texts = list(texts)
+        if len(texts) >= self.max_batch_size:
+            return model.embed(texts)
+        pending = _Pending(model, texts)
+        self._start()
+        self._queue.put(pending)
+        with span("embed_batched"):
+            try:
+                vectors, batch_size = pending.future.result(timeout=remaining_timeout(None))
+            except FutureTimeoutError:  # not the builtin TimeoutError before Python 3.11
+                check_deadline("embedding")
+                raise
+        record_value("embed_batch_size", batch_size)
+        return vectors
+
+    def _start(self) -> None:
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+                    self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0].texts)
+            flush_at = time.monotonic() + self.max_wait
+            while size < self.max_batch_size:
+                wait = flush_at - time.monotonic()
+                try:
+                    pending = self._queue.get(timeout=wait) if wait > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(pending)
+                size += len(pending.texts)
+            self._flush(batch)
+
+    def _flush(self, batch: List[_Pending]) -> None:
+        groups: Dict[int, List[_Pending]] = {}
+        for pending in batch:
+            groups.setdefault(id(pending.model), []).append(pending)
+        for group in groups.values():
+            texts = [text for pending in group for text in pending.texts]
+            try:
+                vectors = group[0].model.embed(texts)
+            except BaseException as exc:
+                for pending in group:
+                    pending.future.set_exception(exc)
+                continue
+            self.batches += 1
+            self.texts += len(texts)
+            EMBED_BATCH_SIZE.observe(len(texts))
+            offset = 0
+            for pending in group:
+                pending.future.set_result((vectors[offset : offset + len(pending.texts)], len(texts)))
+                offset += len(pending.texts)
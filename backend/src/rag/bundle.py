@@ -0,0 +1,250 @@
+"""Portable, versioned index bundles.
+
+A bundle is an uncompressed tar archive holding everything a node needs to
+serve an index without re-ingesting:
+
+- ``manifest.json``: format, content version, embedding model, chunking
+  and index settings, and the size and SHA-256 of every file.
+- ``index.faiss``, ``meta.json`` (chunk texts and metadata), and when
+  present the ``index.f32`` re-scoring sidecar and ``tables.sqlite3``.
+
+``export_bundle`` writes one from the current index files.
+``install_bundle`` extracts it into ``<bundles_dir>/<version>/``,
+verifies the checksums, and then points ``<bundles_dir>/current`` at it
+atomically. ``open_bundle`` is what a serving node calls. It follows
+``current``, refuses a bundle whose embedding model or normalisation
+differs from the node's, and returns a ``VectorStoreConfig`` that reads the
+bundle's index through a memory map. Extracted files are plain files, so
+no copy is made on load.
+"""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime, timezone
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+import shutil
+import tarfile
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from .config import ChunkingConfig, EmbeddingConfig, VectorStoreConfig
+from .vector_store import mmap_flags
+
+BUNDLE_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+INDEX_NAME = "index.faiss"
+METADATA_NAME = "meta.json"
+SIDECAR_NAME = "index.f32"
+TABLES_NAME = "tables.sqlite3"
+BUNDLE_FILES = (INDEX_NAME, METADATA_NAME, SIDECAR_NAME, TABLES_NAME)
+
+
+class BundleError(ValueError):
+    """The bundle is malformed, incomplete, or corrupted."""
+
+
+class BundleMismatchError(BundleError):
+    """The bundle was embedded with a different model than this node uses."""
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass(slots=True)
+class BundleFile:
+    name: str
+    bytes: int
+    sha256: str
+
+
+@dataclass(slots=True)
+class BundleManifest:
+    version: str
+    created_at: str
+    embedding_model: str
+    normalize: bool
+    dim: int
+    chunks: int
+    index_factory: str
+    storage: str
+    chunking: Dict[str, Any]
+    files: List[BundleFile] = field(default_factory=list)
+    label: Optional[str] = None
+    format: int = BUNDLE_FORMAT
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "BundleManifest":
+        if payload.get("format") != BUNDLE_FORMAT:
+            raise BundleError(f"Unsupported bundle format {payload.get('format')!r}; expected {BUNDLE_FORMAT}")
+        try:
+            files = [BundleFile(**entry) for entry in payload["files"]]
+            return cls(**{**payload, "files": files})
+        except (KeyError, TypeError) as exc:
+            raise BundleError(f"Malformed bundle manifest: {exc}") from exc
+
+    def file(self, name: str) -> Optional[BundleFile]:
+        return next((entry for entry in self.files if entry.name == name), None)
+
+    def check_compatible(self, embedding: EmbeddingConfig) -> None:
+        """Raise ``BundleMismatchError`` unless query vectors from ``embedding`` match the index."""
+        if self.embedding_model != embedding.model_name or self.normalize != embedding.normalize:
+            raise BundleMismatchError(
+                f"Index bundle {self.version} was embedded with {self.embedding_model!r} "
+                f"(normalize={self.normalize}); this node embeds queries with "
+                f"{embedding.model_name!r} (normalize={embedding.normalize})"
+            )
+
+
+def export_bundle(
+    store: VectorStoreConfig,
+    embedding: EmbeddingConfig,
+    chunking: ChunkingConfig,
+    output: Path,
+    tables_path: Optional[Path] = None,
+    label: Optional[str] = None,
+) -> BundleManifest:
+    """Package the index at ``store`` into the tar archive ``output``."""
+    import faiss  # type: ignore
+
+    sources = {INDEX_NAME: store.index_path, METADATA_NAME: store.metadata_path}
+    for name, path in sources.items():
+        if not path.exists():
+            raise FileNotFoundError(f"{path} not found; run ingest-pdf before exporting a bundle")
+    sidecar = store.index_path.with_suffix(".f32")
+    if store.storage != "float32" and sidecar.exists():
+        sources[SIDECAR_NAME] = sidecar
+    if tables_path is not None and Path(tables_path).exists():
+        sources[TABLES_NAME] = Path(tables_path)
+
+    index = faiss.read_index(str(store.index_path), mmap_flags(faiss))
+    files = [BundleFile(name, path.stat().st_size, file_sha256(path)) for name, path in sources.items()]
+    version = hashlib.sha256("".join(entry.sha256 for entry in files).encode("ascii")).hexdigest()[:12]
+    manifest = BundleManifest(
+        version=version,
+        created_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        embedding_model=embedding.model_name,
+        normalize=embedding.normalize,
+        dim=int(index.d),
+        chunks=int(index.ntotal),
+        index_factory=store.index_factory,
+        storage=store.storage,
+        chunking=asdict(chunking),
+        files=files,
+        label=label,
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    partial = output.with_name(output.name + ".partial")
+    with tarfile.open(partial, "w") as archive:
+        data = json.dumps(manifest.to_dict(), indent=2, ensure_ascii=False).encode("utf-8")
+        info = tarfile.TarInfo(MANIFEST_NAME)
+        info.size = len(data)
+        info.mtime = int(datetime.now(timezone.utc).timestamp())
+        archive.addfile(info, io.BytesIO(data))
+        for name, path in sources.items():
+            archive.add(path, arcname=name, recursive=False)
+    os.replace(partial, output)
+    return manifest
+
+
+def read_manifest(directory: Path) -> BundleManifest:
+    path = Path(directory) / MANIFEST_NAME
+    if not path.exists():
+        raise FileNotFoundError(f"No index bundle at {directory} (missing {MANIFEST_NAME})")
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError as exc:
+        raise BundleError(f"Malformed bundle manifest: {exc}") from exc
+    return BundleManifest.from_dict(payload)
+
+
+def verify_bundle(directory: Path, checksums: bool = True) -> BundleManifest:
+    """Check that every file in the manifest is present with the right size (and hash)."""
+    directory = Path(directory)
+    manifest = read_manifest(directory)
+    for required in (INDEX_NAME, METADATA_NAME):
+        if manifest.file(required) is None:
+            raise BundleError(f"Bundle {manifest.version} has no {required}")
+    for entry in manifest.files:
+        if entry.name not in BUNDLE_FILES:
+            raise BundleError(f"Bundle {manifest.version} lists unexpected file {entry.name!r}")
+        path = directory / entry.name
+        if not path.exists() or path.stat().st_size != entry.bytes:
+            raise BundleError(f"Bundle {manifest.version}: {entry.name} is missing or truncated")
+        if checksums and file_sha256(path) != entry.sha256:
+            raise BundleError(f"Bundle {manifest.version}: checksum mismatch for {entry.name}")
+    return manifest
+
+
+def install_bundle(archive: Path, bundles_dir: Path, activate: bool = True) -> Path:
+    """Extract and verify ``archive`` under ``bundles_dir``; optionally make it ``current``."""
+    bundles_dir = Path(bundles_dir)
+    bundles_dir.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=".install-", dir=bundles_dir))
+    try:
+        with tarfile.open(archive, "r") as bundle:
+            for member in bundle.getmembers():
+                if member.name not in (MANIFEST_NAME, *BUNDLE_FILES) or not member.isfile():
+                    raise BundleError(f"Unexpected entry {member.name!r} in {archive}")
+                source = bundle.extractfile(member)
+                with (staging / member.name).open("wb") as target:
+                    shutil.copyfileobj(source, target, 1 << 20)
+        manifest = verify_bundle(staging)
+        target = bundles_dir / manifest.version
+        if target.exists():
+            shutil.rmtree(staging)
+        else:
+            os.replace(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    if activate:
+        activate_bundle(bundles_dir, manifest.version)
+    return target
+
+
+def activate_bundle(bundles_dir: Path, version: str) -> None:
+    """Point ``<bundles_dir>/current`` at ``version`` (an atomic rename, so readers never see a gap)."""
+    bundles_dir = Path(bundles_dir)
+    if not (bundles_dir / version / MANIFEST_NAME).exists():
+        raise FileNotFoundError(f"Bundle {version} is not installed in {bundles_dir}")
+    link = bundles_dir / f".current-{os.getpid()}"
+    if link.is_symlink() or link.exists():
+        link.unlink()
+    link.symlink_to(version, target_is_directory=True)
+    os.replace(link, bundles_dir / "current")
+
+
+def resolve_bundle(path: Path) -> Path:
+    """A bundle directory, or a bundles directory whose ``current`` link names one."""
+    path = Path(path)
+    if (path / MANIFEST_NAME).exists():
+        return path
+    return (path / "current").resolve()
+
+
+def open_bundle(path: Path, embedding: EmbeddingConfig, base: VectorStoreConfig) -> tuple[BundleManifest, VectorStoreConfig]:
+    """Validate the bundle at ``path`` for this node and return the store config to load it with."""
+    directory = resolve_bundle(path)
+    manifest = verify_bundle(directory, checksums=False)
+    manifest.check_compatible(embedding)
+    store = replace(
+        base,
+        index_path=directory / INDEX_NAME,
+        metadata_path=directory / METADATA_NAME,
+        index_factory=manifest.index_factory,
+        storage=manifest.storage,
+        mmap=True,
+    )
+    return manifest, store
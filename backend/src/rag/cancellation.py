@@ -0,0 +1,173 @@
+"""Request deadlines and cooperative cancellation.
+
+``/chat`` opens a ``cancellation_scope`` for each request. The token in it
+expires at the request's deadline, or is cancelled when the client
+disconnects. Retrieval checks it between stages. Sharded search and the
+model-server client shorten their timeouts to the time left. Generation
+stops at the next decoding step through ``CancellationCriteria``, which is a
+transformers stopping criterion. The token lives in a context variable, so
+no signature between the endpoint and the model needs to change.
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import threading
+import time
+from typing import Any, Callable, Iterator, List, Optional
+
+from .metrics import GENERATIONS_CANCELLED, LLM_TOKENS_AVOIDED, record_value
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request ran out of time (or its client left) before an answer existed."""
+
+
+@dataclass(slots=True)
+class CancellationToken:
+    """Cancelled explicitly, at ``deadline``, or once every ``linked`` token is.
+
+    Linked tokens let several requests share one computation (see
+    ``rag.single_flight``): it keeps running while any of them still waits.
+    """
+
+    deadline: Optional[float] = None  # time.monotonic() value
+    reason: Optional[str] = None
+    linked: List["CancellationToken"] = field(default_factory=list)
+    _event: threading.Event = field(default_factory=threading.Event, repr=False)
+    _callbacks: List[Callable[[], None]] = field(default_factory=list, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @classmethod
+    def after(cls, seconds: Optional[float]) -> "CancellationToken":
+        return cls(deadline=None if seconds is None else time.monotonic() + seconds)
+
+    def cancel(self, reason: str = "disconnect") -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Run ``callback`` in the cancelling thread once; returns a function that unregisters it.
+
+        Deadlines are noticed lazily, so only explicit and linked
+        cancellations are guaranteed to call it promptly.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._discard(callback)
+        callback()
+        return lambda: None
+
+    def _discard(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def link(self, token: "CancellationToken") -> None:
+        """Also cancel this token once ``token`` and every other linked token are."""
+        self.linked.append(token)
+        token.on_cancel(self._check_linked)
+
+    def _check_linked(self) -> None:
+        linked = list(self.linked)
+        if linked and all(token.cancelled for token in linked):
+            self.cancel(linked[-1].reason or "cancelled")
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._event.is_set():
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                self.cancel("deadline")
+            elif self.linked and all(token.cancelled for token in list(self.linked)):
+                self.cancel(self.linked[-1].reason or "cancelled")
+        return self._event.is_set()
+
+    def remaining(self) -> Optional[float]:
+        remaining = None if self.deadline is None else max(self.deadline - time.monotonic(), 0.0)
+        if self.linked:
+            linked = [token.remaining() for token in list(self.linked)]
+            latest = None if None in linked else max(linked)
+            if latest is not None and (remaining is None or latest < remaining):
+                remaining = latest
+        return remaining
+
+    def timeout(self, default: Optional[float]) -> Optional[float]:
+        """``default`` shortened to the time left before the deadline."""
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        return remaining if default is None else min(default, remaining)
+
+    def check(self, stage: str) -> None:
+        if self.cancelled:
+            raise DeadlineExceeded(f"Request {self.reason} before {stage}")
+
+
+_current_token: ContextVar[Optional[CancellationToken]] = ContextVar("cancellation_token", default=None)
+
+
+@contextmanager
+def cancellation_scope(token: CancellationToken) -> Iterator[CancellationToken]:
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+def current_token() -> Optional[CancellationToken]:
+    return _current_token.get()
+
+
+def check_deadline(stage: str) -> None:
+    token = current_token()
+    if token is not None:
+        token.check(stage)
+
+
+def remaining_timeout(default: Optional[float]) -> Optional[float]:
+    token = current_token()
+    return default if token is None else token.timeout(default)
+
+
+class CancellationCriteria:
+    """Stopping criterion that ends ``model.generate`` once the token is cancelled.
+
+    It is checked after every decoding step, so generation stops within one
+    forward pass of a deadline or disconnect. What was generated so far is
+    returned as usual.
+    """
+
+    def __init__(self, token: CancellationToken) -> None:
+        self.token = token
+        self.fired = False
+
+    def stop(self) -> bool:
+        self.fired = self.fired or self.token.cancelled
+        return self.fired
+
+    def __call__(self, input_ids: Any, scores: Any, **kwargs: Any) -> Any:
+        import torch  # already imported by the model that calls this
+
+        return torch.full((input_ids.shape[0],), self.stop(), dtype=torch.bool, device=input_ids.device)
+
+    def record(self, max_new_tokens: int, generated_tokens: int) -> None:
+        if self.fired:
+            record_cancellation(self.token.reason, max_new_tokens, generated_tokens)
+
+
+def record_cancellation(reason: Optional[str], max_new_tokens: int, generated_tokens: int) -> None:
+    """Count a generation that was cut short and the tokens it did not spend."""
+    avoided = max(max_new_tokens - generated_tokens, 0)
+    GENERATIONS_CANCELLED.inc(reason or "cancelled")
+    LLM_TOKENS_AVOIDED.inc(amount=avoided)
+    record_value("generation_cancelled", 1)
+    record_value("tokens_avoided", avoided)
@@ -1,11 +1,62 @@
 """Chunking helpers with table-aware logic."""
 from __future__ import annotations
 
+import csv
 from dataclasses import dataclass, field
-from typing import Iterable, List
+import io
+import re
+from typing import Iterable, List, Optional, Sequence, Tuple
 
 from .config import Chunk, ChunkingConfig, DocumentMetadata
 
+TABLE_FORMATS = ("markdown", "csv", "tsv", "records")
+MARKDOWN_RULE = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+_CELL_SPLIT = re.compile(r"(?<!\\)\|")
+
+
+def split_markdown_row(line: str) -> List[str]:
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    return [cell.strip().replace("\\|", "|") for cell in _CELL_SPLIT.split(line)]
+
+
+def parse_markdown_table(lines: Sequence[str]) -> Optional[Tuple[List[str], List[List[str]]]]:
+    """Header cells and row cells of a markdown table, or ``None`` if it has no separator row."""
+    if len(lines) < 2 or not MARKDOWN_RULE.match(lines[1]):
+        return None
+    return split_markdown_row(lines[0]), [split_markdown_row(line) for line in lines[2:]]
+
+
+def render_table(header: Sequence[str], rows: Sequence[Sequence[str]], table_format: str) -> str:
+    """Render parsed table cells as ``csv``, ``tsv``, or ``records``."""
+    if table_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(header)
+        writer.writerows(rows)
+        return buffer.getvalue().rstrip("\n")
+    if table_format == "tsv":
+        return "\n".join("\t".join(" ".join(cell.split()) for cell in line) for line in (header, *rows))
+    if table_format == "records":
+        lines = []
+        for row in rows:
+            fields = [f"{name}: {value}" if name else value for name, value in zip(header, row) if value]
+            lines.append("- " + "; ".join(fields))
+        return "\n".join(lines)
+    raise ValueError(f"Unknown table format {table_format!r}; expected one of {TABLE_FORMATS}")
+
+
+def table_header_size(lines: Sequence[str]) -> int:
+    """Lines of a rendered table chunk that form its header (none for ``records``)."""
+    if len(lines) > 1 and MARKDOWN_RULE.match(lines[1]):
+        return 2
+    if lines and all(line.startswith("- ") for line in lines):
+        return 0
+    return 1
+
 
 @dataclass(slots=True)
 class TextChunker:
@@ -33,10 +84,20 @@ class TextChunker:
 
 @dataclass(slots=True)
 class TableChunker:
-    """Chunk tabular content row by row while repeating the header."""
+    """Chunk tabular content row by row while repeating the header.
+
+    Each group is rendered in ``table_prompt_format`` as the chunk text and,
+    when it differs, in ``table_embed_format`` as the text to embed. Tables
+    without a markdown separator row are kept as markdown.
+    """
 
     config: ChunkingConfig
 
+    def __post_init__(self) -> None:
+        for table_format in (self.config.table_embed_format, self.config.table_prompt_format):
+            if table_format not in TABLE_FORMATS:
+                raise ValueError(f"Unknown table format {table_format!r}; expected one of {TABLE_FORMATS}")
+
     def chunk(self, markdown_table: str, metadata: DocumentMetadata) -> List[Chunk]:
         lines = [line for line in markdown_table.splitlines() if line.strip()]
         if not lines:
@@ -44,14 +105,27 @@ class TableChunker:
 
         header = [line for line in lines[:2]]  # header + separator
         rows = lines[2:]
+        parsed = parse_markdown_table(lines)
         group_size = max(self.config.table_row_group_size, 1)
         chunks: List[Chunk] = []
         for index in range(0, len(rows), group_size):
             group = rows[index : index + group_size]
-            table_section = "\n".join(header + group)
-            chunks.append(Chunk(text=table_section, metadata=metadata.copy_with()))
+            markdown = "\n".join(header + group)
+            if parsed is None:
+                chunks.append(Chunk(text=markdown, metadata=metadata.copy_with()))
+                continue
+            cells = parsed[1][index : index + group_size]
+            text = self._render(markdown, parsed[0], cells, self.config.table_prompt_format)
+            embed_text = self._render(markdown, parsed[0], cells, self.config.table_embed_format)
+            chunks.append(
+                Chunk(text=text, metadata=metadata.copy_with(), embed_text=None if embed_text == text else embed_text)
+            )
         return chunks
 
+    @staticmethod
+    def _render(markdown: str, header: List[str], rows: List[List[str]], table_format: str) -> str:
+        return markdown if table_format == "markdown" else render_table(header, rows, table_format)
+
 
 @dataclass(slots=True)
 class ChunkBuilder:
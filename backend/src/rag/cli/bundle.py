@@ -0,0 +1,63 @@
+"""CLI entry point to export, install, and inspect portable index bundles."""
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+from rag.bundle import activate_bundle, export_bundle, install_bundle, verify_bundle
+from rag.config import ChatbotConfig
+
+DEFAULT_BUNDLES_DIR = Path("data/bundles")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Package the index for other nodes, or install such a package")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Write the current index, chunks, and tables to a bundle")
+    export.add_argument("output", type=Path, help="Bundle archive to write, e.g. index-2026.tar")
+    export.add_argument("--label", default=None, help="Human-readable name stored in the manifest")
+
+    install = commands.add_parser("install", help="Extract and verify a bundle, then make it current")
+    install.add_argument("archive", type=Path)
+    install.add_argument("--bundles-dir", type=Path, default=DEFAULT_BUNDLES_DIR)
+    install.add_argument("--no-activate", action="store_true", help="Install without switching 'current'")
+
+    activate = commands.add_parser("activate", help="Switch 'current' to an installed bundle version")
+    activate.add_argument("version")
+    activate.add_argument("--bundles-dir", type=Path, default=DEFAULT_BUNDLES_DIR)
+
+    verify = commands.add_parser("verify", help="Re-check an installed bundle's checksums")
+    verify.add_argument("directory", type=Path)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.command == "export":
+        config = ChatbotConfig()
+        pipeline = config.pipeline
+        manifest = export_bundle(
+            pipeline.vector_store,
+            pipeline.embedding,
+            pipeline.chunking,
+            args.output,
+            tables_path=pipeline.tables.path if pipeline.tables.enabled else None,
+            label=args.label,
+        )
+        print(f"Bundle {manifest.version} ({manifest.chunks} chunks, {manifest.embedding_model}) written to {args.output}")
+    elif args.command == "install":
+        target = install_bundle(args.archive, args.bundles_dir, activate=not args.no_activate)
+        state = "installed" if args.no_activate else "installed and activated"
+        print(f"Bundle {target.name} {state} in {target}")
+    elif args.command == "activate":
+        activate_bundle(args.bundles_dir, args.version)
+        print(f"{args.bundles_dir / 'current'} -> {args.version}")
+    else:
+        manifest = verify_bundle(args.directory)
+        print(json.dumps(manifest.to_dict(), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""CLI entry point to evaluate retrieval quality against cost across a config grid."""
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from rag.config import ChatbotConfig, DocumentMetadata
+from rag.chunking import TABLE_FORMATS
+from rag.compression import ContextCompressor
+from rag.evaluation import (
+    IndexSetting,
+    RetrievalEvaluator,
+    cheapest_meeting,
+    chunking_grid,
+    evaluate_compression,
+    load_gold_set,
+)
+from rag.service import ChatbotService
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Evaluate retrieval recall@k and MRR over a config grid")
+    parser.add_argument("pdf", type=Path, help="Path to the PDF file")
+    parser.add_argument("gold", type=Path, help="JSON/JSONL gold set: question + pages/tables/answer")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[1000])
+    parser.add_argument("--overlaps", type=int, nargs="+", default=[200])
+    parser.add_argument("--row-groups", type=int, nargs="+", default=[40])
+    parser.add_argument(
+        "--table-embed-formats",
+        nargs="+",
+        choices=TABLE_FORMATS,
+        default=["markdown"],
+        help="Renderings of table chunks to embed (prompts keep the configured format)",
+    )
+    parser.add_argument(
+        "--indexes",
+        type=IndexSetting.parse,
+        nargs="+",
+        default=[IndexSetting()],
+        help='FAISS factory strings with optional search params, e.g. Flat HNSW32 "IVF64,Flat|nprobe=8"',
+    )
+    parser.add_argument("--ks", type=int, nargs="+", default=[1, 3, 6])
+    parser.add_argument("--diversity", type=float, default=None, help="MMR diversity for every search (0-1)")
+    parser.add_argument("--min-recall", type=float, default=None, help="Quality bar for the recommendation")
+    parser.add_argument("--bar-k", type=int, default=None, help="k used for the quality bar (default: max k)")
+    parser.add_argument(
+        "--compression",
+        action="store_true",
+        help="Also compare prompts built from full and compressed context on the last grid point",
+    )
+    parser.add_argument("--generate", action="store_true", help="With --compression, answer both prompts with the LLM")
+    parser.add_argument(
+        "--tokenizer", default=None, help="Hugging Face tokenizer for prompt-token counts (default: whitespace words)"
+    )
+    parser.add_argument("--output", type=Path, default=None, help="Write all results as JSON")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    config = ChatbotConfig()
+    config.threads.process = "ingest"
+    service = ChatbotService(config)
+    pipeline = service.pipeline
+    if pipeline.parse_cache is not None:
+        document = pipeline.parse_cache.get_or_extract(args.pdf, pipeline.parser)
+    else:
+        document = pipeline.parser.extract(args.pdf)
+    examples = load_gold_set(args.gold)
+
+    with TemporaryDirectory() as tmp:
+        evaluator = RetrievalEvaluator(service, examples, Path(tmp), diversity=args.diversity)
+        results = evaluator.evaluate(
+            document,
+            DocumentMetadata(source=args.pdf.stem),
+            chunking_grid(args.chunk_sizes, args.overlaps, args.row_groups, args.table_embed_formats),
+            args.indexes,
+            ks=args.ks,
+        )
+        compression = None
+        if args.compression:
+            count_tokens = None
+            if args.tokenizer:
+                from transformers import AutoTokenizer
+
+                tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+                count_tokens = lambda text: len(tokenizer(text)["input_ids"])  # noqa: E731
+            compressor = ContextCompressor(service.config.compression, service._embed)
+            compression = evaluate_compression(
+                service, examples, compressor, k=max(args.ks), generate=args.generate, count_tokens=count_tokens
+            ).to_dict()
+
+    rows = [result.to_dict() for result in results]
+    for row in rows:
+        recall = " ".join(f"R{k}={value:.2f}" for k, value in row["recall"].items())
+        print(
+            f"size={row['text_chunk_size']:>5} overlap={row['text_chunk_overlap']:>4} "
+            f"rows={row['table_row_group_size']:>3} tables={row['table_embed_format']:<8} index={row['index']:<16} "
+            f"{recall} MRR={row['mrr']:.3f} chunks={row['chunks']} "
+            f"bytes={row['index_bytes']} build={row['build_seconds']:.2f}s "
+            f"p50={row['p50_ms']:.1f}ms p95={row['p95_ms']:.1f}ms"
+        )
+
+    recommendation = None
+    if args.min_recall is not None:
+        bar_k = args.bar_k or max(args.ks)
+        best = cheapest_meeting(results, args.min_recall, bar_k)
+        recommendation = best.to_dict() if best else None
+        if best is None:
+            print(f"No configuration reaches recall@{bar_k} >= {args.min_recall}")
+        else:
+            print(f"Cheapest configuration with recall@{bar_k} >= {args.min_recall}: {recommendation}")
+
+    if compression is not None:
+        rates = compression["context_answer_rate"]
+        print(
+            f"compression: prompt tokens {compression['prompt_tokens']['full']} -> "
+            f"{compression['prompt_tokens']['compressed']} (-{compression['token_reduction']:.0%}), "
+            f"answer in context {rates['full']:.2f} -> {rates['compressed']:.2f}, "
+            f"{compression['compress_ms']:.1f} ms/question"
+        )
+        if "answer_accuracy" in compression:
+            accuracy = compression["answer_accuracy"]
+            print(f"answer accuracy {accuracy['full']:.2f} -> {accuracy['compressed']:.2f}")
+
+    if args.output:
+        payload = {"questions": len(examples), "results": rows, "recommendation": recommendation}
+        if compression is not None:
+            payload["compression"] = compression
+        args.output.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
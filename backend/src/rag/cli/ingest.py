@@ -11,13 +11,66 @@ from rag.service import ChatbotService
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Ingest a PDF admissions document")
     parser.add_argument("pdf", type=Path, help="Path to the PDF file")
+    parser.add_argument(
+        "--concurrent-parsing",
+        action="store_true",
+        help="Run all parsers in parallel processes and merge their tables",
+    )
+    parser.add_argument(
+        "--parser-timeout",
+        type=float,
+        default=None,
+        help="Seconds allowed per parser in concurrent mode",
+    )
+    parser.add_argument(
+        "--no-parse-cache",
+        action="store_true",
+        help="Always re-parse the PDF instead of reusing cached parser output",
+    )
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Keep table text repeated in the prose and near-duplicate chunks",
+    )
+    parser.add_argument(
+        "--track-memory",
+        action="store_true",
+        help="Report each stage's peak Python memory (tracemalloc; slows ingestion down)",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    service = ChatbotService(ChatbotConfig())
-    service.ingest_pdf(args.pdf)
+    config = ChatbotConfig()
+    config.pipeline.parsing.concurrent = args.concurrent_parsing
+    config.pipeline.parsing.parser_timeout = args.parser_timeout
+    config.pipeline.parse_cache.enabled = not args.no_parse_cache
+    config.pipeline.track_memory = args.track_memory
+    config.pipeline.dedup.enabled = not args.no_dedup
+    config.threads.process = "ingest"
+    service = ChatbotService(config)
+    ingest_report = service.ingest_pdf(args.pdf)
+    cache = service.pipeline.parse_cache
+    report = service.pipeline.parser.last_report
+    if cache is not None and cache.hits:
+        print("Parsing skipped: reused cached parser output from", cache.config.directory)
+    elif report is not None:
+        for run in report.runs:
+            detail = f"{run.tables} tables" if run.status == "ok" else run.error
+            print(f"[{run.parser}] {run.status} in {run.seconds:.2f}s ({detail})")
+    dedup = service.pipeline.deduplicator
+    if dedup is not None and dedup.last_report is not None:
+        removed = dedup.last_report
+        print(
+            f"Deduplication removed {removed.table_lines} prose lines repeating tables and "
+            f"{removed.dropped} of {removed.input_chunks} chunks "
+            f"({removed.reduction:.1%}: {removed.table_covered} covered by tables, "
+            f"{removed.near_duplicates} near-duplicates)"
+        )
+    for name, stage in ingest_report.stages.items():
+        memory = f"  peak {stage.peak_bytes / 2**20:.1f} MiB" if stage.peak_bytes is not None else ""
+        print(f"{name:>6}: {stage.seconds:.2f}s{memory}")
     print("Ingestion completed. Index stored at", service.vector_store.config.index_path)
 
 
@@ -0,0 +1,32 @@
+"""CLI entry point to run the shared model server."""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve the embedding model and LLM to API workers")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP host (ignored with --uds)")
+    parser.add_argument("--port", type=int, default=8001, help="TCP port (ignored with --uds)")
+    parser.add_argument("--uds", type=Path, default=None, help="Listen on this Unix domain socket instead")
+    parser.add_argument("--no-llm", action="store_true", help="Serve embeddings only")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    import uvicorn
+
+    from rag import model_server
+
+    model_server.load_llm = not args.no_llm
+    if args.uds is not None:
+        args.uds.unlink(missing_ok=True)
+        uvicorn.run(model_server.app, uds=str(args.uds), workers=1)
+    else:
+        uvicorn.run(model_server.app, host=args.host, port=args.port, workers=1)
+
+
+if __name__ == "__main__":
+    main()
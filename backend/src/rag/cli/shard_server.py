@@ -0,0 +1,33 @@
+"""CLI entry point to serve one vector-index shard."""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve one FAISS shard to a ShardedVectorStore")
+    parser.add_argument("shard_dir", type=Path, help="Shard directory containing index.faiss and meta.json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8101)
+    parser.add_argument("--search-params", default="", help='FAISS search parameters, e.g. "nprobe=16"')
+    parser.add_argument("--storage", default="float32", help="Vector codec the shard was built with")
+    parser.add_argument("--rescore-candidates", type=int, default=0, help="Exact re-scoring depth (0 disables)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    import uvicorn
+
+    from rag import shard_server
+
+    shard_server.shard_directory = args.shard_dir
+    shard_server.search_params = args.search_params
+    shard_server.storage = args.storage
+    shard_server.rescore_candidates = args.rescore_candidates
+    uvicorn.run(shard_server.app, host=args.host, port=args.port, workers=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Query-focused compression of retrieved context.
+
+A retrieved chunk holds up to ``text_chunk_size`` words or
+``table_row_group_size`` table rows. A question usually needs a sentence or
+a couple of rows of it, and CPU prefill time grows with the prompt.
+``ContextCompressor`` splits every retrieved chunk into units (sentences of
+prose, rows of a table) and embeds them in one batch together with the
+question. It then scores them all with a single matrix-vector product and
+keeps the units that are close to the best one. Kept units stay in
+document order, and table rows keep their header lines.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+import re
+from typing import Callable, List, Sequence
+
+import numpy as np
+
+from .chunking import table_header_size
+from .config import Chunk, CompressionConfig, SearchResult
+from .metrics import CONTEXT_WORDS, record_value, span
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…;])\s+(?=\S)")
+
+
+@dataclass(slots=True)
+class ChunkUnits:
+    """A chunk split into lines that are always kept and units that are scored."""
+
+    header: List[str]
+    units: List[str]
+    separator: str
+
+    def join(self, units: Sequence[str]) -> str:
+        return self.separator.join([*self.header, *units])
+
+
+def split_units(chunk: Chunk, max_unit_words: int = 60) -> ChunkUnits:
+    """Split a table chunk into header and rows, and a text chunk into sentences."""
+    if chunk.metadata is not None and chunk.metadata.chunk_type == "table":
+        lines = [line for line in chunk.text.splitlines() if line.strip()]
+        header = table_header_size(lines)
+        return ChunkUnits(lines[:header], lines[header:], "\n")
+    units: List[str] = []
+    for sentence in _SENTENCE_END.split(chunk.text.strip()):
+        words = sentence.split()
+        for start in range(0, len(words), max(max_unit_words, 1)):
+            units.append(" ".join(words[start : start + max_unit_words]))
+    return ChunkUnits([], units, " ")
+
+
+def select_units(scores: np.ndarray, owners: np.ndarray, relative_threshold: float, keep_per_chunk: int) -> np.ndarray:
+    """Mask of the units to keep, given each unit's score and the chunk it belongs to.
+
+    ``owners`` must be sorted (units grouped by chunk, in chunk order).
+    """
+    if scores.size == 0:
+        return np.zeros(0, dtype=bool)
+    keep = scores >= relative_threshold * scores.max()
+    if keep_per_chunk > 0:
+        # Rank units within their chunk by score: sort by (chunk, -score), then
+        # subtract each chunk's first position.
+        order = np.lexsort((-scores, owners))
+        counts = np.bincount(owners)
+        starts = np.repeat(np.cumsum(counts) - counts, counts)
+        keep[order[np.arange(order.size) - starts < keep_per_chunk]] = True
+    return keep
+
+
+@dataclass(slots=True)
+class ContextCompressor:
+    """Keep only the sentences and table rows of retrieved chunks that match the question.
+
+    ``embed`` maps a list of texts to a ``(len(texts), dim)`` array. It is
+    called once per request, with the question first.
+    """
+
+    config: CompressionConfig
+    embed: Callable[[List[str]], np.ndarray]
+
+    def compress(self, question: str, results: Sequence[SearchResult]) -> List[SearchResult]:
+        with span("compress"):
+            parts = [split_units(result.chunk, self.config.max_unit_words) for result in results]
+            counts = np.fromiter((len(part.units) for part in parts), dtype=np.int64, count=len(parts))
+            texts = [unit for part in parts for unit in part.units]
+            if not texts:
+                return list(results)
+            vectors = np.asarray(self.embed([question, *texts]), dtype="float32")
+            norms = np.linalg.norm(vectors, axis=1)
+            norms[norms == 0] = 1.0
+            scores = (vectors[1:] @ vectors[0]) / (norms[1:] * norms[0])
+            owners = np.repeat(np.arange(len(parts)), counts)
+            keep = select_units(scores, owners, self.config.relative_threshold, self.config.keep_per_chunk)
+
+            compressed: List[SearchResult] = []
+            offset = 0
+            for result, part, count in zip(results, parts, counts.tolist()):
+                mask = keep[offset : offset + count]
+                offset += count
+                kept = [unit for unit, flag in zip(part.units, mask) if flag]
+                text = part.join(kept) if count else result.chunk.text
+                compressed.append(SearchResult(score=result.score, chunk=Chunk(text=text, metadata=result.chunk.metadata)))
+
+            before = sum(len(result.chunk.text.split()) for result in results)
+            after = sum(len(result.chunk.text.split()) for result in compressed)
+            CONTEXT_WORDS.inc("retrieved", amount=before)
+            CONTEXT_WORDS.inc("compressed", amount=after)
+            record_value("context_words", before)
+            record_value("compressed_context_words", after)
+            return compressed
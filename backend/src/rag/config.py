@@ -2,54 +2,346 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field, replace
+import os
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
 
 @dataclass(slots=True)
 class ChunkingConfig:
-    """Chunking parameters used for text and table segmentation."""
+    """Chunking parameters used for text and table segmentation.
+
+    Table chunks are rendered twice: ``table_embed_format`` for the text
+    that is embedded and ``table_prompt_format`` for the text the LLM reads.
+    The formats are ``markdown`` (the parser's table, unchanged), ``csv``,
+    ``tsv``, and ``records``, which writes one ``- header: value; ...`` line
+    per row, led by the first column.
+    """
 
     text_chunk_size: int = 1000
     text_chunk_overlap: int = 200
     table_row_group_size: int = 40
+    table_embed_format: str = "markdown"
+    table_prompt_format: str = "markdown"
+
+
+@dataclass(slots=True)
+class ParsingConfig:
+    """Parser orchestration settings.
+
+    ``concurrent`` runs every parser in its own process and merges the tables
+    they find instead of stopping at the first parser that succeeds.
+    """
+
+    concurrent: bool = False
+    parser_timeout: Optional[float] = None
+    parser_timeouts: Dict[str, float] = field(default_factory=dict)
+    table_similarity_threshold: float = 0.85
+
+
+@dataclass(slots=True)
+class ParseCacheConfig:
+    """On-disk cache of parser output keyed by PDF content hash."""
+
+    enabled: bool = True
+    directory: Path = Path("data/parse_cache")
+    max_bytes: int = 512 * 1024 * 1024
 
 
 @dataclass(slots=True)
 class EmbeddingConfig:
-    """Embedding model configuration."""
+    """Embedding model configuration.
+
+    With ``micro_batching`` on, concurrent query embeddings are collected for
+    up to ``max_batch_wait_ms`` or ``max_batch_size`` texts and encoded in
+    one call (see ``rag.batching``).
+    """
 
     model_name: str = "BAAI/bge-m3"
     normalize: bool = True
     device: Optional[str] = None
+    micro_batching: bool = True
+    max_batch_size: int = 32
+    max_batch_wait_ms: float = 2.0
 
 
 @dataclass(slots=True)
 class VectorStoreConfig:
-    """FAISS index configuration."""
+    """FAISS index configuration.
+
+    ``index_factory`` is a FAISS factory string (``"Flat"``, ``"HNSW32"``,
+    ``"IVF256,Flat"``, ...) built with inner-product metric; ``search_params``
+    are applied through ``faiss.ParameterSpace`` (e.g. ``"nprobe=16"``).
+
+    ``storage`` picks the vector codec that replaces ``Flat`` in the factory:
+    ``"float32"``, ``"fp16"`` (``SQfp16``), ``"sq8"`` (``SQ8``), or ``"pq"``
+    (``PQ{pq_m}``). Compressed indexes also write the normalised float32
+    vectors to a sidecar file next to the index. When ``rescore_candidates``
+    is set, the top candidates are re-scored exactly from a memory map of it.
+
+    ``mmap`` maps the index file read-only instead of reading it into memory.
+    ``bundle`` serves an installed index bundle (``rag.bundle``) instead of
+    ``index_path``/``metadata_path``. It defaults to ``RAG_INDEX_BUNDLE`` and
+    may name a bundle directory or a bundles directory with a ``current`` link.
+    """
 
     index_path: Path = Path("data/index.faiss")
     metadata_path: Path = Path("data/meta.json")
+    index_factory: str = "Flat"
+    search_params: str = ""
+    storage: str = "float32"
+    pq_m: int = 64
+    rescore_candidates: int = 0
+    mmap: bool = False
+    bundle: Optional[Path] = field(
+        default_factory=lambda: Path(os.environ["RAG_INDEX_BUNDLE"]) if os.environ.get("RAG_INDEX_BUNDLE") else None
+    )
+
+
+@dataclass(slots=True)
+class ShardingConfig:
+    """Split the vector index into shards searched in parallel.
+
+    ``partition_by`` is ``"hash"`` (``num_shards`` balanced shards),
+    ``"source"``, or ``"year"`` (one shard per value, so ingesting a document
+    only rewrites its own shard). With ``remote_shards`` set, queries fan out
+    to shard servers (``run-shard-server``) instead of local shard files.
+    Shards that have not answered within ``deadline`` seconds are skipped.
+    """
+
+    enabled: bool = False
+    partition_by: str = "hash"
+    num_shards: int = 4
+    directory: Path = Path("data/shards")
+    remote_shards: List[str] = field(default_factory=list)
+    deadline: Optional[float] = 0.5
+    max_workers: Optional[int] = None
+
+
+@dataclass(slots=True)
+class TableStoreConfig:
+    """SQLite store of extracted table rows used for exact cell lookups.
+
+    When ``fast_path`` is on (it is opt-in), ``ChatbotService.chat()``
+    answers questions that resolve to a single cell with at least
+    ``min_confidence`` directly from the table, and skips generation.
+    """
+
+    enabled: bool = True
+    path: Path = Path("data/tables.sqlite3")
+    fast_path: bool = False
+    min_confidence: float = 0.9
+
+
+@dataclass(slots=True)
+class DedupConfig:
+    """Near-duplicate chunk removal between chunking and embedding.
+
+    ``threshold`` is the estimated Jaccard similarity of word
+    ``shingle_size``-grams above which two chunks count as duplicates.
+    ``table_coverage`` is the share of a text chunk's shingles found in the
+    same document's table chunks above which the text chunk is dropped (set
+    it above 1 to disable that rule); the same share decides which prose
+    lines repeat a table and are removed before windowing. ``num_perm``
+    MinHash values are split into ``bands`` LSH bands.
+    """
+
+    enabled: bool = True
+    threshold: float = 0.85
+    table_coverage: float = 0.9
+    shingle_size: int = 3
+    num_perm: int = 64
+    bands: int = 16
 
 
 @dataclass(slots=True)
 class PipelineConfig:
-    """High level configuration for the ingestion pipeline."""
+    """High level configuration for the ingestion pipeline.
+
+    ``track_memory`` records each stage's ``tracemalloc`` peak in the ingest
+    report. It is off by default because tracing slows Python allocation
+    down noticeably.
+    """
 
     chunking: ChunkingConfig = field(default_factory=ChunkingConfig)
+    parsing: ParsingConfig = field(default_factory=ParsingConfig)
+    parse_cache: ParseCacheConfig = field(default_factory=ParseCacheConfig)
     embedding: EmbeddingConfig = field(default_factory=EmbeddingConfig)
     vector_store: VectorStoreConfig = field(default_factory=VectorStoreConfig)
+    sharding: ShardingConfig = field(default_factory=ShardingConfig)
+    tables: TableStoreConfig = field(default_factory=TableStoreConfig)
+    dedup: DedupConfig = field(default_factory=DedupConfig)
+    track_memory: bool = False
 
 
 @dataclass(slots=True)
 class LLMConfig:
-    """Configuration for the local causal language model."""
+    """Configuration for the local causal language model.
+
+    ``backend`` selects how the model runs:
+
+    - ``auto`` – bitsandbytes 4-bit or bfloat16 on CUDA, float32 on CPU.
+    - ``fp32`` / ``bf16`` – Transformers on CPU in that precision (``bf16``
+      falls back to float32 when the CPU has no native bfloat16 support).
+    - ``int8`` – float32 weights with ``torch`` dynamic int8 quantisation of
+      every ``nn.Linear``.
+    - ``llama-cpp`` – a GGUF file from ``gguf_path`` run by llama.cpp.
+
+    ``speculative`` enables assisted generation: ``draft`` pairs the model with
+    the small ``draft_model_name``; ``prompt-lookup`` drafts n-grams copied from
+    the prompt (the retrieved CONTEXT), which suits extractive answers.
+    """
 
     model_name: str = "Qwen/Qwen2.5-7B-Instruct"
     max_new_tokens: int = 512
     temperature: float = 0.1
     use_bitsandbytes: bool = True
     device_map: Optional[str] = "auto"
+    backend: str = "auto"
+    gguf_path: Optional[Path] = None
+    n_threads: Optional[int] = None
+    n_ctx: int = 8192
+    speculative: str = "none"
+    draft_model_name: str = "Qwen/Qwen2.5-0.5B-Instruct"
+    num_assistant_tokens: int = 5
+    prompt_lookup_num_tokens: int = 10
+
+
+@dataclass(slots=True)
+class WarmupConfig:
+    """Model preloading performed when the server starts."""
+
+    enabled: bool = True
+    load_llm: bool = True
+    query: str = "Điểm chuẩn ngành Công nghệ thông tin"
+    max_new_tokens: int = 1
+
+
+@dataclass(slots=True)
+class ModelServerConfig:
+    """Where API workers reach the shared model server (``rag.model_server``).
+
+    ``url`` is ``None`` to run the models in-process, ``http://host:port`` for
+    TCP, or ``unix:///path/to.sock`` for a Unix domain socket. It defaults to
+    the ``RAG_MODEL_SERVER`` environment variable so every uvicorn worker
+    picks up the same value.
+    """
+
+    url: Optional[str] = field(default_factory=lambda: os.environ.get("RAG_MODEL_SERVER") or None)
+    timeout: float = 300.0
+    max_connections: int = 32
+    max_concurrent_generations: int = 1
+
+
+@dataclass(slots=True)
+class SessionConfig:
+    """Server-side conversation history for ``/chat`` requests carrying a ``session_id``.
+
+    ``backend`` is ``"memory"`` (per worker process) or ``"sqlite"`` (shared
+    by every worker through ``path``). Sessions idle for ``ttl_seconds`` are
+    dropped, and at most ``max_sessions`` are kept. Once the verbatim history
+    exceeds ``history_budget_chars``, older turns are folded into a summary,
+    always keeping the last ``keep_recent_messages`` messages verbatim.
+    """
+
+    enabled: bool = True
+    backend: str = "memory"
+    path: Path = Path("data/sessions.sqlite3")
+    ttl_seconds: float = 3600.0
+    max_sessions: int = 10_000
+    history_budget_chars: int = 3000
+    keep_recent_messages: int = 4
+    summarize_with_llm: bool = False
+    condense_queries: bool = True
+    condense_with_llm: bool = False
+
+
+@dataclass(slots=True)
+class CoalescingConfig:
+    """Single-flight coalescing of identical concurrent requests.
+
+    ``retrieval`` shares one embed and search among concurrent requests for
+    the same normalised question and index version. ``generation`` shares one
+    answer among requests whose question, retrieved context, and history
+    also match. The model server coalesces identical prompts when
+    ``generation`` is on.
+    """
+
+    enabled: bool = True
+    retrieval: bool = True
+    generation: bool = True
+
+
+@dataclass(slots=True)
+class ThreadBudgetConfig:
+    """How many CPU threads torch, FAISS, and the tokenizers may use (``rag.threads``).
+
+    ``None`` sizes a role from the CPUs the process may run on. ``ingest``
+    uses all of them, ``search`` one (a single query gains nothing from
+    OpenMP), and serving splits the rest between ``embed`` (a quarter) and
+    ``generate``. ``process`` is the role of the whole process: ``serve``
+    (API worker, model server, shard server) or ``ingest`` (``ingest-pdf``
+    and ``evaluate-retrieval``, where every stage gets the ``ingest``
+    share). ``cpu_affinity`` pins the process to a ``taskset``-style
+    list such as ``"0-7"``. It defaults to ``RAG_CPU_AFFINITY``, so the model
+    server, shard servers, and API workers can each be given their own cores.
+    """
+
+    enabled: bool = True
+    process: str = "serve"
+    ingest_threads: Optional[int] = None
+    embed_threads: Optional[int] = None
+    generate_threads: Optional[int] = None
+    search_threads: Optional[int] = None
+    tokenizers_parallelism: bool = False
+    cpu_affinity: Optional[str] = field(default_factory=lambda: os.environ.get("RAG_CPU_AFFINITY") or None)
+
+
+@dataclass(slots=True)
+class ProfilingConfig:
+    """Admin-only request profiling (``rag.profiling``).
+
+    The ``/admin/profile`` endpoints exist only when ``admin_token`` is set,
+    from ``RAG_ADMIN_TOKEN`` by default, and callers must send it in the
+    ``X-Admin-Token`` header. One arming covers at most ``max_requests``
+    requests.
+    """
+
+    admin_token: Optional[str] = field(default_factory=lambda: os.environ.get("RAG_ADMIN_TOKEN") or None)
+    max_requests: int = 100
+
+
+@dataclass(slots=True)
+class CompressionConfig:
+    """Query-focused pruning of retrieved chunks before prompting (``rag.compression``).
+
+    Chunks are split into sentences and table rows, which are scored against
+    the question. A unit is kept when its score reaches ``relative_threshold``
+    times the best score in the context. Each chunk also keeps its
+    ``keep_per_chunk`` best units, so no cited source disappears. Sentences
+    longer than ``max_unit_words`` are split into windows of that size.
+    """
+
+    enabled: bool = False
+    relative_threshold: float = 0.8
+    keep_per_chunk: int = 1
+    max_unit_words: int = 60
+
+
+@dataclass(slots=True)
+class RetrievalConfig:
+    """Maximal-marginal-relevance diversification of search results (``rag.diversity``).
+
+    When ``diversity`` is above 0, ``candidates_per_result * k`` nearest
+    chunks (at most ``max_candidates``) are fetched with their stored
+    vectors and re-ranked, so near-duplicate windows of one passage stop
+    crowding out the rest. 0 keeps plain top-k. ``/query`` and ``/chat``
+    can override it per request.
+    """
+
+    diversity: float = 0.0
+    candidates_per_result: int = 4
+    max_candidates: int = 100
 
 
 @dataclass(slots=True)
@@ -58,6 +350,14 @@ class ChatbotConfig:
 
     pipeline: PipelineConfig = field(default_factory=PipelineConfig)
     llm: LLMConfig = field(default_factory=LLMConfig)
+    warmup: WarmupConfig = field(default_factory=WarmupConfig)
+    model_server: ModelServerConfig = field(default_factory=ModelServerConfig)
+    sessions: SessionConfig = field(default_factory=SessionConfig)
+    coalescing: CoalescingConfig = field(default_factory=CoalescingConfig)
+    threads: ThreadBudgetConfig = field(default_factory=ThreadBudgetConfig)
+    profiling: ProfilingConfig = field(default_factory=ProfilingConfig)
+    compression: CompressionConfig = field(default_factory=CompressionConfig)
+    retrieval: RetrievalConfig = field(default_factory=RetrievalConfig)
 
 
 @dataclass(slots=True)
@@ -96,14 +396,24 @@ class DocumentMetadata:
 
 @dataclass(slots=True)
 class Chunk:
-    """Representation of a chunk of text or a table snippet."""
+    """Representation of a chunk of text or a table snippet.
+
+    ``text`` goes into prompts. ``embed_text``, when set, is what was
+    embedded instead (a table rendered in another format).
+    """
 
     text: str
     metadata: DocumentMetadata
+    embed_text: Optional[str] = None
+
+    def embedding_input(self) -> str:
+        return self.embed_text if self.embed_text is not None else self.text
 
     def to_dict(self) -> dict:
         payload = self.metadata.to_serializable()
         payload["text"] = self.text
+        if self.embed_text is not None:
+            payload["embed_text"] = self.embed_text
         return payload
 
 
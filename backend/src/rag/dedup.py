@@ -0,0 +1,203 @@
+"""Near-duplicate chunk removal between chunking and embedding.
+
+Parsers overlap. PyMuPDF's page text repeats the cells of every table that
+also becomes a table chunk. Repeated headers, footers, and boilerplate
+paragraphs recur across pages. Each duplicate costs one embedding and one
+vector, and it crowds the top-k with the same passage.
+
+Text is compared on word shingles of its normalised form, so markdown
+pipes, diacritics, and whitespace do not matter.
+
+Before the prose is cut into windows, ``strip_table_text`` drops every line
+in which at least ``DedupConfig.table_coverage`` of the words repeat one of
+the document's tables. A 1000-word window rarely consists of table text
+alone, so the table cells are removed where they still sit on their own
+lines. After chunking, ``deduplicate`` compares what is actually embedded
+(``Chunk.embedding_input()``). Two rules apply, in order:
+
+* A text chunk is dropped when at least ``DedupConfig.table_coverage`` of its
+  shingles already appear in the table chunks of the same document. The
+  table chunk carries the structure, so it is the richer copy.
+* Among the remaining chunks, MinHash signatures with LSH banding find pairs
+  whose estimated Jaccard similarity reaches ``DedupConfig.threshold``.
+  Table chunks win over text chunks, then longer chunks over shorter ones.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import hashlib
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .config import Chunk, DedupConfig
+from .document_parsers import ParsedDocument
+from .text import normalize_text
+
+
+def _hash(words: Sequence[str]) -> int:
+    return int.from_bytes(hashlib.blake2b(" ".join(words).encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def shingles(text: str, size: int) -> Set[int]:
+    """64-bit hashes of the word ``size``-grams of the normalised text."""
+    words = normalize_text(text).split()
+    if not words:
+        return set()
+    size = max(min(size, len(words)), 1)
+    return {_hash(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+@dataclass(slots=True)
+class MinHasher:
+    """Multiply-shift MinHash over 64-bit shingle hashes, vectorised with numpy."""
+
+    num_perm: int = 64
+    seed: int = 1
+    _a: np.ndarray = field(init=False, repr=False)
+    _b: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        rng = np.random.default_rng(self.seed)
+        # Odd multipliers keep the map a bijection modulo 2**64.
+        self._a = rng.integers(1, 2**63, self.num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, self.num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: Set[int]) -> np.ndarray:
+        if not hashes:
+            return np.full(self.num_perm, np.iinfo(np.uint64).max, dtype=np.uint64)
+        values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+        with np.errstate(over="ignore"):
+            permuted = (self._a[:, None] * values[None, :] + self._b[:, None]) >> np.uint64(32)
+        return permuted.min(axis=1)
+
+
+def estimated_jaccard(left: np.ndarray, right: np.ndarray) -> float:
+    return float(np.mean(left == right))
+
+
+@dataclass(slots=True)
+class DedupReport:
+    """What one ``ChunkDeduplicator.deduplicate`` call removed."""
+
+    input_chunks: int = 0
+    kept_chunks: int = 0
+    table_lines: int = 0
+    table_covered: int = 0
+    near_duplicates: int = 0
+    input_chars: int = 0
+    kept_chars: int = 0
+
+    @property
+    def dropped(self) -> int:
+        return self.input_chunks - self.kept_chunks
+
+    @property
+    def reduction(self) -> float:
+        return self.dropped / self.input_chunks if self.input_chunks else 0.0
+
+    def vector_bytes_saved(self, dim: int, bytes_per_value: int = 4) -> int:
+        """Index bytes not written for the dropped chunks (float32 by default)."""
+        return self.dropped * dim * bytes_per_value
+
+    def to_dict(self) -> dict:
+        return {
+            "input_chunks": self.input_chunks,
+            "kept_chunks": self.kept_chunks,
+            "table_lines": self.table_lines,
+            "table_covered": self.table_covered,
+            "near_duplicates": self.near_duplicates,
+            "input_chars": self.input_chars,
+            "kept_chars": self.kept_chars,
+            "reduction": round(self.reduction, 4),
+        }
+
+
+@dataclass(slots=True)
+class ChunkDeduplicator:
+    config: DedupConfig
+    last_report: Optional[DedupReport] = field(init=False, default=None)
+    _hasher: MinHasher = field(init=False, repr=False)
+    _table_lines: int = field(init=False, default=0, repr=False)  # reported by the next ``deduplicate``
+
+    def __post_init__(self) -> None:
+        if self.config.num_perm % self.config.bands:
+            raise ValueError("DedupConfig.num_perm must be a multiple of DedupConfig.bands")
+        self._hasher = MinHasher(self.config.num_perm)
+
+    def strip_table_text(self, document: ParsedDocument) -> ParsedDocument:
+        """Drop the prose lines that repeat the document's tables, before windowing.
+
+        A line goes when at least ``table_coverage`` of its words fall inside
+        a word ``shingle_size``-gram that also occurs in one of the tables.
+        """
+        self._table_lines = 0
+        size = max(self.config.shingle_size, 1)
+        if self.config.table_coverage > 1.0 or not document.tables:
+            return document
+        table_hashes: Set[int] = set()
+        for table in document.tables:
+            table_hashes |= shingles(table.markdown, size)
+        lines = document.text.split("\n")
+        words = [normalize_text(line).split() for line in lines]
+        tokens = [word for line in words for word in line]
+        covered = [False] * len(tokens)
+        for start in range(len(tokens) - size + 1):
+            if _hash(tokens[start : start + size]) in table_hashes:
+                covered[start : start + size] = [True] * size
+        kept, position = [], 0
+        for line, line_words in zip(lines, words):
+            hits = sum(covered[position : position + len(line_words)])
+            position += len(line_words)
+            if line_words and hits / len(line_words) >= self.config.table_coverage:
+                self._table_lines += 1
+                continue
+            kept.append(line)
+        return ParsedDocument(text="\n".join(kept), tables=document.tables)
+
+    def deduplicate(self, chunks: Sequence[Chunk]) -> List[Chunk]:
+        report = DedupReport(input_chunks=len(chunks), input_chars=sum(len(chunk.text) for chunk in chunks))
+        report.table_lines, self._table_lines = self._table_lines, 0
+        hashes = [shingles(chunk.embedding_input(), self.config.shingle_size) for chunk in chunks]
+        is_table = [chunk.metadata.chunk_type == "table" for chunk in chunks]
+
+        keep = [True] * len(chunks)
+        table_shingles: Dict[str, Set[int]] = {}
+        for position, chunk in enumerate(chunks):
+            if is_table[position]:
+                table_shingles.setdefault(chunk.metadata.source, set()).update(hashes[position])
+        if self.config.table_coverage <= 1.0:
+            for position, chunk in enumerate(chunks):
+                covered_by = table_shingles.get(chunk.metadata.source)
+                if is_table[position] or not covered_by or not hashes[position]:
+                    continue
+                coverage = len(hashes[position] & covered_by) / len(hashes[position])
+                if coverage >= self.config.table_coverage:
+                    keep[position] = False
+                    report.table_covered += 1
+
+        # Preferred copies first, so the first member of a duplicate group is the one kept.
+        order = sorted(
+            (position for position in range(len(chunks)) if keep[position]),
+            key=lambda position: (not is_table[position], -len(chunks[position].text), position),
+        )
+        rows = self.config.num_perm // self.config.bands
+        buckets: Dict[Tuple[int, bytes], List[int]] = {}
+        signatures: Dict[int, np.ndarray] = {}
+        for position in order:
+            signature = self._hasher.signature(hashes[position])
+            keys = [(band, signature[band * rows : (band + 1) * rows].tobytes()) for band in range(self.config.bands)]
+            candidates = {other for key in keys for other in buckets.get(key, ())}
+            if any(estimated_jaccard(signature, signatures[other]) >= self.config.threshold for other in candidates):
+                keep[position] = False
+                report.near_duplicates += 1
+                continue
+            signatures[position] = signature
+            for key in keys:
+                buckets.setdefault(key, []).append(position)
+
+        kept = [chunk for position, chunk in enumerate(chunks) if keep[position]]
+        report.kept_chunks = len(kept)
+        report.kept_chars = sum(len(chunk.text) for chunk in kept)
+        self.last_report = report
+        return kept
@@ -0,0 +1,51 @@
+"""Maximal marginal relevance (MMR) selection over retrieved candidates.
+
+Overlapping text windows of one passage score almost the same against a
+question, so a plain top-k often spends several slots on the same content.
+MMR picks each next result by::
+
+    (1 - diversity) * sim(query, candidate) - diversity * max sim(candidate, selected)
+
+Relevance and the candidate-candidate similarity matrix are computed up
+front with two matrix products. Each greedy step is then an argmax over a
+running "closest selected" vector, so the only Python loop runs ``k`` times
+and never over candidates.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def mmr(query: np.ndarray, candidates: np.ndarray, k: int, diversity: float) -> np.ndarray:
+    """Indices of ``k`` rows of ``candidates`` in MMR order.
+
+    ``diversity`` 0 is plain relevance order, and 1 ignores relevance after
+    the first pick. Vectors are compared by cosine similarity.
+    """
+    if not 0.0 <= diversity <= 1.0:
+        raise ValueError("diversity must be between 0 and 1")
+    count = len(candidates)
+    k = min(k, count)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    candidates = _normalize(np.asarray(candidates, dtype="float32"))
+    query = _normalize(np.asarray(query, dtype="float32").reshape(-1))
+    relevance = (1.0 - diversity) * (candidates @ query)
+    similarity = candidates @ candidates.T
+
+    selected = np.empty(k, dtype=np.int64)
+    closest = np.full(count, -np.inf, dtype="float32")  # max similarity to anything selected so far
+    available = np.ones(count, dtype=bool)
+    for step in range(k):
+        redundancy = diversity * closest if step else 0.0
+        scores = np.where(available, relevance - redundancy, -np.inf)
+        choice = int(np.argmax(scores))
+        selected[step] = choice
+        available[choice] = False
+        np.maximum(closest, similarity[choice], out=closest)
+    return selected
@@ -2,9 +2,14 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from importlib.metadata import PackageNotFoundError, version as package_version
+import multiprocessing
+from multiprocessing.connection import wait as wait_for_connections
 from pathlib import Path
-from typing import Iterable, List, Optional, Sequence
+import re
+from time import perf_counter
+from typing import ClassVar, Dict, List, Mapping, Optional, Sequence
 
 from .config import Chunk, DocumentMetadata
 from .chunking import ChunkBuilder
@@ -14,166 +19,496 @@ class DocumentParsingError(RuntimeError):
     """Raised when a parser fails to process a document."""
 
 
+class ParserUnavailable(DocumentParsingError):
+    """The parser's library is not installed, so it fails the same way on every document."""
+
+
+class NoTablesFound(DocumentParsingError):
+    """A table-only parser ran fine but the document has no tables it can see: an empty result."""
+
+
+@dataclass(slots=True)
+class ParsedTable:
+    """A table extracted from a document, rendered as markdown."""
+
+    markdown: str
+    page: Optional[int] = None
+    table_index: Optional[int] = None
+    parser: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "markdown": self.markdown,
+            "page": self.page,
+            "table_index": self.table_index,
+            "parser": self.parser,
+        }
+
+
+@dataclass(slots=True)
+class ParsedDocument:
+    """Raw parser output before chunking: prose markdown plus tables."""
+
+    text: str = ""
+    tables: List[ParsedTable] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {"text": self.text, "tables": [table.to_dict() for table in self.tables]}
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> "ParsedDocument":
+        return cls(
+            text=payload.get("text", ""),
+            tables=[ParsedTable(**table) for table in payload.get("tables", [])],
+        )
+
+
 @dataclass(slots=True)
 class DocumentParser(ABC):
     """Base class for document parsers."""
 
+    name: ClassVar[str] = "parser"
+    version: ClassVar[str] = "1"
+    package: ClassVar[Optional[str]] = None
+    provides_text: ClassVar[bool] = True
+
     chunk_builder: ChunkBuilder
 
+    def cache_version(self) -> str:
+        """Version string that changes whenever this parser's output may change."""
+        if self.package is None:
+            return self.version
+        try:
+            return f"{self.version}+{self.package}-{package_version(self.package)}"
+        except PackageNotFoundError:
+            return self.version
+
     @abstractmethod
+    def extract(self, path: Path) -> ParsedDocument:
+        """Extract prose and tables from a document without chunking."""
+
+    def last_extract_complete(self) -> bool:
+        """Whether the last ``extract()`` gave this parser's full output, so it may be cached."""
+        return True
+
     def parse(self, path: Path, base_metadata: DocumentMetadata) -> List[Chunk]:
         """Parse a document and return processed chunks."""
+        return self.build_chunks(self.extract(path), base_metadata)
+
+    def build_chunks(
+        self, document: ParsedDocument, base_metadata: DocumentMetadata
+    ) -> List[Chunk]:
+        chunks = self.chunk_builder.build_text_chunks(document.text, base_metadata.copy_with())
+        for table in document.tables:
+            metadata = base_metadata.copy_with(chunk_type="table", table_index=table.table_index)
+            if table.page is not None:
+                metadata = metadata.copy_with(page=table.page)
+            chunks.extend(self.chunk_builder.build_table_chunks(table.markdown, metadata))
+        return chunks
 
 
 @dataclass(slots=True)
 class DoclingParser(DocumentParser):
     """Parse documents using Docling with structured table extraction."""
 
-    def parse(self, path: Path, base_metadata: DocumentMetadata) -> List[Chunk]:
+    name: ClassVar[str] = "docling"
+    package: ClassVar[Optional[str]] = "docling"
+
+    def extract(self, path: Path) -> ParsedDocument:
         try:
             from docling.document_converter import DocumentConverter
         except ImportError as exc:  # pragma: no cover - environment dependent
-            raise DocumentParsingError("docling is not installed") from exc
+            raise ParserUnavailable("docling is not installed") from exc
 
         converter = DocumentConverter()
         conversion = converter.convert(str(path))
         document = conversion.document
 
-        chunks: List[Chunk] = []
-
         if document is None:
             raise DocumentParsingError("Docling returned an empty document")
 
-        markdown_text = document.export_to_markdown()
-        text_chunks = self.chunk_builder.build_text_chunks(
-            markdown_text,
-            base_metadata.copy_with(),
-        )
-        chunks.extend(text_chunks)
-
+        parsed = ParsedDocument(text=document.export_to_markdown())
         for index, table in enumerate(document.tables, start=1):
-            metadata = base_metadata.copy_with(chunk_type="table", table_index=index)
             try:
                 dataframe = table.export_to_dataframe()
                 markdown_table = dataframe.to_markdown(index=False)
             except Exception:  # pragma: no cover - docling internals
                 markdown_table = table.export_to_markdown()
-            chunks.extend(self.chunk_builder.build_table_chunks(markdown_table, metadata))
-
-        return chunks
+            parsed.tables.append(
+                ParsedTable(
+                    markdown=markdown_table,
+                    page=_docling_page(table),
+                    table_index=index,
+                    parser=self.name,
+                )
+            )
+        return parsed
 
 
 @dataclass(slots=True)
 class PyMuPDFParser(DocumentParser):
     """Fallback parser using PyMuPDF's built-in table detection."""
 
-    def parse(self, path: Path, base_metadata: DocumentMetadata) -> List[Chunk]:
+    name: ClassVar[str] = "pymupdf"
+    package: ClassVar[Optional[str]] = "pymupdf"
+
+    def extract(self, path: Path) -> ParsedDocument:
         try:
             import fitz  # type: ignore
         except ImportError as exc:  # pragma: no cover - environment dependent
-            raise DocumentParsingError("PyMuPDF is not installed") from exc
+            raise ParserUnavailable("PyMuPDF is not installed") from exc
 
         document = fitz.open(str(path))
-        chunks: List[Chunk] = []
+        parsed = ParsedDocument()
 
         full_markdown: List[str] = []
         for page_number, page in enumerate(document, start=1):
-            text = page.get_text("markdown")
-            metadata = base_metadata.copy_with(page=page_number)
-            full_markdown.append(text)
+            full_markdown.append(page.get_text("text"))
             tables = page.find_tables()
             if tables:
                 for table_index, table in enumerate(tables.tables, start=1):
-                    table_metadata = metadata.copy_with(
-                        chunk_type="table",
-                        table_index=table_index,
-                    )
-                    markdown_table = table.to_markdown()
-                    chunks.extend(
-                        self.chunk_builder.build_table_chunks(markdown_table, table_metadata)
+                    parsed.tables.append(
+                        ParsedTable(
+                            markdown=table.to_markdown(),
+                            page=page_number,
+                            table_index=table_index,
+                            parser=self.name,
+                        )
                     )
         document.close()
 
-        # Add combined text chunk at the end to avoid duplicates for each page
-        text_metadata = base_metadata.copy_with()
-        chunks.extend(
-            self.chunk_builder.build_text_chunks("\n".join(full_markdown), text_metadata)
-        )
-        return chunks
+        # Combined text is chunked once to avoid duplicates for each page
+        parsed.text = "\n".join(full_markdown)
+        return parsed
 
 
 @dataclass(slots=True)
 class CamelotParser(DocumentParser):
     """Camelot-based parser for table heavy PDFs."""
 
+    name: ClassVar[str] = "camelot"
+    package: ClassVar[Optional[str]] = "camelot-py"
+    provides_text: ClassVar[bool] = False
+
     flavor_priority: Sequence[str] = ("lattice", "stream")
 
-    def parse(self, path: Path, base_metadata: DocumentMetadata) -> List[Chunk]:
+    def extract(self, path: Path) -> ParsedDocument:
         try:
             import camelot
         except ImportError as exc:  # pragma: no cover
-            raise DocumentParsingError("camelot is not installed") from exc
+            raise ParserUnavailable("camelot is not installed") from exc
 
-        chunks: List[Chunk] = []
-        combined_tables: List[str] = []
+        parsed = ParsedDocument()
+        errors: List[str] = []
         for flavor in self.flavor_priority:
             try:
                 tables = camelot.read_pdf(str(path), pages="all", flavor=flavor)
-            except Exception:
+            except Exception as exc:
+                errors.append(f"{flavor}: {exc}")
                 continue
             if not tables:
                 continue
             for idx, table in enumerate(tables, start=1):
-                metadata = base_metadata.copy_with(chunk_type="table", table_index=idx)
-                markdown_table = table.df.to_markdown(index=False)
-                chunks.extend(self.chunk_builder.build_table_chunks(markdown_table, metadata))
-                combined_tables.append(markdown_table)
+                parsed.tables.append(
+                    ParsedTable(
+                        markdown=table.df.to_markdown(index=False),
+                        page=_as_page_number(getattr(table, "page", None)),
+                        table_index=idx,
+                        parser=self.name,
+                    )
+                )
             break
 
-        if combined_tables:
-            text_metadata = base_metadata.copy_with()
-            chunks.extend(
-                self.chunk_builder.build_text_chunks("\n".join(combined_tables), text_metadata)
-            )
-        else:
-            raise DocumentParsingError("Camelot could not find tables")
-        return chunks
+        if not parsed.tables:
+            if len(errors) == len(self.flavor_priority):
+                raise DocumentParsingError("Camelot failed: " + "; ".join(errors))
+            raise NoTablesFound("Camelot found no tables")
+        parsed.text = "\n".join(table.markdown for table in parsed.tables)
+        return parsed
 
 
 @dataclass(slots=True)
 class TabulaParser(DocumentParser):
     """Tabula-based table extractor."""
 
-    def parse(self, path: Path, base_metadata: DocumentMetadata) -> List[Chunk]:
+    name: ClassVar[str] = "tabula"
+    package: ClassVar[Optional[str]] = "tabula-py"
+    provides_text: ClassVar[bool] = False
+
+    def extract(self, path: Path) -> ParsedDocument:
         try:
             import tabula
         except ImportError as exc:  # pragma: no cover
-            raise DocumentParsingError("tabula-py is not installed") from exc
+            raise ParserUnavailable("tabula-py is not installed") from exc
 
         dataframes = tabula.read_pdf(str(path), pages="all", multiple_tables=True)
         if not dataframes:
-            raise DocumentParsingError("Tabula returned no tables")
+            raise NoTablesFound("Tabula found no tables")
 
-        chunks: List[Chunk] = []
+        parsed = ParsedDocument()
         for idx, dataframe in enumerate(dataframes, start=1):
-            metadata = base_metadata.copy_with(chunk_type="table", table_index=idx)
-            markdown_table = dataframe.to_markdown(index=False)
-            chunks.extend(self.chunk_builder.build_table_chunks(markdown_table, metadata))
-        return chunks
+            parsed.tables.append(
+                ParsedTable(
+                    markdown=dataframe.to_markdown(index=False),
+                    table_index=idx,
+                    parser=self.name,
+                )
+            )
+        return parsed
+
+
+@dataclass(slots=True)
+class ParserRun:
+    """Outcome of a single parser inside a composite parse."""
+
+    parser: str
+    status: str
+    seconds: float
+    tables: int = 0
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class ParseReport:
+    """Which parsers ran, how long they took, and which tables they contributed."""
+
+    runs: List[ParserRun] = field(default_factory=list)
+    text_parser: Optional[str] = None
+    table_sources: List[ParsedTable] = field(default_factory=list)
+    duplicates_dropped: int = 0
+
+    @property
+    def degraded(self) -> bool:
+        """A parser crashed or timed out, so another run may give a different document."""
+        return any(run.status in ("failed", "timeout") for run in self.runs)
+
+    def to_dict(self) -> dict:
+        return {
+            "runs": [
+                {
+                    "parser": run.parser,
+                    "status": run.status,
+                    "seconds": round(run.seconds, 3),
+                    "tables": run.tables,
+                    "error": run.error,
+                }
+                for run in self.runs
+            ],
+            "text_parser": self.text_parser,
+            "tables": [
+                {"table_index": table.table_index, "page": table.page, "parser": table.parser}
+                for table in self.table_sources
+            ],
+            "duplicates_dropped": self.duplicates_dropped,
+        }
 
 
 @dataclass(slots=True)
 class CompositeParser(DocumentParser):
-    """Try multiple parsers until one succeeds."""
+    """Try multiple parsers until one succeeds, or run them all concurrently.
 
-    parsers: Sequence[DocumentParser]
+    In concurrent mode every parser runs in a separate process with its own
+    timeout; prose comes from the highest priority text parser that succeeded
+    and tables from all of them, deduplicated by page and cell overlap.
+    """
 
-    def parse(self, path: Path, base_metadata: DocumentMetadata) -> List[Chunk]:
+    name: ClassVar[str] = "composite"
+
+    parsers: Sequence[DocumentParser]
+    concurrent: bool = False
+    timeout: Optional[float] = None
+    timeouts: Mapping[str, float] = field(default_factory=dict)
+    similarity_threshold: float = 0.85
+    last_report: Optional[ParseReport] = field(init=False, default=None, repr=False)
+
+    def cache_version(self) -> str:
+        members = ",".join(f"{parser.name}:{parser.cache_version()}" for parser in self.parsers)
+        mode = f"concurrent:{self.similarity_threshold}" if self.concurrent else "sequential"
+        return f"{self.version}|{mode}|{members}"
+
+    def last_extract_complete(self) -> bool:
+        # Timeouts only change the output when a parser hits one, and then
+        # the run is degraded and not cached, so they stay out of the key.
+        return self.last_report is None or not self.last_report.degraded
+
+    def extract(self, path: Path) -> ParsedDocument:
+        if self.concurrent:
+            return self._extract_concurrently(path)
+        return self._extract_first(path)
+
+    def _extract_first(self, path: Path) -> ParsedDocument:
+        report = ParseReport()
+        self.last_report = report
         last_error: Optional[Exception] = None
         for parser in self.parsers:
+            start = perf_counter()
             try:
-                return parser.parse(path, base_metadata)
+                document = parser.extract(path)
             except DocumentParsingError as exc:
+                status = _failure_status(exc)
+                report.runs.append(ParserRun(parser.name, status, perf_counter() - start, error=str(exc)))
                 last_error = exc
                 continue
+            report.runs.append(
+                ParserRun(parser.name, "ok", perf_counter() - start, tables=len(document.tables))
+            )
+            report.text_parser = parser.name
+            report.table_sources = list(document.tables)
+            return document
         raise DocumentParsingError(str(last_error) if last_error else "No parser succeeded")
+
+    def _extract_concurrently(self, path: Path) -> ParsedDocument:
+        report = ParseReport()
+        self.last_report = report
+        context = multiprocessing.get_context()
+        started = perf_counter()
+        pending: Dict[object, tuple[int, multiprocessing.Process, float]] = {}
+        for position, parser in enumerate(self.parsers):
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(
+                target=_extract_in_process, args=(parser, path, sender), daemon=True
+            )
+            process.start()
+            sender.close()
+            limit = self.timeouts.get(parser.name, self.timeout)
+            deadline = started + limit if limit is not None else float("inf")
+            pending[receiver] = (position, process, deadline)
+
+        documents: Dict[int, ParsedDocument] = {}
+        runs: Dict[int, ParserRun] = {}
+        while pending:
+            next_deadline = min(deadline for _, _, deadline in pending.values())
+            remaining = None if next_deadline == float("inf") else max(next_deadline - perf_counter(), 0)
+            for receiver in wait_for_connections(list(pending), timeout=remaining):
+                position, process, _ = pending.pop(receiver)
+                name = self.parsers[position].name
+                try:
+                    status, payload, seconds = receiver.recv()
+                except EOFError:
+                    status, payload, seconds = "failed", "parser process exited", perf_counter() - started
+                receiver.close()
+                process.join()
+                if status in ("ok", "empty"):
+                    documents[position] = payload
+                    runs[position] = ParserRun(name, status, seconds, tables=len(payload.tables))
+                else:
+                    runs[position] = ParserRun(name, status, seconds, error=payload)
+            now = perf_counter()
+            for receiver, (position, process, deadline) in list(pending.items()):
+                if now >= deadline:
+                    pending.pop(receiver)
+                    process.terminate()
+                    process.join()
+                    receiver.close()
+                    runs[position] = ParserRun(
+                        self.parsers[position].name, "timeout", now - started, error="timed out"
+                    )
+
+        report.runs = [runs[position] for position in sorted(runs)]
+        if not documents:
+            errors = "; ".join(f"{run.parser}: {run.error}" for run in report.runs)
+            raise DocumentParsingError(errors or "No parser succeeded")
+        return self._merge(documents, report)
+
+    def _merge(self, documents: Mapping[int, ParsedDocument], report: ParseReport) -> ParsedDocument:
+        ordered = [(self.parsers[position], documents[position]) for position in sorted(documents)]
+        text_source = next(
+            ((parser, document) for parser, document in ordered if parser.provides_text and document.text),
+            None,
+        ) or next(((parser, document) for parser, document in ordered if document.text), None)
+
+        merged = ParsedDocument(text=text_source[1].text if text_source else "")
+        report.text_parser = text_source[0].name if text_source else None
+
+        kept: List[tuple[ParsedTable, frozenset]] = []
+        for parser, document in ordered:
+            for table in document.tables:
+                cells = _table_cells(table.markdown)
+                if any(
+                    _same_page(table, other) and _jaccard(cells, other_cells) >= self.similarity_threshold
+                    for other, other_cells in kept
+                ):
+                    report.duplicates_dropped += 1
+                    continue
+                kept.append((ParsedTable(table.markdown, table.page, parser=parser.name), cells))
+
+        tables = sorted((table for table, _ in kept), key=lambda table: (table.page is None, table.page or 0))
+        for index, table in enumerate(tables, start=1):
+            table.table_index = index
+        merged.tables = tables
+        report.table_sources = list(tables)
+        return merged
+
+
+def _extract_in_process(parser: DocumentParser, path: Path, connection) -> None:
+    start = perf_counter()
+    try:
+        document = parser.extract(path)
+    except NoTablesFound:
+        connection.send(("empty", ParsedDocument(), perf_counter() - start))
+    except Exception as exc:
+        connection.send((_failure_status(exc), f"{type(exc).__name__}: {exc}", perf_counter() - start))
+    else:
+        connection.send(("ok", document, perf_counter() - start))
+    finally:
+        connection.close()
+
+
+def _failure_status(exc: Exception) -> str:
+    """``ParserRun.status`` for a parser that raised; only ``failed`` makes a parse degraded."""
+    if isinstance(exc, ParserUnavailable):
+        return "unavailable"
+    if isinstance(exc, NoTablesFound):
+        return "empty"
+    return "failed"
+
+
+_SEPARATOR_CELL = re.compile(r"^:?-{2,}:?$")
+
+
+def markdown_rows(markdown_table: str) -> List[List[str]]:
+    """Split a markdown table into rows of whitespace-collapsed cells, dropping separator rows."""
+    rows = []
+    for line in markdown_table.splitlines():
+        if not line.strip():
+            continue
+        cells = [" ".join(cell.split()) for cell in line.strip().strip("|").split("|")]
+        if all(_SEPARATOR_CELL.match(cell) for cell in cells if cell):
+            continue
+        rows.append(cells)
+    return rows
+
+
+def _table_cells(markdown_table: str) -> frozenset:
+    cells = set()
+    for row in markdown_rows(markdown_table):
+        for cell in row:
+            value = cell.lower()
+            if value and value != "nan":
+                cells.add(value)
+    return frozenset(cells)
+
+
+def _jaccard(left: frozenset, right: frozenset) -> float:
+    if not left and not right:
+        return 1.0
+    return len(left & right) / len(left | right)
+
+
+def _same_page(left: ParsedTable, right: ParsedTable) -> bool:
+    # Tabula does not report pages, so an unknown page matches any page.
+    return left.page is None or right.page is None or left.page == right.page
+
+
+def _as_page_number(value: object) -> Optional[int]:
+    try:
+        return int(value)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return None
+
+
+def _docling_page(table: object) -> Optional[int]:
+    provenance = getattr(table, "prov", None) or []
+    if not provenance:
+        return None
+    return _as_page_number(getattr(provenance[0], "page_no", None))
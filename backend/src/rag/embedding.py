@@ -10,6 +10,8 @@ except ImportError:  # pragma: no cover - handled lazily
     np = None  # type: ignore
 
 from .config import EmbeddingConfig
+from .metrics import span
+from .threads import thread_scope
 
 
 @dataclass(slots=True)
@@ -18,6 +20,13 @@ class EmbeddingModel:
 
     config: EmbeddingConfig
 
+    @property
+    def is_loaded(self) -> bool:
+        return True
+
+    def load(self) -> None:
+        """Load model weights ahead of the first request (no-op for remote models)."""
+
     def embed(self, texts: Iterable[str]) -> np.ndarray:  # pragma: no cover - base class
         raise NotImplementedError
 
@@ -28,6 +37,13 @@ class BGEEmbeddingModel(EmbeddingModel):
 
     _model: Any | None = field(init=False, default=None, repr=False)
 
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> None:
+        self._load_model()
+
     def _load_model(self):
         if self._model is None:
             from sentence_transformers import SentenceTransformer
@@ -37,9 +53,10 @@ class BGEEmbeddingModel(EmbeddingModel):
 
     def embed(self, texts: Iterable[str]) -> np.ndarray:
         np_module = _require_numpy()
-        model = self._load_model()
-        vectors = model.encode(list(texts), normalize_embeddings=self.config.normalize)
-        return np_module.asarray(vectors, dtype="float32")
+        with span("embed"), thread_scope("embed"):
+            model = self._load_model()
+            vectors = model.encode(list(texts), normalize_embeddings=self.config.normalize)
+            return np_module.asarray(vectors, dtype="float32")
 
 
 @dataclass(slots=True)
@@ -0,0 +1,325 @@
+"""Offline retrieval evaluation over a grid of chunking and index settings."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+import json
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from .chunking import ChunkBuilder
+from .config import Chunk, ChunkingConfig, DocumentMetadata, VectorStoreConfig
+from .compression import ContextCompressor
+from .document_parsers import ParsedDocument
+from .llm import format_chat_prompt
+from .service import ChatbotService
+from .vector_store import FaissVectorStore
+
+
+@dataclass(slots=True)
+class GoldExample:
+    """A question with the pages, tables, or answer text that should be retrieved.
+
+    A chunk is relevant when it satisfies every criterion that is given: its
+    page is listed in ``pages``, it is a table whose index is listed in
+    ``tables``, and its text contains ``answer`` (case-insensitive).
+    """
+
+    question: str
+    pages: List[int] = field(default_factory=list)
+    tables: List[int] = field(default_factory=list)
+    answer: Optional[str] = None
+
+    def matches(self, chunk: Chunk) -> bool:
+        meta = chunk.metadata
+        if self.pages and meta.page not in self.pages:
+            return False
+        if self.tables and (meta.chunk_type != "table" or meta.table_index not in self.tables):
+            return False
+        if self.answer and self.answer.lower() not in chunk.text.lower():
+            return False
+        return bool(self.pages or self.tables or self.answer)
+
+
+def load_gold_set(path: Path) -> List[GoldExample]:
+    """Read gold examples from a JSON list or a JSON-lines file."""
+    text = Path(path).read_text(encoding="utf-8").strip()
+    if text.startswith("["):
+        items = json.loads(text)
+    else:
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [
+        GoldExample(
+            question=item["question"],
+            pages=[int(page) for page in item.get("pages", [])],
+            tables=[int(table) for table in item.get("tables", [])],
+            answer=item.get("answer"),
+        )
+        for item in items
+    ]
+
+
+@dataclass(slots=True)
+class IndexSetting:
+    """A FAISS factory string plus the search-time parameters to apply."""
+
+    factory: str = "Flat"
+    search_params: str = ""
+
+    @classmethod
+    def parse(cls, value: str) -> "IndexSetting":
+        factory, _, params = value.partition("|")
+        return cls(factory=factory.strip() or "Flat", search_params=params.strip())
+
+    @property
+    def label(self) -> str:
+        return f"{self.factory}|{self.search_params}" if self.search_params else self.factory
+
+
+@dataclass(slots=True)
+class EvaluationResult:
+    """Quality and cost of one grid point."""
+
+    chunking: ChunkingConfig
+    index: IndexSetting
+    chunks: int
+    index_bytes: int
+    build_seconds: float
+    recall: Dict[int, float]
+    mrr: float
+    p50_ms: float
+    p95_ms: float
+
+    def to_dict(self) -> dict:
+        return {
+            "text_chunk_size": self.chunking.text_chunk_size,
+            "text_chunk_overlap": self.chunking.text_chunk_overlap,
+            "table_row_group_size": self.chunking.table_row_group_size,
+            "table_embed_format": self.chunking.table_embed_format,
+            "index": self.index.label,
+            "chunks": self.chunks,
+            "index_bytes": self.index_bytes,
+            "build_seconds": round(self.build_seconds, 4),
+            "recall": {f"@{k}": round(value, 4) for k, value in sorted(self.recall.items())},
+            "mrr": round(self.mrr, 4),
+            "p50_ms": round(self.p50_ms, 3),
+            "p95_ms": round(self.p95_ms, 3),
+        }
+
+
+def chunking_grid(
+    sizes: Sequence[int],
+    overlaps: Sequence[int],
+    row_groups: Sequence[int],
+    table_embed_formats: Sequence[str] = ("markdown",),
+) -> List[ChunkingConfig]:
+    return [
+        ChunkingConfig(
+            text_chunk_size=size,
+            text_chunk_overlap=overlap,
+            table_row_group_size=rows,
+            table_embed_format=table_format,
+        )
+        for size in sizes
+        for overlap in overlaps
+        for rows in row_groups
+        for table_format in table_embed_formats
+        if overlap < size
+    ]
+
+
+def _percentile(values: Sequence[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[position]
+
+
+@dataclass(slots=True)
+class RetrievalEvaluator:
+    """Run ``ChatbotService.search()`` for every gold question across a config grid.
+
+    The document is parsed once and each chunking configuration is embedded
+    once; every index setting then reuses those vectors, so the grid costs
+    one embedding pass per chunking configuration. ``diversity`` is passed
+    to every search (see ``rag.diversity``).
+    """
+
+    service: ChatbotService
+    examples: Sequence[GoldExample]
+    workdir: Path
+    diversity: Optional[float] = None
+
+    def evaluate(
+        self,
+        document: ParsedDocument,
+        metadata: DocumentMetadata,
+        chunkings: Iterable[ChunkingConfig],
+        indexes: Iterable[IndexSetting],
+        ks: Sequence[int] = (1, 3, 6),
+    ) -> List[EvaluationResult]:
+        self.workdir.mkdir(parents=True, exist_ok=True)
+        indexes = list(indexes)
+        max_k = max(ks)
+        results: List[EvaluationResult] = []
+        for chunking in chunkings:
+            parser = replace(self.service.pipeline.parser, chunk_builder=ChunkBuilder(chunking))
+            deduplicator = self.service.pipeline.deduplicator
+            if deduplicator is not None:
+                chunks = deduplicator.deduplicate(parser.build_chunks(deduplicator.strip_table_text(document), metadata))
+            else:
+                chunks = parser.build_chunks(document, metadata)
+            vectors = self.service.embedding_model.embed(chunk.embedding_input() for chunk in chunks)
+            for position, setting in enumerate(indexes):
+                store = FaissVectorStore(
+                    VectorStoreConfig(
+                        index_path=self.workdir / f"eval_{position}.faiss",
+                        metadata_path=self.workdir / f"eval_{position}.json",
+                        index_factory=setting.factory,
+                        search_params=setting.search_params,
+                    )
+                )
+                start = perf_counter()
+                store.build(vectors.copy(), chunks)
+                build_seconds = perf_counter() - start
+                self.service.vector_store = store
+                results.append(
+                    self._score(chunking, setting, store, len(chunks), build_seconds, ks, max_k)
+                )
+        return results
+
+    def _score(
+        self,
+        chunking: ChunkingConfig,
+        setting: IndexSetting,
+        store: FaissVectorStore,
+        chunk_count: int,
+        build_seconds: float,
+        ks: Sequence[int],
+        max_k: int,
+    ) -> EvaluationResult:
+        hits = {k: 0 for k in ks}
+        reciprocal_ranks = 0.0
+        latencies: List[float] = []
+        if self.examples:
+            self.service.search(self.examples[0].question, k=max_k, diversity=self.diversity)  # warm-up
+        for example in self.examples:
+            start = perf_counter()
+            retrieved = self.service.search(example.question, k=max_k, diversity=self.diversity)
+            latencies.append((perf_counter() - start) * 1000)
+            rank = next(
+                (position for position, result in enumerate(retrieved, start=1) if example.matches(result.chunk)),
+                None,
+            )
+            if rank is None:
+                continue
+            reciprocal_ranks += 1.0 / rank
+            for k in ks:
+                if rank <= k:
+                    hits[k] += 1
+        total = max(len(self.examples), 1)
+        return EvaluationResult(
+            chunking=chunking,
+            index=setting,
+            chunks=chunk_count,
+            index_bytes=store.config.index_path.stat().st_size,
+            build_seconds=build_seconds,
+            recall={k: hits[k] / total for k in ks},
+            mrr=reciprocal_ranks / total,
+            p50_ms=_percentile(latencies, 0.5),
+            p95_ms=_percentile(latencies, 0.95),
+        )
+
+
+def cheapest_meeting(
+    results: Sequence[EvaluationResult], min_recall: float, k: int
+) -> Optional[EvaluationResult]:
+    """Pick the smallest, then fastest, configuration whose recall@k meets the bar."""
+    candidates = [result for result in results if result.recall.get(k, 0.0) >= min_recall]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda result: (result.index_bytes, result.p95_ms, result.build_seconds))
+
+
+@dataclass(slots=True)
+class CompressionResult:
+    """Prompt size and answer quality with and without context compression.
+
+    ``context_hits`` counts gold answers still present in the context;
+    ``answer_hits`` counts generated answers that contain them and is only
+    filled in when the evaluation generates. Only examples with an
+    ``answer`` are scored for quality.
+    """
+
+    questions: int
+    scored: int
+    prompt_tokens: Dict[str, int]
+    context_hits: Dict[str, int]
+    answer_hits: Optional[Dict[str, int]] = None
+    compress_ms: float = 0.0
+
+    def to_dict(self) -> dict:
+        full, compressed = self.prompt_tokens["full"], self.prompt_tokens["compressed"]
+        scored = max(self.scored, 1)
+        payload = {
+            "questions": self.questions,
+            "scored": self.scored,
+            "prompt_tokens": dict(self.prompt_tokens),
+            "token_reduction": round(1 - compressed / full, 4) if full else 0.0,
+            "context_answer_rate": {name: round(hits / scored, 4) for name, hits in self.context_hits.items()},
+            "context_answer_delta": round((self.context_hits["compressed"] - self.context_hits["full"]) / scored, 4),
+            "compress_ms": round(self.compress_ms, 3),
+        }
+        if self.answer_hits is not None:
+            payload["answer_accuracy"] = {name: round(hits / scored, 4) for name, hits in self.answer_hits.items()}
+            payload["answer_delta"] = round((self.answer_hits["compressed"] - self.answer_hits["full"]) / scored, 4)
+        return payload
+
+
+def evaluate_compression(
+    service: ChatbotService,
+    examples: Sequence[GoldExample],
+    compressor: ContextCompressor,
+    k: int = 6,
+    generate: bool = False,
+    count_tokens: Optional[Callable[[str], int]] = None,
+) -> CompressionResult:
+    """Build every gold question's prompt from full and from compressed chunks and compare them.
+
+    ``count_tokens`` defaults to whitespace words; pass the LLM tokenizer's
+    length for exact prompt-token counts. With ``generate`` the service's
+    LLM answers both prompts.
+    """
+    count_tokens = count_tokens or (lambda text: len(text.split()))
+    tokens = {"full": 0, "compressed": 0}
+    context_hits = {"full": 0, "compressed": 0}
+    answer_hits = {"full": 0, "compressed": 0} if generate else None
+    scored = 0
+    compress_seconds = 0.0
+    for example in examples:
+        results = service.search(example.question, k=k)
+        start = perf_counter()
+        compressed = compressor.compress(example.question, results)
+        compress_seconds += perf_counter() - start
+        messages = [{"role": "user", "content": example.question}]
+        contexts = {"full": service.format_context(results), "compressed": service.format_context(compressed)}
+        prompts = {name: format_chat_prompt(messages, context, example.question) for name, context in contexts.items()}
+        for name, prompt in prompts.items():
+            tokens[name] += count_tokens(prompt)
+        if not example.answer:
+            continue
+        scored += 1
+        expected = example.answer.lower()
+        for name, context in contexts.items():
+            context_hits[name] += expected in context.lower()
+            if answer_hits is not None:
+                answer_hits[name] += expected in service.llm.generate(prompts[name]).lower()
+    return CompressionResult(
+        questions=len(examples),
+        scored=scored,
+        prompt_tokens=tokens,
+        context_hits=context_hits,
+        answer_hits=answer_hits,
+        compress_ms=compress_seconds * 1000 / max(len(examples), 1),
+    )
@@ -1,70 +1,237 @@
 """Local causal language model utilities."""
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Iterable, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import threading
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional
+import warnings
 
-import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from .cancellation import CancellationCriteria, CancellationToken, current_token
+from .config import LLMConfig
+from .metrics import record_generation, record_value, span
+from .threads import thread_scope, threads_for
 
-try:  # pragma: no cover - optional dependency in CPU-only environments
-    from bitsandbytes import __version__ as _bitsandbytes_version  # type: ignore  # noqa: F401
-    from transformers import BitsAndBytesConfig
-except Exception:  # pragma: no cover - bitsandbytes is optional
-    BitsAndBytesConfig = None  # type: ignore
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from transformers import AutoModelForCausalLM, AutoTokenizer
 
-from .config import LLMConfig
+# torch and transformers take several seconds to import, so they are only
+# imported once a model is actually loaded. Retrieval-only entry points such
+# as ``query-chatbot`` never pay for them.
+
+
+def _require_torch() -> Any:
+    try:
+        import torch
+    except ImportError as exc:  # pragma: no cover - environment dependent
+        raise RuntimeError("torch is required for local generation. Please install torch.") from exc
+    return torch
+
+
+def _bitsandbytes_config_class() -> Any:
+    try:  # pragma: no cover - optional dependency in CPU-only environments
+        from bitsandbytes import __version__ as _bitsandbytes_version  # type: ignore  # noqa: F401
+        from transformers import BitsAndBytesConfig
+    except Exception:  # pragma: no cover - bitsandbytes is optional
+        return None
+    return BitsAndBytesConfig
+
+
+LLM_BACKENDS = ("auto", "fp32", "bf16", "int8", "llama-cpp")
+SPECULATIVE_MODES = ("none", "draft", "prompt-lookup")
+
+# Forward passes of the generation running in this context, by model role.
+# The hooks sit on models shared by every request, so each call counts into
+# its own dict instead of a counter on the instance.
+_forward_steps: ContextVar[Optional[Dict[str, int]]] = ContextVar("llm_forward_steps", default=None)
+
+
+def _count_step(role: str) -> Callable[..., None]:
+    def hook(*_: Any) -> None:
+        steps = _forward_steps.get()
+        if steps is not None:
+            steps[role] += 1
+
+    return hook
+
+
+@contextmanager
+def _counting_steps() -> Iterator[Dict[str, int]]:
+    steps = {"main": 0, "draft": 0}
+    reset = _forward_steps.set(steps)
+    try:
+        yield steps
+    finally:
+        _forward_steps.reset(reset)
+
+
+def cpu_supports_bf16() -> bool:
+    """Return True when the CPU has native bfloat16 matmul support (AVX512-BF16/AMX)."""
+    torch = _require_torch()
+    probe = getattr(torch.ops.mkldnn, "_is_mkldnn_bf16_supported", None)
+    if probe is not None:
+        try:
+            return bool(probe())
+        except Exception:  # pragma: no cover - torch internals
+            pass
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as handle:
+            flags = handle.read()
+    except OSError:  # pragma: no cover - non-Linux
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
 
 
 @dataclass(slots=True)
-class LocalCausalLM:
-    """Wrapper that loads a causal LM via Transformers with CPU/GPU fallback."""
+class SpeculativeStats:
+    """Forward-pass accounting for one generation call.
+
+    Every main-model forward pass emits exactly one token of its own plus the
+    draft tokens it accepted, so ``generated_tokens - main_steps`` is the
+    number of accepted draft tokens. Draft-model forward passes approximate
+    the number of proposed tokens (prompt lookup drafts without a model, so
+    its acceptance rate is not available).
+    """
+
+    generated_tokens: int = 0
+    main_steps: int = 0
+    draft_steps: int = 0
+
+    @property
+    def tokens_per_step(self) -> float:
+        return self.generated_tokens / self.main_steps if self.main_steps else 0.0
+
+    @property
+    def acceptance_rate(self) -> Optional[float]:
+        if not self.draft_steps:
+            return None
+        accepted = max(self.generated_tokens - self.main_steps, 0)
+        return min(accepted / self.draft_steps, 1.0)
+
+
+@dataclass(slots=True)
+class LanguageModel:
+    """Generation interface shared by every LLM backend."""
 
     config: LLMConfig
+
+    @property
+    def is_loaded(self) -> bool:  # pragma: no cover - base class
+        raise NotImplementedError
+
+    def load(self) -> None:  # pragma: no cover - base class
+        """Load weights ahead of the first request."""
+        raise NotImplementedError
+
+    def stream(self, prompt: str, max_new_tokens: Optional[int] = None) -> Iterator[str]:
+        """Yield the completion as text fragments while it is generated."""
+        raise NotImplementedError  # pragma: no cover - base class
+
+    def generate(self, prompt: str, max_new_tokens: Optional[int] = None) -> str:
+        return "".join(self.stream(prompt, max_new_tokens))
+
+
+@dataclass(slots=True)
+class LocalCausalLM(LanguageModel):
+    """Wrapper that loads a causal LM via Transformers with CPU/GPU fallback."""
+
     _tokenizer: Optional[AutoTokenizer] = None
     _model: Optional[AutoModelForCausalLM] = None
+    _draft_model: Optional[AutoModelForCausalLM] = None
+    _step_hooks: Dict[str, Any] = field(default_factory=dict, repr=False)
+    _hooks_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
 
     def _load_tokenizer(self) -> AutoTokenizer:
         if self._tokenizer is None:
+            from transformers import AutoTokenizer
+
             self._tokenizer = AutoTokenizer.from_pretrained(self.config.model_name)
             if self._tokenizer.pad_token_id is None:
                 self._tokenizer.pad_token = self._tokenizer.eos_token
         return self._tokenizer
 
-    def _load_model(self) -> AutoModelForCausalLM:
-        if self._model is None:
-            kwargs = {}
-
+    def _model_kwargs(self, torch: Any) -> dict:
+        backend = self.config.backend
+        if backend == "auto":
+            BitsAndBytesConfig = _bitsandbytes_config_class()
             if (
                 self.config.use_bitsandbytes
                 and BitsAndBytesConfig is not None
                 and torch.cuda.is_available()
             ):
-                kwargs["quantization_config"] = BitsAndBytesConfig(
-                    load_in_4bit=True,
-                    bnb_4bit_quant_type="nf4",
-                    bnb_4bit_compute_dtype=torch.bfloat16,
-                )
-                kwargs["device_map"] = self.config.device_map or "auto"
+                return {
+                    "quantization_config": BitsAndBytesConfig(
+                        load_in_4bit=True,
+                        bnb_4bit_quant_type="nf4",
+                        bnb_4bit_compute_dtype=torch.bfloat16,
+                    ),
+                    "device_map": self.config.device_map or "auto",
+                }
+            if torch.cuda.is_available():
+                return {"device_map": self.config.device_map or "auto", "torch_dtype": torch.bfloat16}
+            return {"device_map": "cpu", "torch_dtype": torch.float32}
+
+        # Explicit CPU backends load without accelerate dispatch hooks so that
+        # dynamic quantisation can swap the Linear modules in place.
+        dtype = torch.float32
+        if backend == "bf16":
+            if cpu_supports_bf16():
+                dtype = torch.bfloat16
             else:
-                if torch.cuda.is_available():
-                    kwargs["device_map"] = self.config.device_map or "auto"
-                    kwargs["torch_dtype"] = torch.bfloat16
-                else:
-                    kwargs["device_map"] = "cpu"
-                    kwargs["torch_dtype"] = torch.float32
-
-            self._model = AutoModelForCausalLM.from_pretrained(
-                self.config.model_name,
-                **kwargs,
+                warnings.warn("CPU lacks native bfloat16 support; loading the LLM in float32 instead")
+        return {"torch_dtype": dtype, "low_cpu_mem_usage": True}
+
+    def _from_pretrained(self, model_name: str) -> AutoModelForCausalLM:
+        torch = _require_torch()
+        from transformers import AutoModelForCausalLM
+
+        model = AutoModelForCausalLM.from_pretrained(model_name, **self._model_kwargs(torch))
+        model.eval()
+        if self.config.backend == "int8":
+            model = torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
             )
-            self._model.eval()
+        return model
+
+    def _hook_steps(self, model: Any, role: str) -> None:
+        """Count ``model``'s forward passes; only speculative decoding reports them."""
+        with self._hooks_lock:
+            if role not in self._step_hooks:
+                self._step_hooks[role] = model.register_forward_hook(_count_step(role))
+
+    def _load_model(self) -> AutoModelForCausalLM:
+        if self._model is None:
+            self._model = self._from_pretrained(self.config.model_name)
         return self._model
 
-    def generate(self, prompt: str) -> str:
+    def _load_draft_model(self) -> AutoModelForCausalLM:
+        if self._draft_model is None:
+            self._draft_model = self._from_pretrained(self.config.draft_model_name)
+            # Let transformers adapt the number of drafted tokens to the acceptance rate.
+            generation_config = self._draft_model.generation_config
+            generation_config.num_assistant_tokens = self.config.num_assistant_tokens
+            generation_config.num_assistant_tokens_schedule = "heuristic"
+        return self._draft_model
+
+    @property
+    def is_loaded(self) -> bool:
+        loaded = self._model is not None and self._tokenizer is not None
+        if self.config.speculative == "draft":
+            loaded = loaded and self._draft_model is not None
+        return loaded
+
+    def load(self) -> None:
+        """Load the tokenizer and model weights ahead of the first request."""
+        self._load_tokenizer()
+        self._load_model()
+        if self.config.speculative == "draft":
+            self._load_draft_model()
+
+    def _prepare(self, prompt: str) -> tuple[Any, Any, dict]:
         tokenizer = self._load_tokenizer()
         model = self._load_model()
-
         inputs = tokenizer(
             prompt,
             return_tensors="pt",
@@ -75,34 +242,239 @@ class LocalCausalLM:
         if device is None:
             device = next(model.parameters()).device
         inputs = {key: value.to(device) for key, value in inputs.items()}
+        return tokenizer, model, inputs
+
+    def _generation_kwargs(
+        self, tokenizer: Any, max_new_tokens: Optional[int], token: Optional[CancellationToken] = None
+    ) -> dict:
+        kwargs = {
+            "max_new_tokens": max_new_tokens or self.config.max_new_tokens,
+            "temperature": self.config.temperature,
+            "do_sample": self.config.temperature > 0,
+            "pad_token_id": tokenizer.pad_token_id,
+            "eos_token_id": tokenizer.eos_token_id,
+        }
+        if self.config.speculative != "none":
+            self._hook_steps(self._load_model(), "main")
+        if self.config.speculative == "draft":
+            kwargs["assistant_model"] = self._load_draft_model()
+            self._hook_steps(kwargs["assistant_model"], "draft")
+        elif self.config.speculative == "prompt-lookup":
+            kwargs["prompt_lookup_num_tokens"] = self.config.prompt_lookup_num_tokens
+        if token is not None:
+            from transformers import StoppingCriteriaList
+
+            kwargs["stopping_criteria"] = StoppingCriteriaList([CancellationCriteria(token)])
+        return kwargs
+
+    @staticmethod
+    def _record_cancellation(kwargs: dict, generated_tokens: int) -> None:
+        for criteria in kwargs.get("stopping_criteria", ()):
+            if isinstance(criteria, CancellationCriteria):
+                criteria.record(kwargs["max_new_tokens"], generated_tokens)
+
+    def _record_steps(self, generated_tokens: int, steps: Dict[str, int]) -> SpeculativeStats:
+        stats = SpeculativeStats(generated_tokens, steps.get("main", 0), steps.get("draft", 0))
+        if self.config.speculative != "none":
+            record_value("tokens_per_step", round(stats.tokens_per_step, 3))
+            if stats.acceptance_rate is not None:
+                record_value("draft_acceptance_rate", round(stats.acceptance_rate, 3))
+        return stats
+
+    def generate(self, prompt: str, max_new_tokens: Optional[int] = None) -> str:
+        return self.generate_with_stats(prompt, max_new_tokens)[0]
+
+    def generate_with_stats(
+        self, prompt: str, max_new_tokens: Optional[int] = None
+    ) -> tuple[str, SpeculativeStats]:
+        """Like ``generate``, plus this call's stats. Forward passes are only counted with speculation on."""
+        with span("generate"):
+            torch = _require_torch()
+            tokenizer, model, inputs = self._prepare(prompt)
+            kwargs = self._generation_kwargs(tokenizer, max_new_tokens, current_token())
+
+            start = perf_counter()
+            with torch.no_grad(), thread_scope("generate", self.config.n_threads), _counting_steps() as steps:
+                output_ids = model.generate(**inputs, **kwargs)
+            elapsed = perf_counter() - start
+
+            prompt_tokens = inputs["input_ids"].shape[1]
+            generated = output_ids[0, prompt_tokens:]
+            record_generation(int(prompt_tokens), int(generated.shape[0]), elapsed)
+            stats = self._record_steps(int(generated.shape[0]), steps)
+            self._record_cancellation(kwargs, int(generated.shape[0]))
+            return tokenizer.decode(generated, skip_special_tokens=True), stats
+
+    def stream(self, prompt: str, max_new_tokens: Optional[int] = None) -> Iterator[str]:
+        with span("generate"):
+            torch = _require_torch()
+            from transformers import TextIteratorStreamer
+
+            tokenizer, model, inputs = self._prepare(prompt)
+            streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+            # A consumer that stops reading (the client went away) cancels generation.
+            token = current_token() or CancellationToken()
+            kwargs = self._generation_kwargs(tokenizer, max_new_tokens, token)
+            outputs: List[Any] = []
+            errors: List[BaseException] = []
+            steps: Dict[str, int] = {}
+
+            def run() -> None:
+                with torch.no_grad(), thread_scope("generate", self.config.n_threads), _counting_steps() as counted:
+                    try:
+                        outputs.append(model.generate(**inputs, **kwargs, streamer=streamer))
+                    except BaseException as exc:
+                        errors.append(exc)
+                        streamer.end()  # generate() never reached its own end(); unblock the reader
+                    finally:
+                        steps.update(counted)
+
+            start = perf_counter()
+            worker = threading.Thread(target=run, daemon=True)
+            worker.start()
+            try:
+                yield from streamer
+                worker.join()
+                if errors:
+                    raise errors[0]
+            except GeneratorExit:
+                token.cancel("disconnect")
+                raise
+            finally:
+                worker.join()
+                elapsed = perf_counter() - start
+                prompt_tokens = int(inputs["input_ids"].shape[1])
+                generated = int(outputs[0].shape[1]) - prompt_tokens if outputs else 0
+                record_generation(prompt_tokens, generated, elapsed)
+                self._record_steps(generated, steps)
+                self._record_cancellation(kwargs, generated)
+
 
-        with torch.no_grad():
-            output_ids = model.generate(
-                **inputs,
-                max_new_tokens=self.config.max_new_tokens,
-                temperature=self.config.temperature,
-                do_sample=self.config.temperature > 0,
-                pad_token_id=tokenizer.pad_token_id,
-                eos_token_id=tokenizer.eos_token_id,
+@dataclass(slots=True)
+class LlamaCppLM(LanguageModel):
+    """Run a GGUF checkpoint (e.g. a Q4_K_M Qwen2.5 export) through llama.cpp."""
+
+    _llama: Any = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._llama is not None
+
+    def load(self) -> None:
+        self._load_model()
+
+    def _load_model(self) -> Any:
+        if self._llama is None:
+            try:
+                from llama_cpp import Llama  # type: ignore
+            except ImportError as exc:  # pragma: no cover - optional dependency
+                raise RuntimeError(
+                    "llama-cpp-python is required for the llama-cpp backend. Please install it."
+                ) from exc
+            if self.config.gguf_path is None:
+                raise ValueError("LLMConfig.gguf_path must point to a GGUF file for the llama-cpp backend")
+            kwargs: Dict[str, Any] = {}
+            if self.config.speculative == "prompt-lookup":
+                from llama_cpp.llama_speculative import LlamaPromptLookupDecoding  # type: ignore
+
+                kwargs["draft_model"] = LlamaPromptLookupDecoding(
+                    num_pred_tokens=self.config.prompt_lookup_num_tokens
+                )
+            elif self.config.speculative == "draft":
+                raise ValueError("The llama-cpp backend only supports prompt-lookup speculation")
+            self._llama = Llama(
+                model_path=str(self.config.gguf_path),
+                n_ctx=self.config.n_ctx,
+                n_threads=self.config.n_threads or threads_for("generate"),
+                verbose=False,
+                **kwargs,
             )
+        return self._llama
+
+    def _completion_kwargs(self, max_new_tokens: Optional[int]) -> dict:
+        return {
+            "max_tokens": max_new_tokens or self.config.max_new_tokens,
+            "temperature": self.config.temperature,
+        }
+
+    def generate(self, prompt: str, max_new_tokens: Optional[int] = None) -> str:
+        with span("generate"):
+            llama = self._load_model()
+            kwargs = self._completion_kwargs(max_new_tokens)
+            token = current_token()
+            criteria = CancellationCriteria(token) if token is not None else None
+            if criteria is not None:
+                from llama_cpp import StoppingCriteriaList  # type: ignore
+
+                kwargs["stopping_criteria"] = StoppingCriteriaList([lambda _ids, _logits: criteria.stop()])
+            start = perf_counter()
+            completion = llama.create_completion(prompt, **kwargs)
+            elapsed = perf_counter() - start
+            usage = completion.get("usage", {})
+            generated = int(usage.get("completion_tokens", 0))
+            record_generation(int(usage.get("prompt_tokens", 0)), generated, elapsed)
+            if criteria is not None:
+                criteria.record(kwargs["max_tokens"], generated)
+            return completion["choices"][0]["text"]
 
-        generated = output_ids[0, inputs["input_ids"].shape[1] :]
-        return tokenizer.decode(generated, skip_special_tokens=True)
+    def stream(self, prompt: str, max_new_tokens: Optional[int] = None) -> Iterator[str]:
+        with span("generate"):
+            llama = self._load_model()
+            kwargs = self._completion_kwargs(max_new_tokens)
+            criteria = CancellationCriteria(current_token() or CancellationToken())
+            prompt_tokens = len(llama.tokenize(prompt.encode("utf-8")))
+            generated = 0
+            start = perf_counter()
+            # Tokens are decoded on demand, so a closed stream stops generating by itself.
+            for chunk in llama.create_completion(prompt, stream=True, **kwargs):
+                generated += 1
+                yield chunk["choices"][0]["text"]
+                if criteria.stop():
+                    break
+            record_generation(prompt_tokens, generated, perf_counter() - start)
+            criteria.record(kwargs["max_tokens"], generated)
+
+
+def create_llm(config: LLMConfig) -> LanguageModel:
+    """Instantiate the generation backend selected by ``config.backend``."""
+    if config.backend not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM backend {config.backend!r}; expected one of {LLM_BACKENDS}")
+    if config.speculative not in SPECULATIVE_MODES:
+        raise ValueError(
+            f"Unknown speculative mode {config.speculative!r}; expected one of {SPECULATIVE_MODES}"
+        )
+    if config.backend == "llama-cpp":
+        return LlamaCppLM(config)
+    return LocalCausalLM(config)
 
 
 def format_chat_prompt(messages: Iterable[dict], context: str, question: str) -> str:
     """Build a simple prompt from chat history and retrieved context."""
 
-    history_parts = []
-    for message in messages:
-        role = message.get("role", "user").upper()
-        content = message.get("content", "")
-        if role == "SYSTEM":
-            continue
-        history_parts.append(f"{role}: {content}")
+    with span("format_prompt"):
+        return _format_chat_prompt(messages, context, question)
+
+
+def format_history_prompt(history: str, context: str, question: str) -> str:
+    """Build the prompt from an already rendered HISTORY block (see ``rag.sessions``)."""
+
+    with span("format_prompt"):
+        return _assemble_prompt(history, context, question)
+
+
+def render_message(message: dict) -> Optional[str]:
+    role = message.get("role", "user").upper()
+    if role == "SYSTEM":
+        return None
+    return f"{role}: {message.get('content', '')}"
+
+
+def _format_chat_prompt(messages: Iterable[dict], context: str, question: str) -> str:
+    history = "\n".join(line for line in map(render_message, messages) if line is not None)
+    return _assemble_prompt(history, context, question)
 
-    history = "\n".join(history_parts)
 
+def _assemble_prompt(history: str, context: str, question: str) -> str:
     instructions = (
         "SYSTEM: Bạn là trợ lý tuyển sinh của trường Đại học. Chỉ trả lời dựa trên NGỮ CẢNH cung cấp. "
         "Nếu không tìm thấy thông tin hãy nói \"Không tìm thấy trong tài liệu\". "
@@ -0,0 +1,239 @@
+"""Lightweight latency spans and Prometheus-compatible metrics.
+
+The collectors here are deliberately small: a span costs two
+``perf_counter()`` calls, a bisect into the bucket list, and one uncontended
+lock acquisition, so instrumentation can stay enabled in production without
+pulling in ``prometheus_client``.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import threading
+from time import perf_counter
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+THROUGHPUT_BUCKETS: Tuple[float, ...] = (0.5, 1, 2, 5, 10, 20, 50, 100, 200)
+BATCH_SIZE_BUCKETS: Tuple[float, ...] = (1, 2, 4, 8, 16, 32, 64, 128)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+@dataclass(slots=True)
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    name: str
+    documentation: str
+    labelnames: Tuple[str, ...] = ()
+    _values: Dict[LabelValues, float] = field(init=False, default_factory=dict)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock, repr=False)
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}")
+        return lines
+
+
+@dataclass(slots=True)
+class Histogram:
+    """Cumulative-bucket histogram matching the Prometheus exposition format."""
+
+    name: str
+    documentation: str
+    labelnames: Tuple[str, ...] = ()
+    buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    _counts: Dict[LabelValues, List[int]] = field(init=False, default_factory=dict)
+    _sums: Dict[LabelValues, float] = field(init=False, default_factory=dict)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock, repr=False)
+
+    def observe(self, value: float, *labels: str) -> None:
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            counts[position] += 1
+            self._sums[labels] = self._sums.get(labels, 0.0) + value
+
+    def count(self, *labels: str) -> int:
+        return sum(self._counts.get(labels, ()))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(counts), self._sums[labels]) for labels, counts in self._counts.items())
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{_format_number(bound)}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_number(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+@dataclass(slots=True)
+class MetricsRegistry:
+    """Collection of metrics rendered together on ``/metrics``."""
+
+    _metrics: Dict[str, Counter | Histogram] = field(init=False, default_factory=dict)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, tuple(labelnames)))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, tuple(labelnames), tuple(buckets)))
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+STAGE_SECONDS = REGISTRY.histogram(
+    "rag_stage_duration_seconds", "Latency of chatbot pipeline stages.", ("stage",)
+)
+LLM_TOKENS = REGISTRY.counter("rag_llm_tokens_total", "Tokens processed by the LLM.", ("kind",))
+LLM_TOKENS_PER_SECOND = REGISTRY.histogram(
+    "rag_llm_tokens_per_second",
+    "Generation throughput per request.",
+    buckets=THROUGHPUT_BUCKETS,
+)
+REQUESTS = REGISTRY.counter(
+    "rag_requests_total", "API requests by endpoint and status.", ("endpoint", "status")
+)
+SHARD_FAILURES = REGISTRY.counter(
+    "rag_shard_failures_total", "Shard searches skipped for missing the deadline or failing.", ("shard", "reason")
+)
+TABLE_LOOKUPS = REGISTRY.counter(
+    "rag_table_lookups_total", "Chat questions answered from the table store (hit) or passed to the LLM (miss).", ("outcome",)
+)
+GENERATIONS_CANCELLED = REGISTRY.counter(
+    "rag_generations_cancelled_total", "Generations stopped early by a deadline or a client disconnect.", ("reason",)
+)
+LLM_TOKENS_AVOIDED = REGISTRY.counter(
+    "rag_llm_tokens_avoided_total", "Tokens not generated because the request was cancelled (token budget left unspent)."
+)
+SINGLE_FLIGHT = REGISTRY.counter(
+    "rag_single_flight_total",
+    "Calls that computed a result (leader) or joined an identical computation in flight (follower).",
+    ("stage", "role"),
+)
+EMBED_BATCH_SIZE = REGISTRY.histogram(
+    "rag_embed_batch_size", "Texts per micro-batched embedding call.", buckets=BATCH_SIZE_BUCKETS
+)
+CONTEXT_WORDS = REGISTRY.counter(
+    "rag_context_words_total", "Words of retrieved context before and after compression.", ("stage",)
+)
+
+
+@dataclass(slots=True)
+class RequestMetrics:
+    """What one request recorded: stage latencies in seconds, counters, and whether it was cut off."""
+
+    timings: Dict[str, float] = field(default_factory=dict)
+    stats: Dict[str, float] = field(default_factory=dict)
+    partial: bool = False
+
+
+_request_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a pipeline stage into the stage histogram and the current request."""
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage)
+        metrics = _request_metrics.get()
+        if metrics is not None:
+            metrics.timings[stage] = metrics.timings.get(stage, 0.0) + elapsed
+
+
+@contextmanager
+def request_metrics() -> Iterator[RequestMetrics]:
+    """Collect the spans and values recorded while the block runs."""
+    metrics = RequestMetrics()
+    token = _request_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _request_metrics.reset(token)
+
+
+def record_value(name: str, value: float) -> None:
+    """Attach a non-latency value (e.g. token counts) to the current request's ``stats``."""
+    metrics = _request_metrics.get()
+    if metrics is not None:
+        metrics.stats[name] = value
+
+
+def mark_partial() -> None:
+    """Flag the current request's answer as cut off before it was complete."""
+    metrics = _request_metrics.get()
+    if metrics is not None:
+        metrics.partial = True
+
+
+def record_generation(prompt_tokens: int, generated_tokens: int, seconds: float) -> None:
+    LLM_TOKENS.inc("prompt", amount=prompt_tokens)
+    LLM_TOKENS.inc("generated", amount=generated_tokens)
+    tokens_per_second = generated_tokens / seconds if seconds > 0 else 0.0
+    if generated_tokens:
+        LLM_TOKENS_PER_SECOND.observe(tokens_per_second)
+    record_value("prompt_tokens", prompt_tokens)
+    record_value("generated_tokens", generated_tokens)
+    record_value("tokens_per_second", round(tokens_per_second, 2))
@@ -0,0 +1,267 @@
+"""Local model server that keeps one copy of the embedder and LLM resident.
+
+API workers (``rag.server``) started with ``RAG_MODEL_SERVER`` set do not
+load any weights. They call this process over HTTP, on localhost or a Unix
+socket, through ``rag.remote``. Start it with ``run-model-server``.
+"""
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager, contextmanager, suppress
+from dataclasses import dataclass, field
+import logging
+import threading
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+
+from rag.batching import EmbeddingBatcher
+from rag.cancellation import CancellationToken, DeadlineExceeded, cancellation_scope, remaining_timeout
+from rag.config import ChatbotConfig
+from rag.embedding import BGEEmbeddingModel, EmbeddingModel
+from rag.llm import LanguageModel, create_llm
+from rag.metrics import REGISTRY, REQUESTS, request_metrics
+from rag.single_flight import SingleFlight
+from rag.threads import configure as configure_threads
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class ModelHost:
+    """The resident models plus the gate that serialises generation.
+
+    Embedding calls run concurrently. Generation is limited to
+    ``max_concurrent_generations`` at a time, so requests from every API
+    worker queue in FIFO order in one place instead of oversubscribing the CPU.
+    """
+
+    embedding_model: EmbeddingModel
+    llm: Optional[LanguageModel]
+    max_concurrent_generations: int = 1
+    coalesce: bool = True
+    batcher: Optional[EmbeddingBatcher] = None
+    error: Optional[str] = None
+    flights: Optional[SingleFlight] = field(init=False, default=None)
+    _generation_slots: threading.BoundedSemaphore = field(init=False, repr=False)
+    _requests: Dict[str, CancellationToken] = field(init=False, default_factory=dict, repr=False)
+    _requests_lock: threading.Lock = field(init=False, default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self) -> None:
+        self._generation_slots = threading.BoundedSemaphore(max(self.max_concurrent_generations, 1))
+        if self.coalesce:
+            # Identical prompts from different API workers share one generation.
+            self.flights = SingleFlight("generation")
+
+    @classmethod
+    def from_config(cls, config: ChatbotConfig, load_llm: bool = True) -> "ModelHost":
+        configure_threads(config.threads, config.llm.n_threads)
+        embedding = config.pipeline.embedding
+        return cls(
+            embedding_model=BGEEmbeddingModel(embedding),
+            llm=create_llm(config.llm) if load_llm else None,
+            max_concurrent_generations=config.model_server.max_concurrent_generations,
+            coalesce=config.coalescing.enabled and config.coalescing.generation,
+            batcher=EmbeddingBatcher.from_config(embedding) if embedding.micro_batching else None,
+        )
+
+    def load(self) -> None:
+        try:
+            self.embedding_model.load()
+            if self.llm is not None:
+                self.llm.load()
+        except Exception as exc:  # reported through /readyz
+            self.error = f"{type(exc).__name__}: {exc}"
+
+    def models(self) -> dict:
+        return {
+            "embedder": self.embedding_model.is_loaded,
+            "llm": self.llm.is_loaded if self.llm is not None else None,
+        }
+
+    def require_llm(self) -> LanguageModel:
+        if self.llm is None:
+            raise HTTPException(status_code=404, detail="This model server was started without an LLM")
+        return self.llm
+
+    def embed(self, texts: list[str]):
+        """Embed ``texts``; small requests from all API workers are micro-batched together."""
+        if self.batcher is None:
+            return self.embedding_model.embed(texts)
+        return self.batcher.embed(self.embedding_model, texts)
+
+    @contextmanager
+    def cancellable(self, request_id: Optional[str], token: CancellationToken) -> Iterator[CancellationToken]:
+        """Register ``token`` under ``request_id`` so that ``cancel`` can stop the request."""
+        if request_id is None:
+            yield token
+            return
+        with self._requests_lock:
+            self._requests[request_id] = token
+        try:
+            yield token
+        finally:
+            with self._requests_lock:
+                self._requests.pop(request_id, None)
+
+    def cancel(self, request_id: str) -> bool:
+        """Cancel an in-flight generation; ``False`` when it already finished or never existed."""
+        with self._requests_lock:
+            token = self._requests.get(request_id)
+        if token is None:
+            return False
+        token.cancel("disconnect")
+        return True
+
+    def generate(self, prompt: str, max_new_tokens: Optional[int]) -> str:
+        self.require_llm()
+        if self.flights is None:
+            return self._generate(prompt, max_new_tokens)
+        text, _ = self.flights.do((prompt, max_new_tokens), lambda: self._generate(prompt, max_new_tokens))
+        return text
+
+    def stream(self, prompt: str, max_new_tokens: Optional[int]) -> Iterator[str]:
+        self.require_llm()
+        if self.flights is None:
+            return self._stream(prompt, max_new_tokens)
+        return self.flights.stream(("stream", prompt, max_new_tokens), lambda: self._stream(prompt, max_new_tokens))
+
+    def _generate(self, prompt: str, max_new_tokens: Optional[int]) -> str:
+        llm = self.require_llm()
+        # A request whose deadline passes while queued never starts generating.
+        if not self._generation_slots.acquire(timeout=remaining_timeout(None)):
+            raise DeadlineExceeded("Request deadline passed while waiting for a generation slot")
+        try:
+            return llm.generate(prompt, max_new_tokens=max_new_tokens)
+        finally:
+            self._generation_slots.release()
+
+    def _stream(self, prompt: str, max_new_tokens: Optional[int]) -> Iterator[str]:
+        llm = self.require_llm()
+        with self._generation_slots:
+            yield from llm.stream(prompt, max_new_tokens=max_new_tokens)
+
+
+# Built in the lifespan hook; tests and embedders may install their own.
+host: Optional[ModelHost] = None
+load_llm: bool = True
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    global host
+    if host is None:
+        host = ModelHost.from_config(ChatbotConfig(), load_llm=load_llm)
+    loading = asyncio.create_task(asyncio.to_thread(host.load))
+    loading.add_done_callback(_report_loading)
+    try:
+        yield
+    finally:
+        if not loading.done():
+            # Shutdown does not wait for a model load; the thread ends with the process.
+            loading.cancel()
+            with suppress(asyncio.CancelledError):
+                await loading
+
+
+def _report_loading(task: asyncio.Task) -> None:
+    if task.cancelled():
+        return
+    if task.exception() is not None:
+        logger.error("Model loading failed", exc_info=task.exception())
+    elif host is not None and host.error:
+        logger.error("Model loading failed: %s", host.error)
+
+
+app = FastAPI(title="Admissions Chatbot Model Server", version="1.0.0", lifespan=lifespan)
+
+
+def get_host() -> ModelHost:
+    if host is None:
+        raise HTTPException(status_code=503, detail="Model server is starting up")
+    return host
+
+
+class EmbedRequest(BaseModel):
+    texts: list[str]
+
+
+class GenerateRequest(BaseModel):
+    prompt: str
+    max_new_tokens: Optional[int] = None
+    stream: bool = False
+    deadline_ms: Optional[float] = None
+    request_id: Optional[str] = None
+
+
+class GenerateResponse(BaseModel):
+    text: str
+    timings: dict[str, float]
+    stats: dict[str, float] = {}
+
+
+@app.get("/healthz")
+def healthz() -> dict:
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz(response: Response) -> dict:
+    if host is None:
+        response.status_code = 503
+        return {"ready": False}
+    models = host.models()
+    ready = host.error is None and all(loaded is not False for loaded in models.values())
+    if not ready:
+        response.status_code = 503
+    return {"ready": ready, "models": models, "error": host.error}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/embed")
+def embed(request: EmbedRequest) -> Response:
+    """Return float32 vectors as raw bytes; ``X-Shape`` carries ``rows,dim``."""
+    vectors = get_host().embed(request.texts)
+    REQUESTS.inc("embed", "200")
+    return Response(
+        content=vectors.astype("float32", copy=False).tobytes(),
+        media_type="application/octet-stream",
+        headers={"X-Shape": f"{vectors.shape[0]},{vectors.shape[1] if vectors.ndim == 2 else 0}"},
+    )
+
+
+@app.post("/generate")
+def generate(request: GenerateRequest):
+    model_host = get_host()
+    if request.stream:
+        model_host.require_llm()
+        REQUESTS.inc("generate_stream", "200")
+        return StreamingResponse(
+            model_host.stream(request.prompt, request.max_new_tokens), media_type="text/plain; charset=utf-8"
+        )
+    deadline = request.deadline_ms / 1000 if request.deadline_ms is not None else None
+    try:
+        token = CancellationToken.after(deadline)
+        with request_metrics() as metrics, model_host.cancellable(request.request_id, token), cancellation_scope(token):
+            text = model_host.generate(request.prompt, request.max_new_tokens)
+    except DeadlineExceeded as exc:
+        REQUESTS.inc("generate", "504")
+        raise HTTPException(status_code=504, detail=str(exc)) from exc
+    REQUESTS.inc("generate", "200")
+    return GenerateResponse(
+        text=text,
+        timings={name: round(value, 4) for name, value in metrics.timings.items()},
+        stats=metrics.stats,
+    )
+
+
+@app.post("/generate/{request_id}/cancel")
+def cancel_generation(request_id: str) -> dict:
+    """Stop the generation started with ``request_id`` (its API worker lost the client)."""
+    return {"cancelled": get_host().cancel(request_id)}
@@ -0,0 +1,117 @@
+"""Persistent cache of parser output keyed by PDF content hash."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import hashlib
+import json
+import os
+from pathlib import Path
+import tempfile
+from typing import Optional
+
+from .config import ParseCacheConfig
+from .document_parsers import DocumentParser, ParsedDocument
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as handle:
+        for block in iter(lambda: handle.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass(slots=True)
+class ParseCache:
+    """Store ``ParsedDocument`` payloads on disk with a size cap and LRU eviction.
+
+    Entries are keyed by the PDF's SHA-256 plus the parser name and version,
+    so editing the PDF, switching parsers, or upgrading a parsing library
+    invalidates the entry while re-chunking or re-embedding reuses it.
+    Degraded parses (a parser crashed or timed out) are returned but not
+    stored, so the next ingestion tries again.
+    Recency is tracked through file modification times, which are bumped on
+    every hit.
+    """
+
+    config: ParseCacheConfig
+    hits: int = field(init=False, default=0)
+    misses: int = field(init=False, default=0)
+
+    def key(self, pdf_path: Path, parser: DocumentParser) -> str:
+        parser_digest = hashlib.sha256(
+            f"{parser.name}:{parser.cache_version()}".encode("utf-8")
+        ).hexdigest()[:16]
+        return f"{file_sha256(pdf_path)}-{parser.name}-{parser_digest}"
+
+    def _entry_path(self, key: str) -> Path:
+        return self.config.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[ParsedDocument]:
+        path = self._entry_path(key)
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # A truncated or corrupt entry is treated as a miss and rebuilt.
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)
+        return ParsedDocument.from_dict(payload)
+
+    def put(self, key: str, document: ParsedDocument) -> None:
+        self.config.directory.mkdir(parents=True, exist_ok=True)
+        path = self._entry_path(key)
+        # A unique name per writer, so concurrent ingests of one PDF never share a temp file.
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=self.config.directory, prefix=f".{key}-", suffix=".tmp", delete=False
+        ) as handle:
+            temporary = Path(handle.name)
+            try:
+                json.dump(document.to_dict(), handle, ensure_ascii=False)
+            except BaseException:
+                handle.close()
+                temporary.unlink(missing_ok=True)
+                raise
+        os.replace(temporary, path)
+        self.evict()
+
+    def get_or_extract(self, pdf_path: Path, parser: DocumentParser) -> ParsedDocument:
+        key = self.key(pdf_path, parser)
+        document = self.get(key)
+        if document is not None:
+            self.hits += 1
+            return document
+        self.misses += 1
+        document = parser.extract(pdf_path)
+        if parser.last_extract_complete():
+            self.put(key, document)
+        return document
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache fits ``max_bytes``."""
+        if not self.config.directory.exists():
+            return
+        entries = []
+        for path in self.config.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.config.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        if not self.config.directory.exists():
+            return
+        for path in self.config.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
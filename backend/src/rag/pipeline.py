@@ -1,12 +1,16 @@
 """Ingestion pipeline that turns PDFs into FAISS indices."""
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import List
+from time import perf_counter
+import tracemalloc
+from typing import Any, Dict, Iterator, List, Optional
 
 from .chunking import ChunkBuilder
 from .config import DocumentMetadata, PipelineConfig
+from .dedup import ChunkDeduplicator
 from .document_parsers import (
     CamelotParser,
     CompositeParser,
@@ -16,18 +20,51 @@ from .document_parsers import (
     TabulaParser,
 )
 from .embedding import BGEEmbeddingModel, EmbeddingModel
+from .metrics import record_value, span
+from .parse_cache import ParseCache
+from .sharding import ShardedVectorStore
+from .table_store import TableStore
 from .vector_store import FaissVectorStore
 
 
+@dataclass(slots=True)
+class StageReport:
+    """Wall time of one ingestion stage and, with ``track_memory``, its Python allocations.
+
+    ``peak_bytes`` is the highest traced allocation above what was allocated
+    when the stage started; ``retained_bytes`` is what was still allocated
+    when it ended. Allocations made by native libraries (FAISS, torch
+    tensors) and by parser subprocesses are not traced.
+    """
+
+    seconds: float
+    peak_bytes: Optional[int] = None
+    retained_bytes: Optional[int] = None
+
+
+@dataclass(slots=True)
+class IngestReport:
+    source: str
+    chunks: int = 0
+    stages: Dict[str, StageReport] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
 @dataclass(slots=True)
 class IngestionPipeline:
     """End-to-end ingestion pipeline for a single PDF file."""
 
     config: PipelineConfig
     parsers: List[DocumentParser] = field(init=False)
-    parser: DocumentParser = field(init=False)
+    parser: CompositeParser = field(init=False)
+    parse_cache: Optional[ParseCache] = field(init=False)
+    table_store: Optional[TableStore] = field(init=False)
+    deduplicator: Optional[ChunkDeduplicator] = field(init=False)
     embedding_model: EmbeddingModel = field(init=False)
-    vector_store: FaissVectorStore = field(init=False)
+    vector_store: FaissVectorStore | ShardedVectorStore = field(init=False)
+    last_report: Optional[IngestReport] = field(init=False, default=None)
 
     def __post_init__(self) -> None:
         chunk_builder = ChunkBuilder(self.config.chunking)
@@ -37,15 +74,77 @@ class IngestionPipeline:
             CamelotParser(chunk_builder),
             TabulaParser(chunk_builder),
         ]
-        self.parser = CompositeParser(chunk_builder=chunk_builder, parsers=self.parsers)
+        parsing = self.config.parsing
+        self.parser = CompositeParser(
+            chunk_builder=chunk_builder,
+            parsers=self.parsers,
+            concurrent=parsing.concurrent,
+            timeout=parsing.parser_timeout,
+            timeouts=dict(parsing.parser_timeouts),
+            similarity_threshold=parsing.table_similarity_threshold,
+        )
+        self.parse_cache = ParseCache(self.config.parse_cache) if self.config.parse_cache.enabled else None
+        self.table_store = TableStore(self.config.tables) if self.config.tables.enabled else None
+        self.deduplicator = ChunkDeduplicator(self.config.dedup) if self.config.dedup.enabled else None
         self.embedding_model: EmbeddingModel = BGEEmbeddingModel(self.config.embedding)
-        self.vector_store = FaissVectorStore(self.config.vector_store)
+        if self.config.sharding.enabled:
+            self.vector_store = ShardedVectorStore(self.config.sharding, self.config.vector_store)
+        else:
+            self.vector_store = FaissVectorStore(self.config.vector_store)
+
+    def ingest(self, pdf_path: Path, metadata: DocumentMetadata) -> IngestReport:
+        report = IngestReport(source=metadata.source)
+        self.last_report = report
+        started_tracing = self.config.track_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        try:
+            with self._stage(report, "parse"):
+                if self.parse_cache is not None:
+                    document = self.parse_cache.get_or_extract(pdf_path, self.parser)
+                else:
+                    document = self.parser.extract(pdf_path)
+            with self._stage(report, "chunk"):
+                if self.deduplicator is not None:
+                    document = self.deduplicator.strip_table_text(document)
+                chunks = self.parser.build_chunks(document, metadata)
+            if self.deduplicator is not None:
+                with self._stage(report, "dedup"):
+                    chunks = self.deduplicator.deduplicate(chunks)
+                record_value("chunks_deduplicated", self.deduplicator.last_report.dropped)
+            report.chunks = len(chunks)
+            with self._stage(report, "embed"):
+                vectors = self.embedding_model.embed(chunk.embedding_input() for chunk in chunks)
+            with self._stage(report, "index"):
+                self.vector_store.build(vectors, chunks)
+            # Written only once the index is built, and replaced wholesale like it.
+            if self.table_store is not None:
+                with self._stage(report, "tables"):
+                    self.table_store.replace(metadata, document.tables)
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+        return report
 
-    def ingest(self, pdf_path: Path, metadata: DocumentMetadata) -> None:
-        chunks = self.parser.parse(pdf_path, metadata)
-        vectors = self.embedding_model.embed(chunk.text for chunk in chunks)
-        self.vector_store.build(vectors, chunks)
+    @contextmanager
+    def _stage(self, report: IngestReport, name: str) -> Iterator[None]:
+        """Time the stage as the ``ingest_<name>`` span and record it in ``report``."""
+        tracing = self.config.track_memory and tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = perf_counter()
+        try:
+            with span(f"ingest_{name}"):
+                yield
+        finally:
+            stage = StageReport(seconds=round(perf_counter() - start, 4))
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                stage.peak_bytes = max(peak - baseline, 0)
+                stage.retained_bytes = current - baseline
+            report.stages[name] = stage
 
-    def load_vector_store(self) -> FaissVectorStore:
+    def load_vector_store(self) -> FaissVectorStore | ShardedVectorStore:
         self.vector_store.load()
         return self.vector_store
@@ -0,0 +1,218 @@
+"""On-demand request profiling that produces flame-graph-ready output.
+
+An operator arms the ``Profiler`` through ``POST /admin/profile`` for the
+next ``requests`` requests. Each one is profiled with probability
+``sample_rate``, by cProfile (the default) or by pyinstrument when it is
+installed. Every capture is folded into one set of collapsed stacks,
+``frame;frame;frame <microseconds>``, which ``flamegraph.pl``, speedscope,
+and inferno read directly. Stacks are rooted at the endpoint name.
+
+cProfile records call edges, not stacks. Its stacks are rebuilt by
+splitting each function's cumulative time over its callees in proportion,
+which is exact for trees and a close approximation otherwise. Only the
+request's own thread is profiled. A single-flight leader computes inline, so
+retrieval and generation appear in its stacks; a follower shows the wait.
+Work handed to other threads (the embedding batcher, shard fan-out) appears
+as the request's wait for it.
+"""
+from __future__ import annotations
+
+from collections import Counter as TallyCounter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import os
+import random
+import threading
+from time import perf_counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .config import ProfilingConfig
+
+ENGINES = ("cprofile", "pyinstrument")
+MAX_DEPTH = 96
+MIN_SHARE = 0.0005  # stack paths below this share of a capture are dropped
+
+
+def _label(function: Tuple[str, int, str]) -> str:
+    filename, line, name = function
+    if filename == "~":  # built-in
+        return name.replace(";", ",")
+    return f"{name} ({os.path.basename(filename)}:{line})".replace(";", ",")
+
+
+def fold_cprofile(profile: Any, root: str) -> Dict[str, float]:
+    """Collapse a ``cProfile.Profile`` into ``{"root;caller;callee": seconds}``."""
+    import pstats
+
+    stats = pstats.Stats(profile).stats
+    callees: Dict[Any, List[Tuple[Any, float]]] = {}
+    for function, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((function, edge[3]))
+    roots = [function for function, entry in stats.items() if not entry[4]]
+    total = sum(stats[function][3] for function in roots)
+    folded: Dict[str, float] = TallyCounter()
+    if total <= 0:
+        return folded
+    floor = total * MIN_SHARE
+
+    def walk(function: Any, seconds: float, path: Tuple[str, ...], seen: frozenset) -> None:
+        _, _, own, cumulative, _ = stats[function]
+        if cumulative <= 0 or seconds < floor:
+            return
+        path = path + (_label(function),)
+        scale = min(seconds / cumulative, 1.0)
+        folded[";".join(path)] += own * scale
+        if len(path) >= MAX_DEPTH:
+            return
+        for callee, edge_seconds in callees.get(function, ()):
+            if callee not in seen:
+                walk(callee, edge_seconds * scale, path, seen | {callee})
+
+    for function in roots:
+        walk(function, stats[function][3], (root,), frozenset({function}))
+    return folded
+
+
+def fold_pyinstrument(session: Any, root: str) -> Dict[str, float]:
+    """Collapse a pyinstrument session's frame tree into collapsed stacks."""
+    folded: Dict[str, float] = TallyCounter()
+
+    def walk(frame: Any, path: Tuple[str, ...]) -> None:
+        label = f"{frame.function} ({os.path.basename(frame.file_path or '')}:{frame.line_no})"
+        path = path + (label.replace(";", ","),)
+        children = list(frame.children)
+        own = frame.time - sum(child.time for child in children)
+        if own > 0:
+            folded[";".join(path)] += own
+        for child in children:
+            walk(child, path)
+
+    top = session.root_frame()
+    if top is not None:
+        walk(top, (root,))
+    return folded
+
+
+class _Session:
+    """One running profiler in the current thread."""
+
+    def __init__(self, engine: str) -> None:
+        self.engine = engine
+        if engine == "pyinstrument":
+            try:
+                from pyinstrument import Profiler as PyinstrumentProfiler  # type: ignore
+            except ImportError as exc:  # pragma: no cover - optional dependency
+                raise RuntimeError("pyinstrument is not installed; use engine='cprofile'") from exc
+            self._profiler = PyinstrumentProfiler(interval=0.001)
+        else:
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+
+    def __enter__(self) -> "_Session":
+        if self.engine == "pyinstrument":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if self.engine == "pyinstrument":
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    def fold(self, root: str) -> Dict[str, float]:
+        if self.engine == "pyinstrument":
+            return fold_pyinstrument(self._profiler.last_session, root)
+        return fold_cprofile(self._profiler, root)
+
+
+@dataclass(slots=True)
+class Capture:
+    endpoint: str
+    seconds: float = 0.0
+    stacks: Dict[str, float] = field(default_factory=TallyCounter)
+
+    def summary(self) -> Dict[str, Any]:
+        return {"endpoint": self.endpoint, "seconds": round(self.seconds, 4)}
+
+
+@dataclass(slots=True)
+class Profiler:
+    """Arms, samples, and aggregates request profiles for one process."""
+
+    config: ProfilingConfig
+    engine: str = "cprofile"
+    remaining: int = 0
+    sample_rate: float = 1.0
+    captures: List[Capture] = field(default_factory=list)
+    stacks: Dict[str, float] = field(default_factory=TallyCounter)
+    _active: bool = field(init=False, default=False)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock, repr=False)
+
+    def arm(self, requests: int, sample_rate: float = 1.0, engine: str = "cprofile") -> None:
+        """Profile (a ``sample_rate`` share of) the next ``requests`` requests, discarding old captures."""
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown profiling engine {engine!r}; expected one of {ENGINES}")
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+        if requests < 1 or requests > self.config.max_requests:
+            raise ValueError(f"requests must be between 1 and {self.config.max_requests}")
+        if engine == "pyinstrument":
+            _Session(engine)  # fail now, not on the first request, if it is missing
+        with self._lock:
+            self.engine, self.remaining, self.sample_rate = engine, requests, sample_rate
+            self.captures, self.stacks = [], TallyCounter()
+
+    def disarm(self) -> None:
+        with self._lock:
+            self.remaining = 0
+
+    def _claim(self) -> bool:
+        with self._lock:
+            # Python 3.12+ allows one active cProfile per process, so captures never overlap.
+            if self.remaining <= 0 or self._active or random.random() >= self.sample_rate:
+                return False
+            self.remaining -= 1
+            self._active = True
+            return True
+
+    @contextmanager
+    def capture(self, endpoint: str) -> Iterator[Optional[Capture]]:
+        """Profile the block if this request is sampled; yields the capture or ``None``."""
+        if not self._claim():
+            yield None
+            return
+        capture = Capture(endpoint)
+        start = perf_counter()
+        session = _Session(self.engine)
+        try:
+            with session:
+                yield capture
+        finally:
+            capture.seconds = perf_counter() - start
+            stacks = session.fold(endpoint)
+            with self._lock:
+                self._active = False
+                capture.stacks.update(stacks)
+                self.captures.append(capture)
+                self.stacks.update(stacks)
+
+    def folded(self) -> str:
+        """All captures as collapsed stacks with integer microsecond weights."""
+        lines = [
+            f"{stack} {int(round(seconds * 1_000_000))}"
+            for stack, seconds in sorted(self.stacks.items())
+            if seconds * 1_000_000 >= 1
+        ]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "engine": self.engine,
+            "remaining": self.remaining,
+            "sample_rate": self.sample_rate,
+            "captured": [capture.summary() for capture in self.captures],
+        }
@@ -0,0 +1,165 @@
+"""Clients for a shared model server (see ``rag.model_server``).
+
+``RemoteEmbeddingModel`` and ``RemoteLLM`` implement the same interfaces as
+the in-process models, so ``ChatbotService`` swaps them in transparently
+when ``ModelServerConfig.url`` is set. Every worker thread shares one pooled
+keep-alive HTTP client, so concurrent requests are multiplexed over a
+handful of connections.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import threading
+import time
+from typing import Any, Iterable, Iterator, Optional
+import uuid
+
+import numpy as np
+
+from .cancellation import DeadlineExceeded, check_deadline, current_token, remaining_timeout
+from .config import EmbeddingConfig, LLMConfig, ModelServerConfig
+from .embedding import EmbeddingModel
+from .llm import LanguageModel
+from .metrics import record_value, span
+
+UNIX_SCHEME = "unix://"
+
+
+@dataclass(slots=True)
+class ModelServerClient:
+    """Thin HTTP client over TCP or a Unix domain socket."""
+
+    config: ModelServerConfig
+    http: Any = None
+
+    def __post_init__(self) -> None:
+        if self.http is None:
+            import httpx
+
+            url = self.config.url or ""
+            limits = httpx.Limits(
+                max_connections=self.config.max_connections,
+                max_keepalive_connections=self.config.max_connections,
+            )
+            if url.startswith(UNIX_SCHEME):
+                transport = httpx.HTTPTransport(uds=url[len(UNIX_SCHEME):], limits=limits)
+                self.http = httpx.Client(transport=transport, base_url="http://model-server", timeout=self.config.timeout)
+            else:
+                self.http = httpx.Client(base_url=url, limits=limits, timeout=self.config.timeout)
+
+    def ready(self) -> bool:
+        try:
+            return self.http.get("/readyz", timeout=2.0).status_code == 200
+        except Exception:
+            return False
+
+    def wait_until_ready(self, timeout: Optional[float] = None, interval: float = 0.5) -> None:
+        deadline = time.monotonic() + (self.config.timeout if timeout is None else timeout)
+        while not self.ready():
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Model server at {self.config.url} is not ready")
+            time.sleep(interval)
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        import httpx
+
+        remaining = remaining_timeout(None)
+        timeout = {"timeout": remaining} if remaining is not None else {}
+        try:
+            response = self.http.post("/embed", json={"texts": texts}, **timeout)
+        except httpx.TimeoutException:
+            check_deadline("embedding")
+            raise
+        response.raise_for_status()
+        rows, dim = (int(value) for value in response.headers["X-Shape"].split(","))
+        return np.frombuffer(response.content, dtype="float32").reshape(rows, dim).copy()
+
+    def generate(self, prompt: str, max_new_tokens: Optional[int]) -> dict:
+        payload = {"prompt": prompt, "max_new_tokens": max_new_tokens}
+        token = current_token()
+        remaining = token.remaining() if token is not None else None
+        if remaining is not None:
+            # The server stops generating at the deadline and returns what it has.
+            payload["deadline_ms"] = remaining * 1000
+        unsubscribe = None
+        if token is not None:
+            # A disconnect has no deadline to forward, so cancelling the token
+            # asks the server to stop this request while the POST below blocks.
+            request_id = payload["request_id"] = uuid.uuid4().hex
+            unsubscribe = token.on_cancel(lambda: self._cancel_in_background(request_id))
+        try:
+            response = self.http.post("/generate", json=payload)
+        finally:
+            if unsubscribe is not None:
+                unsubscribe()
+        if response.status_code == 504:
+            raise DeadlineExceeded(response.json().get("detail", "Model server deadline exceeded"))
+        response.raise_for_status()
+        return response.json()
+
+    def _cancel_in_background(self, request_id: str) -> None:
+        # The token may be cancelled on the event loop, which must not block on HTTP.
+        threading.Thread(target=self._cancel, args=(request_id,), name="generate-cancel", daemon=True).start()
+
+    def _cancel(self, request_id: str) -> None:
+        try:
+            self.http.post(f"/generate/{request_id}/cancel", timeout=2.0)
+        except Exception:  # the generation still ends at its deadline
+            pass
+
+    def stream(self, prompt: str, max_new_tokens: Optional[int]) -> Iterator[str]:
+        payload = {"prompt": prompt, "max_new_tokens": max_new_tokens, "stream": True}
+        with self.http.stream("POST", "/generate", json=payload) as response:
+            response.raise_for_status()
+            yield from response.iter_text()
+
+
+@dataclass(slots=True)
+class RemoteEmbeddingModel(EmbeddingModel):
+    """Embeddings computed by the model server."""
+
+    client: ModelServerClient = field(default=None)  # type: ignore[assignment]
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.client.ready()
+
+    def load(self) -> None:
+        self.client.wait_until_ready()
+
+    def embed(self, texts: Iterable[str]) -> np.ndarray:
+        with span("embed"):
+            return self.client.embed(list(texts))
+
+
+@dataclass(slots=True)
+class RemoteLLM(LanguageModel):
+    """Generation delegated to the model server."""
+
+    client: ModelServerClient = field(default=None)  # type: ignore[assignment]
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.client.ready()
+
+    def load(self) -> None:
+        self.client.wait_until_ready()
+
+    def generate(self, prompt: str, max_new_tokens: Optional[int] = None) -> str:
+        with span("generate"):
+            payload = self.client.generate(prompt, max_new_tokens)
+        # Token counts and rates measured on the server end up in this request's stats.
+        for name, value in payload.get("stats", {}).items():
+            record_value(name, value)
+        return payload["text"]
+
+    def stream(self, prompt: str, max_new_tokens: Optional[int] = None) -> Iterator[str]:
+        with span("generate"):
+            yield from self.client.stream(prompt, max_new_tokens)
+
+
+def remote_models(
+    config: ModelServerConfig, embedding: EmbeddingConfig, llm: LLMConfig
+) -> tuple[RemoteEmbeddingModel, RemoteLLM]:
+    client = ModelServerClient(config)
+    return RemoteEmbeddingModel(embedding, client=client), RemoteLLM(llm, client=client)
@@ -1,16 +1,71 @@
 """FastAPI server exposing ingestion and query endpoints."""
 from __future__ import annotations
 
+import asyncio
+from contextlib import asynccontextmanager, suppress
+import hmac
+import logging
 from pathlib import Path
+from typing import AsyncIterator, Optional
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
 
+from rag.bundle import BundleError
+from rag.cancellation import CancellationToken, DeadlineExceeded, cancellation_scope
 from rag.config import ChatbotConfig
+from rag.metrics import REGISTRY, REQUESTS, request_metrics
 from rag.service import ChatbotService
+from rag.sessions import SessionNotFound
 
-app = FastAPI(title="Admissions Chatbot API", version="1.0.0")
-service = ChatbotService(ChatbotConfig())
+DISCONNECT_POLL_SECONDS = 0.1
+
+logger = logging.getLogger(__name__)
+
+# Built in the lifespan hook rather than at import time so that importing this
+# module (uvicorn workers, tests, tooling) stays cheap.
+service: Optional[ChatbotService] = None
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    global service
+    if service is None:
+        service = ChatbotService(ChatbotConfig())
+    warmup: Optional[asyncio.Task] = None
+    if service.config.warmup.enabled:
+        # Run in a worker thread so /healthz answers while models load;
+        # /readyz reports 503 until it finishes.
+        warmup = asyncio.create_task(asyncio.to_thread(service.warm_up))
+        warmup.add_done_callback(_report_warmup)
+    try:
+        yield
+    finally:
+        if warmup is not None and not warmup.done():
+            # Shutdown does not wait for a model load; the thread ends with the process.
+            warmup.cancel()
+            with suppress(asyncio.CancelledError):
+                await warmup
+
+
+def _report_warmup(task: asyncio.Task) -> None:
+    if task.cancelled():
+        return
+    if task.exception() is not None:
+        logger.error("Warm-up failed", exc_info=task.exception())
+    elif task.result().error:
+        logger.error("Warm-up failed: %s", task.result().error)
+
+
+app = FastAPI(title="Admissions Chatbot API", version="1.0.0", lifespan=lifespan)
+
+
+def get_service() -> ChatbotService:
+    if service is None:
+        raise HTTPException(status_code=503, detail="Service is starting up")
+    return service
 
 
 class IngestRequest(BaseModel):
@@ -20,6 +75,7 @@ class IngestRequest(BaseModel):
 class QueryRequest(BaseModel):
     question: str
     k: int = 6
+    diversity: Optional[float] = Field(default=None, ge=0.0, le=1.0)
 
 
 class QueryResponse(BaseModel):
@@ -34,48 +90,203 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     messages: list[ChatMessage]
     k: int = 6
+    diversity: Optional[float] = Field(default=None, ge=0.0, le=1.0)
+    session_id: Optional[str] = None
+    deadline_ms: Optional[float] = None
 
 
 class ChatResponse(BaseModel):
     answer: str
     context: str
+    timings: Optional[dict[str, float]] = None
+    stats: Optional[dict[str, float]] = None
+    session_id: Optional[str] = None
+    partial: bool = False
+
+
+class SessionResponse(BaseModel):
+    session_id: str
+
+
+class ProfileRequest(BaseModel):
+    requests: int = 10
+    sample_rate: float = 1.0
+    engine: str = "cprofile"
+
+
+@app.get("/healthz")
+def healthz() -> dict:
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz(response: Response) -> dict:
+    if service is None:
+        response.status_code = 503
+        return {"ready": False}
+    status = service.readiness()
+    if not status["ready"]:
+        response.status_code = 503
+    return status
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.post("/ingest")
 def ingest(request: IngestRequest) -> dict:
+    service = get_service()
     pdf_path = Path(request.pdf_path)
     if not pdf_path.exists():
         raise HTTPException(status_code=404, detail="PDF file not found")
-    service.ingest_pdf(pdf_path)
-    return {"status": "ok"}
+    try:
+        with service.profiler.capture("ingest"):
+            report = service.ingest_pdf(pdf_path)
+    except BundleError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    return {"status": "ok", "report": report.to_dict()}
 
 
 @app.post("/query", response_model=QueryResponse)
 def query(request: QueryRequest) -> QueryResponse:
+    service = get_service()
     try:
         service.load()
     except FileNotFoundError as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
+    except BundleError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
 
-    results = service.search(request.question, k=request.k)
+    with service.profiler.capture("query"):
+        results = service.search(request.question, k=request.k, diversity=request.diversity)
     if not results:
         raise HTTPException(status_code=404, detail="No relevant context found")
     context = service.format_context(results)
     return QueryResponse(answer_context=context)
 
 
+@app.post("/sessions", response_model=SessionResponse)
+def create_session() -> SessionResponse:
+    service = get_service()
+    if service.sessions is None:
+        raise HTTPException(status_code=400, detail="Sessions are disabled")
+    return SessionResponse(session_id=service.sessions.create().session_id)
+
+
+@app.delete("/sessions/{session_id}")
+def delete_session(session_id: str) -> dict:
+    get_service().end_session(session_id)
+    return {"status": "ok"}
+
+
+def _require_admin(token: Optional[str]) -> ChatbotService:
+    service = get_service()
+    expected = service.config.profiling.admin_token
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if token is None or not hmac.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    return service
+
+
+@app.post("/admin/profile")
+def arm_profiler(request: ProfileRequest, x_admin_token: Optional[str] = Header(default=None)) -> dict:
+    """Profile a ``sample_rate`` share of the next ``requests`` requests."""
+    profiler = _require_admin(x_admin_token).profiler
+    try:
+        profiler.arm(request.requests, request.sample_rate, request.engine)
+    except (ValueError, RuntimeError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return profiler.status()
+
+
+@app.get("/admin/profile")
+def read_profile(format: str = "json", x_admin_token: Optional[str] = Header(default=None)):
+    """Captured profiles; ``?format=folded`` returns collapsed stacks for flame graph tools."""
+    profiler = _require_admin(x_admin_token).profiler
+    if format == "folded":
+        return PlainTextResponse(profiler.folded())
+    return {**profiler.status(), "folded": profiler.folded()}
+
+
+@app.delete("/admin/profile")
+def disarm_profiler(x_admin_token: Optional[str] = Header(default=None)) -> dict:
+    profiler = _require_admin(x_admin_token).profiler
+    profiler.disarm()
+    return profiler.status()
+
+
 @app.post("/chat", response_model=ChatResponse)
-def chat(request: ChatRequest) -> ChatResponse:
+async def chat(request: ChatRequest, http_request: Request) -> ChatResponse:
+    """Answer in a worker thread while watching for the client to disconnect.
+
+    ``deadline_ms`` bounds the whole request. Generation that is cut off by
+    the deadline returns the partial answer (``partial: true``). A request
+    with no answer by then gets a 504.
+    """
+    deadline = request.deadline_ms / 1000 if request.deadline_ms is not None else None
+    token = CancellationToken.after(deadline)
+    watcher = asyncio.create_task(_watch_disconnect(http_request, token))
+    try:
+        return await run_in_threadpool(_chat, request, token)
+    finally:
+        watcher.cancel()
+
+
+async def _watch_disconnect(http_request: Request, token: CancellationToken) -> None:
+    while not token.cancelled:
+        if await http_request.is_disconnected():
+            token.cancel("disconnect")
+            return
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+
+def _chat(request: ChatRequest, token: CancellationToken) -> ChatResponse:
+    service = get_service()
     try:
         service.load()
     except FileNotFoundError as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
+    except BundleError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
 
+    messages = [msg.model_dump() for msg in request.messages]
+    session_id = request.session_id
     try:
-        answer, context = service.chat([msg.model_dump() for msg in request.messages], k=request.k)
+        with request_metrics() as metrics, cancellation_scope(token), service.profiler.capture("chat"):
+            if session_id is None:
+                answer, context = service.chat(messages, k=request.k, diversity=request.diversity)
+            else:
+                if service.sessions is None:
+                    raise HTTPException(status_code=400, detail="Sessions are disabled")
+                answer, context, session_id = service.chat_session(
+                    messages, session_id, k=request.k, diversity=request.diversity
+                )
+    except SessionNotFound as exc:
+        REQUESTS.inc("chat", "404")
+        raise HTTPException(status_code=404, detail="Session not found or expired") from exc
+    except KeyError:
+        # A bug, not a missing session or context; let it surface as a 500.
+        REQUESTS.inc("chat", "500")
+        raise
     except ValueError as exc:
+        REQUESTS.inc("chat", "400")
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except LookupError as exc:
+        REQUESTS.inc("chat", "404")
         raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except DeadlineExceeded as exc:
+        REQUESTS.inc("chat", "504")
+        raise HTTPException(status_code=504, detail=str(exc)) from exc
 
-    return ChatResponse(answer=answer, context=context)
+    REQUESTS.inc("chat", "200")
+    return ChatResponse(
+        answer=answer,
+        context=context,
+        timings={name: round(value, 4) for name, value in metrics.timings.items()},
+        stats=metrics.stats,
+        session_id=session_id,
+        partial=metrics.partial,
+    )
@@ -1,15 +1,47 @@
 """High level chatbot service."""
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+import hashlib
 from pathlib import Path
-from typing import Iterable, List
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, List, Optional
 
+from .batching import EmbeddingBatcher
+from .bundle import TABLES_NAME, BundleError, BundleManifest, open_bundle
+from .cancellation import DeadlineExceeded, check_deadline, current_token
+from .compression import ContextCompressor
 from .config import ChatbotConfig, DocumentMetadata, SearchResult
+from .diversity import mmr
 from .embedding import EmbeddingModel
-from .pipeline import IngestionPipeline
+from .pipeline import IngestReport, IngestionPipeline
+from .profiling import Profiler
+from .sharding import ShardedVectorStore
 from .vector_store import FaissVectorStore
-from .llm import LocalCausalLM, format_chat_prompt
+from .llm import LanguageModel, create_llm, format_chat_prompt, format_history_prompt, render_message
+from .metrics import TABLE_LOOKUPS, mark_partial, record_value, span
+from .sessions import Session, SessionStore, compact, condense_question, create_session_store, is_follow_up
+from .single_flight import SingleFlight, normalize_question
+from .table_store import TableStore
+from .threads import configure as configure_threads
+
+
+@dataclass(slots=True)
+class WarmupReport:
+    """Progress and timings of the startup warm-up."""
+
+    timings: Dict[str, float] = field(default_factory=dict)
+    done: bool = False
+    error: Optional[str] = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(perf_counter() - start, 4)
 
 
 @dataclass(slots=True)
@@ -19,29 +51,179 @@ class ChatbotService:
     config: ChatbotConfig
     pipeline: IngestionPipeline = field(init=False)
     embedding_model: EmbeddingModel = field(init=False)
-    vector_store: FaissVectorStore = field(init=False)
-    llm: LocalCausalLM = field(init=False)
+    vector_store: FaissVectorStore | ShardedVectorStore = field(init=False)
+    table_store: Optional[TableStore] = field(init=False, default=None)
+    llm: LanguageModel = field(init=False)
+    warmup_report: Optional[WarmupReport] = field(init=False, default=None)
+    sessions: Optional[SessionStore] = field(init=False, default=None)
+    retrieval_flights: Optional[SingleFlight] = field(init=False, default=None)
+    generation_flights: Optional[SingleFlight] = field(init=False, default=None)
+    embedding_batcher: Optional[EmbeddingBatcher] = field(init=False, default=None)
+    profiler: Profiler = field(init=False)
+    bundle_manifest: Optional[BundleManifest] = field(init=False, default=None)
+    compressor: Optional[ContextCompressor] = field(init=False, default=None)
 
     def __post_init__(self) -> None:
+        configure_threads(self.config.threads, self.config.llm.n_threads)
+        self.profiler = Profiler(self.config.profiling)
         pipeline_config = self.config.pipeline
         self.pipeline = IngestionPipeline(pipeline_config)
+        if self.config.model_server.url:
+            from .remote import remote_models
+
+            # Weights stay in the shared model server; this worker only holds clients.
+            self.pipeline.embedding_model, self.llm = remote_models(
+                self.config.model_server, pipeline_config.embedding, self.config.llm
+            )
+        else:
+            self.llm = create_llm(self.config.llm)
         self.embedding_model = self.pipeline.embedding_model
         self.vector_store = self.pipeline.vector_store
-        self.llm = LocalCausalLM(self.config.llm)
+        self.table_store = self.pipeline.table_store
+        if self.config.sessions.enabled:
+            self.sessions = create_session_store(self.config.sessions)
+        if pipeline_config.embedding.micro_batching:
+            self.embedding_batcher = EmbeddingBatcher.from_config(pipeline_config.embedding)
+        if self.config.compression.enabled:
+            self.compressor = ContextCompressor(self.config.compression, self._embed)
+        coalescing = self.config.coalescing
+        if coalescing.enabled and coalescing.retrieval:
+            self.retrieval_flights = SingleFlight("retrieval")
+        if coalescing.enabled and coalescing.generation:
+            self.generation_flights = SingleFlight("generation")
 
     def ingest_pdf(
         self, pdf_path: str | Path, metadata: DocumentMetadata | None = None
-    ) -> None:
+    ) -> IngestReport:
+        if self.config.pipeline.vector_store.bundle is not None:
+            raise BundleError("This node serves an index bundle; ingest on the export node and install a new bundle")
         pdf_path = Path(pdf_path)
         metadata = metadata or DocumentMetadata(source=pdf_path.stem)
-        self.pipeline.ingest(pdf_path=pdf_path, metadata=metadata)
+        report = self.pipeline.ingest(pdf_path=pdf_path, metadata=metadata)
+        if self.warmup_report is not None and self.warmup_report.error:
+            # A server that started before the first ingestion becomes ready now.
+            self.warm_up()
+        return report
 
     def load(self) -> None:
-        self.vector_store.load()
+        with span("index_load"):
+            bundle = self.config.pipeline.vector_store.bundle
+            if bundle is None:
+                self.vector_store.load()
+                return
+            # A bundle is immutable once installed: open it once and keep the memory map.
+            if self.bundle_manifest is None:
+                self._open_bundle(bundle)
+            if not self.vector_store.is_loaded:
+                self.vector_store.load()
+
+    def _open_bundle(self, path: Path) -> None:
+        """Serve from read-only stores over the active bundle, refusing a foreign embedding model.
+
+        The pipeline keeps its own stores at the configured paths, so nothing
+        is ever written into the bundle directory.
+        """
+        if self.config.pipeline.sharding.enabled:
+            raise BundleError("Index bundles hold a single FAISS index; disable sharding to serve one")
+        manifest, store_config = open_bundle(path, self.config.pipeline.embedding, self.config.pipeline.vector_store)
+        self.vector_store = FaissVectorStore(store_config)
+        tables = self.config.pipeline.tables
+        if tables.enabled and manifest.file(TABLES_NAME) is not None:
+            self.table_store = TableStore(replace(tables, path=store_config.index_path.parent / TABLES_NAME))
+        else:
+            self.table_store = None
+        self.bundle_manifest = manifest
 
-    def search(self, query: str, k: int = 6) -> List[SearchResult]:
-        vector = self.embedding_model.embed([query])
-        return self.vector_store.search(vector, k=k)
+    def warm_up(self) -> WarmupReport:
+        """Load the index and models and run a dummy embed, search, and generate.
+
+        The report is published before the first stage starts so that readiness
+        probes can observe progress while the warm-up runs in the background.
+        """
+        warmup = self.config.warmup
+        report = WarmupReport()
+        self.warmup_report = report
+        try:
+            with report.stage("index_load"):
+                self.load()
+            with report.stage("embedder_load"):
+                self.embedding_model.load()
+            with report.stage("embed"):
+                vector = self.embedding_model.embed([warmup.query])
+            with report.stage("search"):
+                self.vector_store.search(vector, k=1)
+            if warmup.load_llm:
+                with report.stage("llm_load"):
+                    self.llm.load()
+                with report.stage("generate"):
+                    self.llm.generate(warmup.query, max_new_tokens=warmup.max_new_tokens)
+        except Exception as exc:  # surfaced through readiness() instead of crashing the server
+            report.error = f"{type(exc).__name__}: {exc}"
+        report.done = True
+        return report
+
+    def readiness(self) -> dict:
+        """Describe whether the models and index are resident and the warm-up finished."""
+        report = self.warmup_report
+        warmup_enabled = self.config.warmup.enabled
+        models = {
+            "embedder": self.embedding_model.is_loaded,
+            "llm": self.llm.is_loaded,
+            "index": self.vector_store.is_loaded,
+        }
+        if warmup_enabled:
+            ready = report is not None and report.done and report.error is None
+        else:
+            ready = True
+        return {
+            "ready": ready,
+            "models": models,
+            "index_version": self.vector_store.version,
+            "bundle": self.bundle_manifest.version if self.bundle_manifest else None,
+            "warmup": {
+                "enabled": warmup_enabled,
+                "done": report.done if report else False,
+                "error": report.error if report else None,
+                "timings": dict(report.timings) if report else {},
+            },
+        }
+
+    def search(self, query: str, k: int = 6, diversity: Optional[float] = None) -> List[SearchResult]:
+        """Top-``k`` chunks for ``query``, MMR-diversified when ``diversity`` (or the config default) is above 0."""
+        check_deadline("retrieval")
+        if diversity is None:
+            diversity = self.config.retrieval.diversity
+        if not 0.0 <= diversity <= 1.0:
+            raise ValueError("diversity must be between 0 and 1")
+        if self.retrieval_flights is None:
+            return self._search(query, k, diversity)
+        key = (self.vector_store.version, normalize_question(query), k, diversity)
+        results, _ = self.retrieval_flights.do(key, lambda: self._search(query, k, diversity))
+        return results
+
+    def _search(self, query: str, k: int, diversity: float = 0.0) -> List[SearchResult]:
+        with span("search"):
+            vector = self._embed([query])
+            if diversity <= 0:
+                return self.vector_store.search(vector, k=k)
+            config = self.config.retrieval
+            fetch = max(k, min(k * config.candidates_per_result, config.max_candidates))
+            candidates, vectors = self.vector_store.search_with_vectors(vector, k=fetch)
+            with span("mmr"):
+                order = mmr(vector[0], vectors, k, diversity)
+            return [candidates[position] for position in order]
+
+    def _embed(self, texts: List[str]):
+        if self.embedding_batcher is not None:
+            return self.embedding_batcher.embed(self.embedding_model, texts)
+        return self.embedding_model.embed(texts)
+
+    def compress(self, question: str, results: List[SearchResult]) -> List[SearchResult]:
+        """Trim retrieved chunks to the sentences and rows relevant to ``question`` when enabled."""
+        if self.compressor is None:
+            return results
+        check_deadline("compression")
+        return self.compressor.compress(question, results)
 
     def format_context(self, results: Iterable[SearchResult]) -> str:
         sections: List[str] = []
@@ -55,21 +237,153 @@ class ChatbotService:
             sections.append(f"[{citation}]\n{result.chunk.text}\n")
         return "\n".join(sections)
 
-    def chat(self, messages: List[dict], k: int = 6) -> tuple[str, str]:
-        question = ""
-        for message in reversed(messages):
-            if message.get("role") == "user":
-                question = message.get("content", "")
-                break
+    def chat(self, messages: List[dict], k: int = 6, diversity: Optional[float] = None) -> tuple[str, str]:
+        with span("chat"):
+            return self._chat(messages, k, diversity)
 
-        if not question:
-            raise ValueError("No user question provided")
+    def _chat(self, messages: List[dict], k: int, diversity: Optional[float] = None) -> tuple[str, str]:
+        question = _last_user_question(messages)
+        direct = self._answer_from_tables(question)
+        if direct is not None:
+            return direct
 
-        results = self.search(question, k=k)
+        results = self.search(question, k=k, diversity=diversity)
         if not results:
             raise LookupError("No relevant context found")
 
-        context = self.format_context(results)
+        context = self.format_context(self.compress(question, results))
         prompt = format_chat_prompt(messages, context, question)
-        answer = self.llm.generate(prompt)
+        history = "\n".join(line for line in map(render_message, messages[:-1]) if line is not None)
+        return self._generate(prompt, self._flight_key(question, context, history)), context
+
+    def chat_session(
+        self,
+        messages: List[dict],
+        session_id: Optional[str] = None,
+        k: int = 6,
+        diversity: Optional[float] = None,
+    ) -> tuple[str, str, str]:
+        """Answer within a server-side session; returns ``(answer, context, session_id)``.
+
+        Without ``session_id`` a new session is started and seeded with the
+        posted history. With one, only the new messages need to be posted.
+        Raises ``SessionNotFound`` when the session is unknown or has expired.
+        """
+        if self.sessions is None:
+            raise RuntimeError("Sessions are disabled")
+        with span("chat"):
+            if session_id is None:
+                session = self.sessions.create()
+            else:
+                session = self.sessions.require(session_id)
+            question = _last_user_question(messages)
+            position = max(i for i, message in enumerate(messages) if message.get("role") == "user")
+            for message in messages[:position]:
+                session.add(message)
+            if position:
+                compact(session, self.config.sessions, self._summarizer())
+            answer, context = self._chat_in_session(session, question, k, diversity)
+            return answer, context, session.session_id
+
+    def _chat_in_session(
+        self, session: Session, question: str, k: int, diversity: Optional[float] = None
+    ) -> tuple[str, str]:
+        config = self.config.sessions
+        query = question
+        condensed = config.condense_queries and bool(session.topic) and is_follow_up(question)
+        if condensed:
+            query = self._condense(session, question) if config.condense_with_llm else condense_question(question, session)
+            record_value("condensed_query_chars", len(query))
+
+        direct = self._answer_from_tables(query)
+        if direct is not None:
+            answer, context = direct
+        else:
+            results = self.search(query, k=k, diversity=diversity)
+            if not results:
+                raise LookupError("No relevant context found")
+
+            context = self.format_context(self.compress(query, results))
+            prompt = format_history_prompt(session.history, context, question)
+            answer = self._generate(prompt, self._flight_key(question, context, session.history))
+
+        session.add({"role": "user", "content": question})
+        session.add({"role": "assistant", "content": answer})
+        if not condensed:
+            session.topic = question
+        with span("session_compact"):
+            compact(session, config, self._summarizer())
+        self.sessions.save(session)
         return answer, context
+
+    def _flight_key(self, question: str, context: str, history: str) -> tuple:
+        digest = hashlib.sha256(f"{context}\x1f{history}".encode("utf-8")).hexdigest()[:16]
+        return (self.vector_store.version, normalize_question(question), digest)
+
+    def _generate(self, prompt: str, key: tuple) -> str:
+        """Generate under the request's deadline; a cut-off answer is returned as partial.
+
+        Concurrent requests with the same ``key`` share one generation.
+        """
+        check_deadline("generation")
+        if self.generation_flights is None:
+            answer, token = self.llm.generate(prompt), current_token()
+        else:
+            answer, token = self.generation_flights.do(key, lambda: self.llm.generate(prompt))
+        if token is not None and token.cancelled:
+            if not answer.strip():
+                raise DeadlineExceeded(f"Request {token.reason} during generation")
+            mark_partial()
+        return answer
+
+    def _answer_from_tables(self, question: str) -> Optional[tuple[str, str]]:
+        """Answer a single-cell lookup straight from the table store, skipping generation."""
+        table_store = self.table_store
+        tables = self.config.pipeline.tables
+        if table_store is None or not tables.fast_path:
+            return None
+        with span("table_lookup"):
+            hit = table_store.lookup(question)
+        if hit is None or hit.confidence < tables.min_confidence:
+            TABLE_LOOKUPS.inc("miss")
+            return None
+        TABLE_LOOKUPS.inc("hit")
+        record_value("table_fast_path", 1)
+        return hit.answer, hit.context
+
+    def _summarizer(self):
+        return self._summarize if self.config.sessions.summarize_with_llm else None
+
+    def _condense(self, session: Session, question: str) -> str:
+        prompt = (
+            "Viết lại câu hỏi cuối thành một câu hỏi độc lập, đầy đủ chủ thể, dựa trên hội thoại. "
+            "Chỉ trả về câu hỏi.\n\n"
+            f"HỘI THOẠI:\n{session.history}\n\nCÂU HỎI CUỐI: {question}\n\nCÂU HỎI ĐỘC LẬP:"
+        )
+        with span("condense"):
+            rewritten = self.llm.generate(prompt, max_new_tokens=64).strip().splitlines()
+        return rewritten[0].strip() if rewritten and rewritten[0].strip() else condense_question(question, session)
+
+    def _summarize(self, summary: str, messages: List[dict]) -> str:
+        transcript = "\n".join(f"{m.get('role', 'user').upper()}: {m.get('content', '')}" for m in messages)
+        prompt = (
+            "Tóm tắt ngắn gọn các ý chính (ngành, năm, điểm, học phí đã hỏi và đã trả lời) của hội thoại sau "
+            "thành vài gạch đầu dòng.\n\n"
+            f"{summary}\n{transcript}\n\nTÓM TẮT:"
+        )
+        with span("summarize"):
+            return self.llm.generate(prompt, max_new_tokens=128).strip()
+
+    def end_session(self, session_id: str) -> None:
+        if self.sessions is not None:
+            self.sessions.delete(session_id)
+
+
+def _last_user_question(messages: List[dict]) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            question = message.get("content", "")
+            if question:
+                return question
+            break
+    raise ValueError("No user question provided")
@@ -0,0 +1,273 @@
+"""Server-side chat sessions: bounded history, TTL eviction, and query condensation.
+
+With a session the frontend only posts the newest message. The session
+keeps the rendered HISTORY block of the prompt and extends it one turn at a
+time instead of re-serialising the whole conversation. Once the history
+outgrows its budget, the oldest turns are folded into a short summary.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import json
+from pathlib import Path
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Optional
+import uuid
+
+from .config import SessionConfig
+from .llm import render_message
+
+SESSION_BACKENDS = ("memory", "sqlite")
+SUMMARY_HEADER = "Tóm tắt các lượt trước:"
+
+# Vietnamese cues that a question leans on the previous turn ("còn ngành đó thì sao?").
+_FOLLOW_UP = re.compile(
+    r"^(còn|vậy|thế)\b|\b(đó|này|ấy|kia|nó|trên|thì sao|như thế nào|thế nào)\b",
+    re.IGNORECASE,
+)
+
+Summarizer = Callable[[str, List[dict]], str]
+
+
+class SessionNotFound(LookupError):
+    """The session id is unknown or the session has expired."""
+
+
+@dataclass(slots=True)
+class Session:
+    """One conversation: recent messages verbatim plus a summary of older ones."""
+
+    session_id: str
+    messages: List[dict] = field(default_factory=list)
+    summary: str = ""
+    topic: str = ""
+    history: str = ""
+    updated_at: float = field(default_factory=time.time)
+
+    def add(self, message: dict) -> None:
+        message = {"role": message.get("role", "user"), "content": message.get("content", "")}
+        self.messages.append(message)
+        line = render_message(message)
+        if line is not None:
+            self.history = f"{self.history}\n{line}" if self.history else line
+
+    def render(self) -> None:
+        """Rebuild the HISTORY block from scratch (only needed after compaction)."""
+        lines = [f"{SUMMARY_HEADER}\n{self.summary}"] if self.summary else []
+        lines += [line for line in map(render_message, self.messages) if line is not None]
+        self.history = "\n".join(lines)
+
+    def copy(self) -> "Session":
+        return Session(self.session_id, list(self.messages), self.summary, self.topic, self.history, self.updated_at)
+
+    def to_dict(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "messages": self.messages,
+            "summary": self.summary,
+            "topic": self.topic,
+            "updated_at": self.updated_at,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> "Session":
+        session = cls(
+            session_id=payload["session_id"],
+            messages=list(payload.get("messages", [])),
+            summary=payload.get("summary", ""),
+            topic=payload.get("topic", ""),
+            updated_at=payload.get("updated_at", time.time()),
+        )
+        session.render()
+        return session
+
+
+def summarize_turns(summary: str, messages: List[dict], limit: int = 160) -> str:
+    """Extractive summary: one short line per question and answer pair."""
+    lines = [summary] if summary else []
+    question = ""
+    for message in messages:
+        content = " ".join(message.get("content", "").split())
+        if message.get("role") == "user":
+            question = content[:limit]
+        elif message.get("role") == "assistant":
+            answer = re.split(r"(?<=[.!?])\s", content, maxsplit=1)[0][:limit]
+            lines.append(f"- Hỏi: {question} → Đáp: {answer}" if question else f"- Đáp: {answer}")
+            question = ""
+    if question:
+        lines.append(f"- Hỏi: {question}")
+    return "\n".join(lines)
+
+
+def compact(session: Session, config: SessionConfig, summarizer: Optional[Summarizer] = None) -> bool:
+    """Fold the oldest messages into the summary once the history exceeds its budget."""
+    if len(session.history) <= config.history_budget_chars:
+        return False
+    keep = max(config.keep_recent_messages, 0)
+    if len(session.messages) <= keep:
+        return False
+    cut = len(session.messages) - keep
+    older, session.messages = session.messages[:cut], session.messages[cut:]
+    summarize = summarizer or summarize_turns
+    session.summary = summarize(session.summary, older)
+    # Keep the summary itself within half the budget by dropping its oldest lines.
+    lines = session.summary.splitlines()
+    while len(lines) > 1 and len("\n".join(lines)) > config.history_budget_chars // 2:
+        lines.pop(0)
+    session.summary = "\n".join(lines)
+    session.render()
+    return True
+
+
+def is_follow_up(question: str) -> bool:
+    return bool(_FOLLOW_UP.search(question.strip())) or len(question.split()) <= 3
+
+
+def condense_question(question: str, session: Session) -> str:
+    """Make a follow-up question standalone by prefixing the conversation topic.
+
+    The topic is the last question that did not look like a follow-up, so a
+    chain of follow-ups keeps retrieving against the same subject.
+    """
+    if session.topic and is_follow_up(question):
+        return f"{session.topic} {question}"
+    return question
+
+
+@dataclass(slots=True)
+class SessionStore:
+    """Interface shared by the in-memory and SQLite session stores."""
+
+    config: SessionConfig
+
+    def create(self) -> Session:
+        session = Session(session_id=uuid.uuid4().hex)
+        self.save(session)
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:  # pragma: no cover - interface
+        raise NotImplementedError
+
+    def require(self, session_id: str) -> Session:
+        """Like ``get``, but raises ``SessionNotFound`` instead of returning ``None``."""
+        session = self.get(session_id)
+        if session is None:
+            raise SessionNotFound(f"Session {session_id!r} not found or expired")
+        return session
+
+    def save(self, session: Session) -> None:  # pragma: no cover - interface
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> None:  # pragma: no cover - interface
+        raise NotImplementedError
+
+    def __len__(self) -> int:  # pragma: no cover - interface
+        raise NotImplementedError
+
+    def _expired(self, session: Session, now: float) -> bool:
+        return now - session.updated_at > self.config.ttl_seconds
+
+
+@dataclass(slots=True)
+class InMemorySessionStore(SessionStore):
+    """LRU of sessions in this process; idle sessions expire after the TTL.
+
+    Like the SQLite store, ``get`` and ``save`` hand out and keep copies, so
+    two concurrent turns never mutate the same ``Session``. The later save wins.
+    """
+
+    _sessions: "OrderedDict[str, Session]" = field(init=False, default_factory=OrderedDict, repr=False)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock, repr=False)
+
+    def get(self, session_id: str) -> Optional[Session]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if self._expired(session, time.time()):
+                del self._sessions[session_id]
+                return None
+            return session.copy()
+
+    def save(self, session: Session) -> None:
+        now = time.time()
+        session.updated_at = now
+        with self._lock:
+            self._sessions[session.session_id] = session.copy()
+            self._sessions.move_to_end(session.session_id)
+            # Least recently used first: expired sessions and overflow sit at the front.
+            while self._sessions:
+                oldest = next(iter(self._sessions.values()))
+                if len(self._sessions) <= self.config.max_sessions and not self._expired(oldest, now):
+                    break
+                self._sessions.popitem(last=False)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+@dataclass(slots=True)
+class SQLiteSessionStore(SessionStore):
+    """Sessions in a SQLite file so that every uvicorn worker sees the same history."""
+
+    _connection: sqlite3.Connection = field(init=False, repr=False)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self) -> None:
+        Path(self.config.path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(self.config.path), check_same_thread=False, timeout=30)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, payload TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated_at)")
+
+    def get(self, session_id: str) -> Optional[Session]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT payload FROM sessions WHERE session_id = ? AND updated_at >= ?",
+                (session_id, time.time() - self.config.ttl_seconds),
+            ).fetchone()
+        return Session.from_dict(json.loads(row[0])) if row else None
+
+    def save(self, session: Session) -> None:
+        now = time.time()
+        session.updated_at = now
+        payload = json.dumps(session.to_dict(), ensure_ascii=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, payload, updated_at) VALUES (?, ?, ?)",
+                (session.session_id, payload, now),
+            )
+            self._connection.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.config.ttl_seconds,))
+            self._connection.execute(
+                "DELETE FROM sessions WHERE session_id IN "
+                "(SELECT session_id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (self.config.max_sessions,),
+            )
+
+    def delete(self, session_id: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def create_session_store(config: SessionConfig) -> SessionStore:
+    if config.backend == "memory":
+        return InMemorySessionStore(config)
+    if config.backend == "sqlite":
+        return SQLiteSessionStore(config)
+    raise ValueError(f"Unknown session backend {config.backend!r}; expected one of {SESSION_BACKENDS}")
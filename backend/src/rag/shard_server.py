@@ -0,0 +1,80 @@
+"""Serve one vector-index shard over HTTP for ``ShardedVectorStore``.
+
+A shard directory is what ``ShardedVectorStore.build`` writes under
+``ShardingConfig.directory`` (``index.faiss`` plus ``meta.json``). Start one
+server per shard with ``run-shard-server`` and list their URLs in
+``ShardingConfig.remote_shards``.
+"""
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+import numpy as np
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from rag.config import ThreadBudgetConfig, VectorStoreConfig
+from rag.metrics import REQUESTS
+from rag.threads import configure as configure_threads
+from rag.vector_store import FaissVectorStore
+
+# Configured by the CLI before uvicorn starts; tests may install a loaded store.
+shard_directory: Optional[Path] = None
+search_params: str = ""
+storage: str = "float32"
+rescore_candidates: int = 0
+store: Optional[FaissVectorStore] = None
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    global store
+    configure_threads(ThreadBudgetConfig())
+    if store is None and shard_directory is not None:
+        store = FaissVectorStore(
+            VectorStoreConfig(
+                index_path=shard_directory / "index.faiss",
+                metadata_path=shard_directory / "meta.json",
+                search_params=search_params,
+                storage=storage,
+                rescore_candidates=rescore_candidates,
+            )
+        )
+        store.load()
+    yield
+
+
+app = FastAPI(title="Admissions Chatbot Index Shard", version="1.0.0", lifespan=lifespan)
+
+
+class ShardSearchRequest(BaseModel):
+    vector: list[float]
+    k: int = 6
+    with_vectors: bool = False
+
+
+@app.get("/healthz")
+def healthz() -> dict:
+    return {"status": "ok", "loaded": store is not None and store.is_loaded}
+
+
+@app.post("/search")
+def search(request: ShardSearchRequest) -> dict:
+    if store is None or not store.is_loaded:
+        raise HTTPException(status_code=503, detail="Shard is not loaded")
+    query = np.asarray(request.vector, dtype="float32")
+    if request.with_vectors:
+        results, vectors = store.search_with_vectors(query, k=request.k)
+    else:
+        results, vectors = store.search(query, k=request.k), None
+    REQUESTS.inc("shard_search", "200")
+    payload = {
+        "version": store.version,
+        "results": [dict(result.chunk.to_dict(), score=result.score) for result in results],
+    }
+    if vectors is not None:
+        # Stored vectors let the caller re-rank (MMR) without re-embedding the chunks.
+        payload["vectors"] = vectors.tolist()
+    return payload
@@ -0,0 +1,230 @@
+"""Sharded vector search across local FAISS shards or remote shard servers."""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, replace
+import hashlib
+import heapq
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .cancellation import check_deadline, remaining_timeout
+from .config import Chunk, DocumentMetadata, SearchResult, ShardingConfig, VectorStoreConfig
+from .metrics import SHARD_FAILURES, record_value, span
+from .vector_store import FaissVectorStore, chunk_from_payload
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "shards.json"
+PARTITIONS = ("hash", "source", "year")
+
+
+def shard_name(metadata: DocumentMetadata, text: str, partition_by: str, num_shards: int) -> str:
+    """Name of the shard a chunk belongs to."""
+    if partition_by == "hash":
+        key = f"{metadata.source}|{metadata.page}|{text}".encode("utf-8")
+        bucket = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") % max(num_shards, 1)
+        return f"shard-{bucket:03d}"
+    if partition_by in ("source", "year"):
+        value = re.sub(r"[^\w.-]+", "_", str(getattr(metadata, partition_by) or "unknown"))
+        return f"{partition_by}-{value}"
+    raise ValueError(f"Unknown shard partition {partition_by!r}; expected one of {PARTITIONS}")
+
+
+@dataclass(slots=True)
+class LocalShard:
+    name: str
+    store: FaissVectorStore
+
+    def search(self, query: np.ndarray, k: int) -> List[SearchResult]:
+        return self.store.search(query.copy(), k=k)
+
+    def search_with_vectors(self, query: np.ndarray, k: int) -> Tuple[List[SearchResult], np.ndarray]:
+        return self.store.search_with_vectors(query.copy(), k=k)
+
+
+@dataclass(slots=True)
+class RemoteShard:
+    """A shard served by ``rag.shard_server`` on another process or node."""
+
+    url: str
+    http: Any
+    timeout: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        return self.url
+
+    def search(self, query: np.ndarray, k: int) -> List[SearchResult]:
+        return self._post(query, k, with_vectors=False)[0]
+
+    def search_with_vectors(self, query: np.ndarray, k: int) -> Tuple[List[SearchResult], np.ndarray]:
+        results, vectors = self._post(query, k, with_vectors=True)
+        return results, np.asarray(vectors, dtype="float32").reshape(len(results), -1)
+
+    def _post(self, query: np.ndarray, k: int, with_vectors: bool) -> Tuple[List[SearchResult], list]:
+        response = self.http.post(
+            f"{self.url.rstrip('/')}/search",
+            json={"vector": query[0].tolist(), "k": k, "with_vectors": with_vectors},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        payload = response.json()
+        results = [
+            SearchResult(score=float(item["score"]), chunk=chunk_from_payload(item, item["text"]))
+            for item in payload["results"]
+        ]
+        return results, payload.get("vectors", [])
+
+
+@dataclass(slots=True)
+class ShardedVectorStore:
+    """Drop-in replacement for ``FaissVectorStore`` that fans queries out to shards.
+
+    Every shard is searched in parallel (FAISS releases the GIL), and the
+    per-shard top-k lists are merged into a global top-k. Shards that miss
+    ``ShardingConfig.deadline`` (or the request deadline, if sooner) or raise
+    are skipped and counted in
+    ``rag_shard_failures_total``. The request's ``stats`` gain
+    ``shards_skipped``, so a partial answer is visible.
+    """
+
+    config: ShardingConfig
+    base: VectorStoreConfig = field(default_factory=VectorStoreConfig)
+    _shards: List[LocalShard | RemoteShard] = field(init=False, default_factory=list)
+    _executor: Optional[ThreadPoolExecutor] = field(init=False, default=None, repr=False)
+    _http: Any = field(init=False, default=None, repr=False)
+
+    @property
+    def manifest_path(self):
+        return self.config.directory / MANIFEST_NAME
+
+    @property
+    def is_loaded(self) -> bool:
+        return bool(self._shards)
+
+    @property
+    def version(self) -> str | None:
+        if self.config.remote_shards:
+            return hashlib.sha256("|".join(self.config.remote_shards).encode("utf-8")).hexdigest()[:12]
+        if not self.manifest_path.exists():
+            return None
+        versions = [self.manifest_path.read_text(encoding="utf-8")]
+        versions += [shard.store.version or "" for shard in self._shards if isinstance(shard, LocalShard)]
+        return hashlib.sha256("|".join(versions).encode("utf-8")).hexdigest()[:12]
+
+    def shard_config(self, name: str) -> VectorStoreConfig:
+        directory = self.config.directory / name
+        return replace(self.base, index_path=directory / "index.faiss", metadata_path=directory / "meta.json")
+
+    def _read_manifest(self) -> Dict[str, int]:
+        if not self.manifest_path.exists():
+            return {}
+        payload = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        return {item["name"]: item["chunks"] for item in payload["shards"]}
+
+    def build(self, vectors: np.ndarray, chunks: Sequence[Chunk]) -> None:
+        """Write one FAISS index per shard.
+
+        Hash partitioning rebuilds every shard. Source/year partitioning only
+        replaces the shards for the values present in ``chunks``, so other
+        documents keep their shards untouched.
+        """
+        if vectors.ndim != 2:
+            raise ValueError("Vectors must be a 2D numpy array")
+        partition_by, num_shards = self.config.partition_by, self.config.num_shards
+        rows: Dict[str, List[int]] = {}
+        for position, chunk in enumerate(chunks):
+            rows.setdefault(shard_name(chunk.metadata, chunk.text, partition_by, num_shards), []).append(position)
+
+        manifest = {} if partition_by == "hash" else self._read_manifest()
+        for name, positions in sorted(rows.items()):
+            store = FaissVectorStore(self.shard_config(name))
+            store.build(np.ascontiguousarray(vectors[positions]), [chunks[position] for position in positions])
+            manifest[name] = len(positions)
+
+        self.config.directory.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "partition_by": partition_by,
+            "num_shards": num_shards,
+            "shards": [{"name": name, "chunks": count} for name, count in sorted(manifest.items())],
+        }
+        self.manifest_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        if not self.config.remote_shards:
+            self.load()
+
+    def load(self) -> None:
+        if self.config.remote_shards:
+            if self._http is None:
+                import httpx
+
+                self._http = httpx.Client(limits=httpx.Limits(max_connections=4 * len(self.config.remote_shards)))
+            shards: List[LocalShard | RemoteShard] = [
+                RemoteShard(url, self._http, self.config.deadline) for url in self.config.remote_shards
+            ]
+        else:
+            manifest = self._read_manifest()
+            if not manifest:
+                raise FileNotFoundError("Shard manifest not found. Have you run the ingestion pipeline?")
+            shards = []
+            for name in manifest:
+                store = FaissVectorStore(self.shard_config(name))
+                store.load()
+                shards.append(LocalShard(name, store))
+        if self._executor is None or len(shards) > len(self._shards):
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            workers = self.config.max_workers or max(len(shards), 1)
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shard")
+        self._shards = shards
+
+    def search(self, query_vector: np.ndarray, k: int = 6) -> List[SearchResult]:
+        return [result for result, _ in self._fan_out(query_vector, k, with_vectors=False)]
+
+    def search_with_vectors(self, query_vector: np.ndarray, k: int = 6) -> Tuple[List[SearchResult], np.ndarray]:
+        """Global top-``k`` plus the shards' stored vectors, row-aligned, as ``FaissVectorStore`` returns them."""
+        merged = self._fan_out(query_vector, k, with_vectors=True)
+        if not merged:
+            return [], np.empty((0, 0), dtype="float32")
+        return [result for result, _ in merged], np.vstack([vector for _, vector in merged])
+
+    def _fan_out(self, query_vector: np.ndarray, k: int, with_vectors: bool) -> List[Tuple[SearchResult, Any]]:
+        if not self._shards or self._executor is None:
+            raise RuntimeError("Shards are not loaded")
+        query = np.array(query_vector, dtype="float32").reshape(1, -1)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query /= norm
+        with span("vector_search"):
+            futures = {
+                self._executor.submit(shard.search_with_vectors if with_vectors else shard.search, query, k): shard
+                for shard in self._shards
+            }
+            done, pending = wait(futures, timeout=remaining_timeout(self.config.deadline))
+        results: List[Tuple[SearchResult, Any]] = []
+        skipped = 0
+        for future in done:
+            try:
+                if with_vectors:
+                    shard_results, vectors = future.result()
+                    results.extend(zip(shard_results, vectors))
+                else:
+                    results.extend((result, None) for result in future.result())
+            except Exception as exc:
+                skipped += 1
+                SHARD_FAILURES.inc(futures[future].name, "error")
+                logger.warning("Shard %s failed: %s", futures[future].name, exc)
+        for future in pending:
+            future.cancel()
+            skipped += 1
+            SHARD_FAILURES.inc(futures[future].name, "timeout")
+        if skipped:
+            record_value("shards_skipped", skipped)
+            if skipped == len(futures):
+                check_deadline("any shard answered")
+                raise RuntimeError("No shard answered before the deadline")
+        return heapq.nlargest(k, results, key=lambda pair: pair[0].score)
@@ -0,0 +1,191 @@
+"""Coalesce identical in-flight computations (single-flight).
+
+When many users ask the same question at once, only the first caller for a
+key (the leader) computes the result. Callers that arrive while it runs
+(followers) wait for that result instead of repeating the embed, search, or
+generation. Streams are shared too: every subscriber replays the chunks
+produced so far and then follows the live output.
+
+The shared computation runs under its own ``CancellationToken`` linked to
+every subscriber's token. It stops only when all of them have gone away or
+run out of time. Followers give up at their own deadline. The leader
+computes inline, in its own thread and context, so the common uncontended
+call costs no extra thread; it therefore waits for the shared work even
+when followers keep it running past the leader's deadline.
+"""
+from __future__ import annotations
+
+from contextvars import copy_context
+from dataclasses import dataclass, field
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from .cancellation import CancellationToken, cancellation_scope, current_token
+from .metrics import SINGLE_FLIGHT, record_value
+
+T = TypeVar("T")
+POLL_SECONDS = 0.05
+_END = object()
+
+
+def normalize_question(question: str) -> str:
+    """Case- and whitespace-insensitive form of a question, without trailing punctuation."""
+    return " ".join(question.casefold().split()).rstrip(" ?.!")
+
+
+@dataclass(slots=True)
+class Flight:
+    token: CancellationToken
+    done: threading.Event = field(default_factory=threading.Event)
+    changed: threading.Condition = field(default_factory=threading.Condition)
+    chunks: List[Any] = field(default_factory=list)
+    value: Any = None
+    error: Optional[BaseException] = None
+
+
+@dataclass(slots=True)
+class SingleFlight:
+    """Registry of in-flight computations for one stage (``retrieval``, ``generation``)."""
+
+    stage: str
+    leaders: int = 0
+    followers: int = 0
+    _flights: Dict[Hashable, Flight] = field(init=False, default_factory=dict, repr=False)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock, repr=False)
+
+    @property
+    def coalescing_ratio(self) -> float:
+        """Share of calls that were served by another caller's computation."""
+        calls = self.leaders + self.followers
+        return self.followers / calls if calls else 0.0
+
+    def _join(self, key: Hashable, own: Optional[CancellationToken]) -> Tuple[Flight, bool]:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None or flight.token.cancelled:
+                # Every earlier subscriber left, so the flight is winding down;
+                # a new caller must not inherit its cancellation.
+                flight = Flight(token=CancellationToken())
+                if own is not None:
+                    flight.token.link(own)
+                self._flights[key] = flight
+                self.leaders += 1
+                leader = True
+            else:
+                if own is None:
+                    flight.token.linked.clear()  # someone waits without a deadline
+                elif flight.token.linked:
+                    flight.token.link(own)
+                self.followers += 1
+                leader = False
+        SINGLE_FLIGHT.inc(self.stage, "leader" if leader else "follower")
+        if not leader:
+            record_value(f"{self.stage}_coalesced", 1)
+        return flight, leader
+
+    def _finish(self, key: Hashable, flight: Flight) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        with flight.changed:
+            flight.done.set()
+            flight.changed.notify_all()
+
+    def do(self, key: Hashable, compute: Callable[[], T]) -> Tuple[T, CancellationToken]:
+        """Return ``compute()``'s result and the token it ran under, computing it once per key."""
+        own = current_token()
+        flight, leader = self._join(key, own)
+        if leader:
+            try:
+                with cancellation_scope(flight.token):
+                    flight.value = compute()
+            except BaseException as exc:  # re-raised in every subscriber
+                flight.error = exc
+            finally:
+                self._finish(key, flight)
+        else:
+            while not flight.done.wait(POLL_SECONDS if own is not None else None):
+                own.check(f"the shared {self.stage} finished")
+        if flight.error is not None:
+            raise flight.error
+        return flight.value, flight.token
+
+    def stream(self, key: Hashable, produce: Callable[[], Iterable[T]]) -> Iterator[T]:
+        """Subscribe to the stream for ``key``, starting it if nobody else has.
+
+        The leader drives the producer as it reads. If it stops reading while
+        followers still listen, the rest is produced in a background thread.
+        """
+        own = current_token() or CancellationToken()
+        flight, leader = self._join(key, own)
+        if leader:
+            return self._lead(key, flight, own, iter(produce()))
+        return self._follow(flight, own)
+
+    def _advance(self, flight: Flight, chunks: Iterator[T]) -> object:
+        with cancellation_scope(flight.token):
+            chunk = next(chunks, _END)
+        if chunk is not _END:
+            with flight.changed:
+                flight.chunks.append(chunk)
+                flight.changed.notify_all()
+        return chunk
+
+    def _lead(self, key: Hashable, flight: Flight, own: CancellationToken, chunks: Iterator[T]) -> Iterator[T]:
+        handed_off = False
+        try:
+            while not own.cancelled:
+                chunk = self._advance(flight, chunks)
+                if chunk is _END:
+                    return
+                yield chunk  # type: ignore[misc]
+            handed_off = self._hand_off(key, flight, chunks)
+        except GeneratorExit:
+            own.cancel("disconnect")
+            handed_off = self._hand_off(key, flight, chunks)
+            raise
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            if not handed_off:
+                getattr(chunks, "close", lambda: None)()
+                self._finish(key, flight)
+
+    def _hand_off(self, key: Hashable, flight: Flight, chunks: Iterator[T]) -> bool:
+        """Keep producing for the followers after the leader stopped reading."""
+        if flight.token.cancelled:
+            return False
+
+        def drain() -> None:
+            try:
+                while self._advance(flight, chunks) is not _END:
+                    pass
+            except BaseException as exc:
+                flight.error = exc
+            finally:
+                self._finish(key, flight)
+
+        context = copy_context()
+        threading.Thread(target=context.run, args=(drain,), name=f"single-flight-{self.stage}", daemon=True).start()
+        return True
+
+    @staticmethod
+    def _follow(flight: Flight, own: CancellationToken) -> Iterator[T]:
+        position = 0
+        try:
+            while not own.cancelled:
+                with flight.changed:
+                    while position >= len(flight.chunks) and not flight.done.is_set() and not own.cancelled:
+                        flight.changed.wait(POLL_SECONDS)
+                    finished = flight.done.is_set()
+                    chunks = flight.chunks[position:]
+                position += len(chunks)
+                yield from chunks
+                if finished:
+                    break
+        except GeneratorExit:
+            own.cancel("disconnect")
+            raise
+        if flight.error is not None and not own.cancelled:
+            raise flight.error
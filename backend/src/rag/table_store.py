@@ -0,0 +1,270 @@
+"""Structured store of extracted tables for exact single-cell answers.
+
+Every table the parsers extract is kept as rows of cells under normalised
+headers in SQLite, with each canonical column (``HEADER_SYNONYMS``) stored as
+a real SQL column. ``TableStore.lookup`` resolves questions such as "điểm
+chuẩn ngành Công nghệ thông tin năm 2025" to one cell. It needs exactly one
+attribute column, one row label, and (when the question names a year) a
+table for that year. Only then does it return an answer with a citation.
+Labels are matched in SQL: every word n-gram of the question is looked up
+in the indexed ``label_norm`` and ``code_norm`` columns.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import json
+from pathlib import Path
+import re
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .config import DocumentMetadata, TableStoreConfig
+from .document_parsers import ParsedTable, markdown_rows
+from .text import normalize_text
+
+# Canonical column keys and the (accent-free) header spellings that map to them.
+HEADER_SYNONYMS: Dict[str, Tuple[str, ...]] = {
+    "nganh": ("ten nganh", "nganh dao tao", "nganh hoc", "chuong trinh dao tao", "chuong trinh", "nganh"),
+    "ma_nganh": ("ma nganh", "ma xet tuyen", "ma chuong trinh"),
+    "diem_chuan": ("diem chuan", "diem trung tuyen", "diem san", "nguong dau vao"),
+    "chi_tieu": ("chi tieu", "so luong tuyen"),
+    "hoc_phi": ("hoc phi", "muc thu"),
+    "to_hop": ("to hop xet tuyen", "to hop mon", "to hop"),
+}
+LABEL_COLUMNS = ("nganh", "ma_nganh")
+MAX_LABEL_WORDS = 16  # longest row label (in words) that a question can match
+_YEAR = re.compile(r"(?<!\d)(20\d{2})(?!\d)")
+_FIELDS = "source, page, table_index, year, headers, columns, cells, label, label_norm, code_norm"
+
+
+def normalize_header(header: str) -> str:
+    normalized = normalize_text(header)
+    for key, spellings in HEADER_SYNONYMS.items():
+        if any(normalized == spelling or normalized.startswith(spelling + " ") for spelling in spellings):
+            return key
+    return normalized.replace(" ", "_") or "column"
+
+
+def _contains(haystack: str, needle: str) -> bool:
+    return bool(needle) and f" {needle} " in f" {haystack} "
+
+
+def _phrases(normalized: str) -> List[str]:
+    """Every run of up to ``MAX_LABEL_WORDS`` consecutive words of ``normalized``."""
+    words = normalized.split()
+    return sorted(
+        {
+            " ".join(words[start:end])
+            for start in range(len(words))
+            for end in range(start + 1, min(start + MAX_LABEL_WORDS, len(words)) + 1)
+        }
+    )
+
+
+@dataclass(slots=True)
+class TableRow:
+    source: str
+    page: Optional[int]
+    table_index: Optional[int]
+    year: Optional[str]
+    headers: List[str]
+    columns: List[str]
+    cells: List[str]
+    label: str
+    label_norm: str
+    code_norm: str
+
+    def value(self, column: str) -> Optional[str]:
+        if column in self.columns:
+            value = self.cells[self.columns.index(column)]
+            return value if value and value.lower() != "nan" else None
+        return None
+
+    @property
+    def citation(self) -> str:
+        citation = f"{self.source} - Trang {self.page or '?'}"
+        if self.table_index:
+            citation += f" - Bảng #{self.table_index}"
+        return citation
+
+    def to_markdown(self) -> str:
+        return "\n".join(
+            [
+                "| " + " | ".join(self.headers) + " |",
+                "| " + " | ".join("---" for _ in self.headers) + " |",
+                "| " + " | ".join(self.cells) + " |",
+            ]
+        )
+
+
+@dataclass(slots=True)
+class TableAnswer:
+    answer: str
+    context: str
+    confidence: float
+    row: TableRow
+    column: str
+
+
+def rows_from_table(table: ParsedTable, metadata: DocumentMetadata) -> List[TableRow]:
+    """Turn one extracted table into rows keyed by normalised headers."""
+    parsed = markdown_rows(table.markdown)
+    if len(parsed) < 2:
+        return []
+    headers = parsed[0]
+    # pandas' to_markdown(index=True) adds an unnamed index column; drop it.
+    if headers and not headers[0] and all(row[0].isdigit() for row in parsed[1:] if row):
+        headers, parsed = headers[1:], [row[1:] for row in parsed]
+    columns = [normalize_header(header) for header in headers]
+    label_column = next((columns.index(key) for key in LABEL_COLUMNS if key in columns), 0)
+    code_column = columns.index("ma_nganh") if "ma_nganh" in columns else None
+    year = metadata.year or _first_year(" ".join(headers)) or _first_year(metadata.source)
+    rows = []
+    for cells in parsed[1:]:
+        cells = (cells + [""] * len(headers))[: len(headers)]
+        label = cells[label_column]
+        if not label or label.lower() == "nan":
+            continue
+        rows.append(
+            TableRow(
+                source=metadata.source,
+                page=table.page,
+                table_index=table.table_index,
+                year=year,
+                headers=headers,
+                columns=columns,
+                cells=cells,
+                label=label,
+                label_norm=normalize_text(label),
+                code_norm=normalize_text(cells[code_column]) if code_column is not None else "",
+            )
+        )
+    return rows
+
+
+def _first_year(text: str) -> Optional[str]:
+    match = _YEAR.search(text or "")
+    return match.group(1) if match else None
+
+
+@dataclass(slots=True)
+class TableStore:
+    """SQLite-backed table rows, queried on every lookup.
+
+    Each lookup opens the database, so an ingestion in another worker is
+    visible to the next one.
+    """
+
+    config: TableStoreConfig
+
+    def _connect(self) -> sqlite3.Connection:
+        Path(self.config.path).parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(str(self.config.path), timeout=30)
+        canonical = "".join(f", {key} TEXT" for key in HEADER_SYNONYMS)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS table_rows ("
+            "source TEXT NOT NULL, page INTEGER, table_index INTEGER, year TEXT, "
+            "headers TEXT NOT NULL, columns TEXT NOT NULL, cells TEXT NOT NULL, "
+            f"label TEXT NOT NULL, label_norm TEXT NOT NULL, code_norm TEXT NOT NULL{canonical})"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS table_rows_label ON table_rows (label_norm, year)")
+        connection.execute("CREATE INDEX IF NOT EXISTS table_rows_code ON table_rows (code_norm, year)")
+        return connection
+
+    def replace(self, metadata: DocumentMetadata, tables: Iterable[ParsedTable]) -> int:
+        """Replace every stored row with the tables of one document, in one transaction.
+
+        Ingestion rebuilds the whole vector index from one document, so the
+        store is replaced with the same scope once that build has succeeded.
+        """
+        rows = [row for table in tables for row in rows_from_table(table, metadata)]
+        marks = ", ".join("?" * (10 + len(HEADER_SYNONYMS)))
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute("DELETE FROM table_rows")
+                connection.executemany(
+                    f"INSERT INTO table_rows ({_FIELDS}, {', '.join(HEADER_SYNONYMS)}) VALUES ({marks})",
+                    [
+                        (
+                            row.source, row.page, row.table_index, row.year,
+                            json.dumps(row.headers, ensure_ascii=False), json.dumps(row.columns),
+                            json.dumps(row.cells, ensure_ascii=False), row.label, row.label_norm, row.code_norm,
+                            *(row.value(key) for key in HEADER_SYNONYMS),
+                        )
+                        for row in rows
+                    ],
+                )
+        finally:
+            connection.close()
+        return len(rows)
+
+    def _select(self, where: str = "", parameters: Iterable[object] = ()) -> List[TableRow]:
+        if not Path(self.config.path).exists():
+            return []
+        connection = self._connect()
+        try:
+            records = connection.execute(f"SELECT {_FIELDS} FROM table_rows {where}", tuple(parameters)).fetchall()
+        finally:
+            connection.close()
+        return [
+            TableRow(
+                source=source, page=page, table_index=table_index, year=year,
+                headers=json.loads(headers), columns=json.loads(columns), cells=json.loads(cells),
+                label=label, label_norm=label_norm, code_norm=code_norm,
+            )
+            for source, page, table_index, year, headers, columns, cells, label, label_norm, code_norm in records
+        ]
+
+    def rows(self) -> List[TableRow]:
+        return self._select()
+
+    def lookup(self, question: str) -> Optional[TableAnswer]:
+        """Resolve a question to one cell, or ``None`` when it is not unambiguous."""
+        normalized = normalize_text(question)
+        attributes = {
+            key
+            for key, spellings in HEADER_SYNONYMS.items()
+            if key != "nganh" and any(_contains(normalized, spelling) for spelling in spellings)
+        }
+        if len(attributes) > 1:
+            attributes.discard("ma_nganh")  # "mã ngành QHT40" identifies the row
+        if len(attributes) != 1:
+            return None
+        column = attributes.pop()
+        year = _first_year(question)
+        phrases = _phrases(normalized)
+        if not phrases:
+            return None
+
+        marks = ", ".join("?" * len(phrases))
+        # ``column`` is one of the canonical keys, never user text.
+        rows = self._select(
+            f"WHERE {column} IS NOT NULL AND (label_norm IN ({marks}) OR code_norm IN ({marks}))", phrases * 2
+        )
+        matched = set(phrases)
+        lengths = [len(row.label_norm) if row.label_norm in matched else len(row.code_norm) for row in rows]
+        best_length = max(lengths, default=0)
+        candidates = [row for row, length in zip(rows, lengths) if length == best_length]
+        if year is not None:
+            candidates = [row for row in candidates if row.year == year]
+        if not candidates:
+            return None
+
+        labels = {row.label_norm for row in candidates}
+        values = {normalize_text(row.value(column) or "") for row in candidates}
+        if len(labels) > 1 or len(values) > 1:
+            return None
+        # The same value across several years is probably right but unconfirmed.
+        confidence = 1.0 if year is not None or len({row.year for row in candidates}) == 1 else 0.8
+        return _answer(candidates[0], column, confidence)
+
+
+def _answer(row: TableRow, column: str, confidence: float) -> TableAnswer:
+    header = row.headers[row.columns.index(column)]
+    value = row.value(column)
+    year = f" năm {row.year}" if row.year else ""
+    answer = f"{header} của {row.label}{year} là {value} ({row.citation})."
+    context = f"[{row.citation}]\n{row.to_markdown()}\n"
+    return TableAnswer(answer=answer, context=context, confidence=confidence, row=row, column=column)
+
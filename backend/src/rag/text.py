@@ -0,0 +1,14 @@
+"""Text normalisation shared by table lookup and chunk deduplication."""
+from __future__ import annotations
+
+import re
+import unicodedata
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip Vietnamese diacritics, and collapse punctuation to spaces."""
+    text = unicodedata.normalize("NFD", text.replace("đ", "d").replace("Đ", "D"))
+    text = "".join(char for char in text if unicodedata.category(char) != "Mn").lower()
+    return " ".join(_NON_WORD.sub(" ", text).split())
@@ -0,0 +1,176 @@
+"""One CPU thread budget for torch, FAISS, and HF tokenizers.
+
+Left alone, each library sizes its pool to every core: torch (BGE-M3 and
+the LLM), FAISS's OpenMP, and the tokenizers' Rayon pool. Under concurrent
+``/chat`` load they then oversubscribe the CPU. ``configure`` installs a
+``ThreadBudget`` for the process once, at startup, for the process's role
+(``serve`` or ``ingest``). It applies the CPU affinity and the tokenizer
+environment variables right away.
+
+torch's intra-op pool is process-wide. A ``thread_scope`` sizes it to its
+role's share while it runs; when scopes overlap the pool takes the largest
+active share, so an embedding batch never shrinks a running generation.
+The size torch had before the first scope is restored once the last one
+exits. FAISS's OpenMP count is kept per OS thread, and new threads do not
+inherit it, so it is set once in every thread that reaches a
+``thread_scope``.
+
+Only libraries that are already imported are touched, so importing this
+module stays cheap.
+"""
+from __future__ import annotations
+
+from collections import Counter as TallyCounter
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+import os
+import sys
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from .config import ThreadBudgetConfig
+
+ROLES = ("ingest", "embed", "generate", "search")
+PROCESS_ROLES = ("serve", "ingest")
+
+
+def parse_cpu_list(spec: str) -> List[int]:
+    """``"0-3,8"`` -> ``[0, 1, 2, 3, 8]`` (the ``taskset -c`` format)."""
+    cpus: List[int] = []
+    for part in spec.replace(" ", "").split(","):
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return sorted(set(cpus))
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - macOS / Windows
+        return os.cpu_count() or 1
+
+
+@dataclass(slots=True)
+class ThreadBudget:
+    config: ThreadBudgetConfig
+    cpus: int
+
+    def threads(self, role: str) -> int:
+        """Threads allotted to ``role`` (one of ``ROLES``)."""
+        if role not in ROLES:
+            raise ValueError(f"Unknown thread budget role {role!r}; expected one of {ROLES}")
+        if self.config.process == "ingest":
+            role = "ingest"
+        configured = getattr(self.config, f"{role}_threads")
+        if configured:
+            return max(int(configured), 1)
+        if role == "ingest":
+            return self.cpus
+        if role == "search":
+            return 1
+        # Serving: generation gets most cores, embedding a quarter.
+        embed = max(self.cpus // 4, 1)
+        return embed if role == "embed" else max(self.cpus - embed, 1)
+
+    def apply_process(self) -> None:
+        """Pin the process to ``cpu_affinity`` and configure the tokenizers' pool."""
+        if self.config.process not in PROCESS_ROLES:
+            raise ValueError(f"Unknown process role {self.config.process!r}; expected one of {PROCESS_ROLES}")
+        if self.config.cpu_affinity and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, parse_cpu_list(self.config.cpu_affinity))
+            self.cpus = available_cpus()
+        # Rayon reads this once, when the pool starts; the flag is read per call.
+        os.environ.setdefault("RAYON_NUM_THREADS", str(self.threads("embed")))
+        parallel = self.config.process == "ingest" or self.config.tokenizers_parallelism
+        os.environ["TOKENIZERS_PARALLELISM"] = "true" if parallel else "false"
+
+
+_budget: Optional[ThreadBudget] = None
+_generation = 0  # bumped by configure() so that FAISS is sized again for the new budget
+_torch_lock = threading.Lock()
+_torch_scopes: Dict[int, int] = TallyCounter()  # active scopes by torch thread count
+_torch_before = 0
+_faiss_sized = threading.local()
+
+
+def configure(config: ThreadBudgetConfig, generate_threads: Optional[int] = None) -> Optional[ThreadBudget]:
+    """Install the process-wide budget (``None`` when disabled). Call it once at startup.
+
+    ``generate_threads`` (``LLMConfig.n_threads``) takes precedence over the
+    configured ``generate`` share.
+    """
+    global _budget, _generation
+    _generation += 1
+    if not config.enabled:
+        _budget = None
+        return None
+    if generate_threads:
+        config = replace(config, generate_threads=generate_threads)
+    budget = ThreadBudget(config, available_cpus())
+    budget.apply_process()
+    _budget = budget
+    return budget
+
+
+def current_budget() -> Optional[ThreadBudget]:
+    return _budget
+
+
+def threads_for(role: str) -> Optional[int]:
+    return _budget.threads(role) if _budget is not None else None
+
+
+def _resize_torch(torch: Any) -> None:
+    size = max(_torch_scopes) if _torch_scopes else _torch_before
+    if torch.get_num_threads() != size:
+        torch.set_num_threads(size)
+
+
+@contextmanager
+def _torch_scope(torch_threads: Optional[int]) -> Iterator[None]:
+    """Size torch's pool to the largest active share, restoring it after the last scope."""
+    global _torch_before
+    torch = sys.modules.get("torch")
+    if torch is None or not torch_threads:
+        yield
+        return
+    with _torch_lock:
+        if not _torch_scopes:
+            _torch_before = torch.get_num_threads()
+        _torch_scopes[torch_threads] += 1
+        _resize_torch(torch)
+    try:
+        yield
+    finally:
+        with _torch_lock:
+            _torch_scopes[torch_threads] -= 1
+            if not _torch_scopes[torch_threads]:
+                del _torch_scopes[torch_threads]
+            _resize_torch(torch)
+
+
+def _size_faiss(faiss_threads: int) -> None:
+    """Size FAISS's OpenMP pool once per thread."""
+    faiss = sys.modules.get("faiss")
+    if faiss is not None and getattr(_faiss_sized, "generation", None) != _generation:
+        faiss.omp_set_num_threads(faiss_threads)
+        _faiss_sized.generation = _generation
+
+
+@contextmanager
+def thread_scope(role: str, threads: Optional[int] = None) -> Iterator[Optional[int]]:
+    """Run a ``role`` stage under the budget; yields the threads it is allotted.
+
+    Without a budget, ``threads`` (``LLMConfig.n_threads``) still sizes torch.
+    """
+    budget = _budget
+    if budget is None:
+        with _torch_scope(threads):
+            yield threads
+        return
+    _size_faiss(budget.threads("search"))
+    allotted = threads or budget.threads(role)
+    with _torch_scope(allotted if role != "search" else None):
+        yield allotted
@@ -2,13 +2,10 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+import hashlib
 import json
-from typing import List, Sequence, Any
-
-try:  # pragma: no cover - import guard for optional dependency
-    import faiss  # type: ignore
-except ImportError:  # pragma: no cover - handled lazily
-    faiss = None  # type: ignore
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Sequence, Any
 
 try:  # pragma: no cover - import guard for optional dependency
     import numpy as np  # type: ignore
@@ -16,16 +13,65 @@ except ImportError:  # pragma: no cover - handled lazily
     np = None  # type: ignore
 
 from .config import Chunk, DocumentMetadata, SearchResult, VectorStoreConfig
+from .metrics import span
+from .threads import thread_scope
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import faiss  # type: ignore
+
+STORAGE_CODECS = {"float32": "Flat", "fp16": "SQfp16", "sq8": "SQ8", "pq": "PQ{m}"}
+
+
+def resolve_index_factory(config: VectorStoreConfig) -> str:
+    """Combine ``index_factory`` with the ``storage`` codec into one factory string."""
+    if config.storage not in STORAGE_CODECS:
+        raise ValueError(f"Unknown vector storage {config.storage!r}; expected one of {tuple(STORAGE_CODECS)}")
+    factory = config.index_factory
+    if config.storage == "float32":
+        return factory
+    codec = STORAGE_CODECS[config.storage].format(m=config.pq_m)
+    if factory == "Flat":
+        return codec
+    if factory.endswith(",Flat"):
+        return factory[: -len("Flat")] + codec
+    if "," not in factory and factory.startswith("HNSW"):
+        return f"{factory},{codec}"
+    raise ValueError(
+        f"storage={config.storage!r} cannot be combined with index_factory {factory!r}; "
+        "spell the codec in the factory string instead"
+    )
+
+
+def mmap_flags(faiss_module: Any) -> int:
+    """``read_index`` flags that map the index file instead of copying it into memory."""
+    # IO_FLAG_MMAP_IFC maps flat codes straight from the file (faiss >= 1.8).
+    flag = getattr(faiss_module, "IO_FLAG_MMAP_IFC", faiss_module.IO_FLAG_MMAP)
+    return flag | faiss_module.IO_FLAG_READ_ONLY
+
+
+def chunk_from_payload(metadata: dict, text: str) -> Chunk:
+    """Rebuild a chunk from its serialised metadata (``Chunk.to_dict`` layout)."""
+    metadata_kwargs = {
+        "source": metadata.get("source", ""),
+        "page": metadata.get("page"),
+        "section": metadata.get("section"),
+        "year": metadata.get("year"),
+        "faculty": metadata.get("faculty"),
+        "chunk_type": metadata.get("type", "text"),
+        "table_index": metadata.get("table_index"),
+    }
+    return Chunk(text=text, metadata=DocumentMetadata(**metadata_kwargs), embed_text=metadata.get("embed_text"))
 
 
 @dataclass(slots=True)
 class FaissVectorStore:
-    """Wrapper around a FAISS IndexFlatIP with metadata persistence."""
+    """Wrapper around a FAISS inner-product index with metadata persistence."""
 
     config: VectorStoreConfig
     _index: faiss.Index | None = field(init=False, default=None)
     _metadata: List[dict] = field(init=False, default_factory=list)
     _texts: List[str] = field(init=False, default_factory=list)
+    _sidecar: np.ndarray | None = field(init=False, default=None, repr=False)
 
     def __post_init__(self) -> None:
         # Attributes initialized via dataclass defaults above; method kept for compatibility.
@@ -36,8 +82,34 @@ class FaissVectorStore:
         self.config.index_path.parent.mkdir(parents=True, exist_ok=True)
         self.config.metadata_path.parent.mkdir(parents=True, exist_ok=True)
 
+    @property
+    def sidecar_path(self) -> Path:
+        """Normalised float32 vectors, row-aligned with the index, for exact re-scoring."""
+        return self.config.index_path.with_suffix(".f32")
+
+    def _load_sidecar(self, rows: int, dim: int) -> None:
+        self._sidecar = None
+        path = self.sidecar_path
+        if self.config.storage != "float32" and path.exists() and path.stat().st_size == rows * dim * 4:
+            self._sidecar = self._require_numpy().memmap(path, dtype="float32", mode="r", shape=(rows, dim))
+
     # endregion -----------------------------------------------------------------
 
+    @property
+    def is_loaded(self) -> bool:
+        return self._index is not None
+
+    @property
+    def version(self) -> str | None:
+        """Short identifier of the index files on disk, changing on every rebuild."""
+        stamps = []
+        for path in (self.config.index_path, self.config.metadata_path):
+            if not path.exists():
+                return None
+            stat = path.stat()
+            stamps.append(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}")
+        return hashlib.sha256("|".join(stamps).encode("utf-8")).hexdigest()[:12]
+
     @property
     def index(self) -> faiss.Index:
         if self._index is None:
@@ -51,14 +123,21 @@ class FaissVectorStore:
             raise ValueError("Vectors must be a 2D numpy array")
         faiss_module.normalize_L2(vectors)
         dim = vectors.shape[1]
-        index = faiss_module.IndexFlatIP(dim)
+        index = self._create_index(dim)
+        if not index.is_trained:
+            index.train(vectors)
         index.add(vectors)
+        self._apply_search_params(index)
         self._index = index
-        self._metadata = [chunk.metadata.to_serializable() for chunk in chunks]
+        # ``embed_text`` is kept so the index can be rebuilt without re-parsing.
+        self._metadata = [{k: v for k, v in chunk.to_dict().items() if k != "text"} for chunk in chunks]
         self._texts = [chunk.text for chunk in chunks]
         self._ensure_storage()
         faiss_module.write_index(index, str(self.config.index_path))
-        payload = [dict(meta, text=text) for meta, text in zip(self._metadata, self._texts)]
+        if self.config.storage != "float32":
+            vectors.tofile(self.sidecar_path)
+        self._load_sidecar(index.ntotal, dim)
+        payload = [chunk.to_dict() for chunk in chunks]
         self.config.metadata_path.write_text(
             json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8"
         )
@@ -67,12 +146,59 @@ class FaissVectorStore:
         faiss_module = self._require_faiss()
         if not self.config.index_path.exists():
             raise FileNotFoundError("FAISS index file not found. Have you run the ingestion pipeline?")
-        self._index = faiss_module.read_index(str(self.config.index_path))
+        if self.config.mmap:
+            self._index = faiss_module.read_index(str(self.config.index_path), mmap_flags(faiss_module))
+        else:
+            self._index = faiss_module.read_index(str(self.config.index_path))
+        self._apply_search_params(self._index)
+        self._load_sidecar(self._index.ntotal, self._index.d)
         payload = json.loads(self.config.metadata_path.read_text(encoding="utf-8"))
         self._metadata = [{k: v for k, v in item.items() if k != "text"} for item in payload]
         self._texts = [item["text"] for item in payload]
 
+    def _create_index(self, dim: int) -> faiss.Index:
+        faiss_module = self._require_faiss()
+        factory = resolve_index_factory(self.config)
+        if factory == "Flat":
+            return faiss_module.IndexFlatIP(dim)
+        return faiss_module.index_factory(dim, factory, faiss_module.METRIC_INNER_PRODUCT)
+
+    def _apply_search_params(self, index: faiss.Index) -> None:
+        if self.config.search_params:
+            self._require_faiss().ParameterSpace().set_index_parameters(
+                index, self.config.search_params
+            )
+
     def search(self, query_vector: np.ndarray, k: int = 6) -> List[SearchResult]:
+        distances, indices = self._search_ids(query_vector, k)
+        return self._results(distances, indices)
+
+    def search_with_vectors(self, query_vector: np.ndarray, k: int = 6) -> tuple[List[SearchResult], np.ndarray]:
+        """Top-``k`` results plus their stored vectors, row-aligned, for re-ranking such as MMR."""
+        distances, indices = self._search_ids(query_vector, k)
+        ids = indices[indices >= 0]
+        with span("reconstruct"):
+            vectors = self.reconstruct(ids)
+        return self._results(distances, indices), vectors
+
+    def reconstruct(self, ids: np.ndarray) -> np.ndarray:
+        """Normalised vectors of ``ids``: exact from the float32 sidecar, else decoded by the index.
+
+        Product-quantised indexes without a sidecar return their approximations.
+        """
+        np_module = self._require_numpy()
+        ids = np_module.asarray(ids, dtype="int64")
+        if self._sidecar is not None:
+            return np_module.asarray(self._sidecar[ids])
+        index = self.index
+        try:
+            return index.reconstruct_batch(ids)
+        except RuntimeError:
+            # IVF lists are keyed by cluster; a direct map finds an id's list and offset.
+            self._require_faiss().extract_index_ivf(index).make_direct_map()
+            return index.reconstruct_batch(ids)
+
+    def _search_ids(self, query_vector: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
         faiss_module = self._require_faiss()
         np_module = self._require_numpy()
         if self._index is None:
@@ -80,33 +206,42 @@ class FaissVectorStore:
         query = np_module.asarray(query_vector, dtype="float32")
         if query.ndim == 1:
             query = query.reshape(1, -1)
-        faiss_module.normalize_L2(query)
-        distances, indices = self._index.search(query, k)
+        rescore = self._sidecar is not None and self.config.rescore_candidates > 0
+        with span("vector_search"), thread_scope("search"):
+            faiss_module.normalize_L2(query)
+            fetch = max(k, self.config.rescore_candidates) if rescore else k
+            distances, indices = self._index.search(query, fetch)
+        if rescore:
+            with span("rescore"):
+                distances, indices = self._rescore(query[0], indices[0], k)
+        return distances[0], indices[0]
+
+    def _results(self, distances: np.ndarray, indices: np.ndarray) -> List[SearchResult]:
         results: List[SearchResult] = []
-        for distance, idx in zip(distances[0], indices[0]):
+        for distance, idx in zip(distances, indices):
             if idx == -1:
                 continue
-            metadata = self._metadata[idx]
-            metadata_kwargs = {
-                "source": metadata.get("source", ""),
-                "page": metadata.get("page"),
-                "section": metadata.get("section"),
-                "year": metadata.get("year"),
-                "faculty": metadata.get("faculty"),
-                "chunk_type": metadata.get("type", "text"),
-                "table_index": metadata.get("table_index"),
-            }
-            chunk = Chunk(
-                text=self._texts[idx],
-                metadata=DocumentMetadata(**metadata_kwargs),
-            )
+            chunk = chunk_from_payload(self._metadata[idx], self._texts[idx])
             results.append(SearchResult(score=float(distance), chunk=chunk))
         return results
 
+    def _rescore(self, query: np.ndarray, candidates: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Re-rank approximate candidates by exact inner product against the sidecar."""
+        np_module = self._require_numpy()
+        ids = candidates[candidates >= 0]
+        scores = self._sidecar[ids] @ query
+        order = np_module.argsort(-scores, kind="stable")[:k]
+        return scores[order].reshape(1, -1), ids[order].reshape(1, -1)
+
     @staticmethod
     def _require_faiss() -> Any:
-        if faiss is None:
-            raise RuntimeError("faiss is required for vector store operations. Please install faiss-cpu.")
+        # Imported on first use so that importing the server stays cheap.
+        try:
+            import faiss  # type: ignore
+        except ImportError as exc:  # pragma: no cover - environment dependent
+            raise RuntimeError(
+                "faiss is required for vector store operations. Please install faiss-cpu."
+            ) from exc
         return faiss
 
     @staticmethod
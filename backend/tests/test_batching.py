@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from rag.batching import EmbeddingBatcher
+from rag.cancellation import CancellationToken, DeadlineExceeded, cancellation_scope
+from rag.config import ChatbotConfig
+
+
+class RecordingEmbedder:
+    """Embeds a text as ``[len(text)]`` and remembers every call's batch."""
+
+    def __init__(self, gate: threading.Event | None = None):
+        self.calls = []
+        self.gate = gate
+
+    def embed(self, texts):
+        texts = list(texts)
+        self.calls.append(texts)
+        if self.gate is not None:
+            self.gate.wait(5)
+        return np.array([[float(len(text))] for text in texts], dtype="float32")
+
+
+class EmbeddingBatcherTests(unittest.TestCase):
+    def test_concurrent_queries_share_one_call_and_get_their_own_rows(self):
+        model = RecordingEmbedder()
+        batcher = EmbeddingBatcher(max_batch_size=8, max_wait=0.5)
+        questions = ["a" * length for length in range(1, 9)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            rows = list(pool.map(lambda text: batcher.embed(model, [text]), questions))
+
+        self.assertEqual([row.tolist() for row in rows], [[[float(length)]] for length in range(1, 9)])
+        self.assertEqual(len(model.calls), 1)
+        self.assertEqual(sorted(model.calls[0]), sorted(questions))
+        self.assertEqual(batcher.mean_batch_size, 8)
+
+    def test_large_calls_bypass_the_queue(self):
+        model = RecordingEmbedder()
+        batcher = EmbeddingBatcher(max_batch_size=2, max_wait=0.5)
+        batcher.embed(model, ["chunk one", "chunk two", "chunk three"])
+        self.assertEqual(len(model.calls), 1)
+        self.assertEqual(batcher.batches, 0)
+
+    def test_errors_reach_every_caller_in_the_batch(self):
+        class Broken:
+            def embed(self, texts):
+                raise RuntimeError("CUDA out of memory")
+
+        batcher = EmbeddingBatcher(max_batch_size=4, max_wait=0.05)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(batcher.embed, Broken(), ["q"]) for _ in range(2)]
+            for future in futures:
+                with self.assertRaises(RuntimeError):
+                    future.result()
+        self.assertEqual(batcher.embed(RecordingEmbedder(), ["ok"]).tolist(), [[2.0]])
+
+    def test_a_caller_gives_up_at_its_deadline(self):
+        gate = threading.Event()
+        batcher = EmbeddingBatcher(max_batch_size=4, max_wait=0)
+        with cancellation_scope(CancellationToken.after(0.1)), self.assertRaises(DeadlineExceeded):
+            batcher.embed(RecordingEmbedder(gate), ["slow"])
+        gate.set()
+
+    def test_service_search_goes_through_the_batcher(self):
+        config = ChatbotConfig()
+        from rag.service import ChatbotService
+
+        service = ChatbotService(config)
+        self.assertIsNotNone(service.embedding_batcher)
+        config.pipeline.embedding.micro_batching = False
+        self.assertIsNone(ChatbotService(config).embedding_batcher)
+
+
+if __name__ == "__main__":
+    unittest.main()
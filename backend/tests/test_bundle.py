@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import io
+import sys
+import tarfile
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+
+from rag.bundle import (
+    BundleError,
+    BundleMismatchError,
+    activate_bundle,
+    export_bundle,
+    install_bundle,
+    read_manifest,
+)
+from rag.config import ChatbotConfig, Chunk, ChunkingConfig, DocumentMetadata, EmbeddingConfig, VectorStoreConfig
+from rag.service import ChatbotService
+from rag.vector_store import FaissVectorStore
+
+
+def build_index(root: Path, count: int = 50, storage: str = "float32") -> tuple[VectorStoreConfig, np.ndarray]:
+    rng = np.random.default_rng(7)
+    vectors = rng.standard_normal((count, 16), dtype="float32")
+    chunks = [Chunk(text=f"chunk {i}", metadata=DocumentMetadata(source="doc", page=i)) for i in range(count)]
+    config = VectorStoreConfig(index_path=root / "index.faiss", metadata_path=root / "meta.json", storage=storage)
+    FaissVectorStore(config).build(vectors.copy(), chunks)
+    return config, vectors
+
+
+class BundleTests(unittest.TestCase):
+    def test_export_install_and_serve_from_a_memory_map(self):
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            store, vectors = build_index(root / "node-a", storage="sq8")
+            manifest = export_bundle(store, EmbeddingConfig(), ChunkingConfig(), root / "index.tar", label="2026")
+            self.assertEqual(
+                sorted(entry.name for entry in manifest.files), ["index.f32", "index.faiss", "meta.json"]
+            )
+            self.assertEqual((manifest.dim, manifest.chunks, manifest.label), (16, 50, "2026"))
+
+            installed = install_bundle(root / "index.tar", root / "bundles")
+            self.assertEqual(installed.name, manifest.version)
+            self.assertEqual((root / "bundles" / "current").resolve(), installed.resolve())
+
+            config = ChatbotConfig()
+            config.pipeline.vector_store = VectorStoreConfig(
+                index_path=root / "unused.faiss", metadata_path=root / "unused.json", bundle=root / "bundles"
+            )
+            service = ChatbotService(config)
+            service.load()
+            self.assertEqual(service.readiness()["bundle"], manifest.version)
+            self.assertTrue(service.vector_store.config.mmap)
+            results = service.vector_store.search(vectors[3:4].copy(), k=1)
+            self.assertEqual(results[0].chunk.text, "chunk 3")
+
+            # Later requests reuse the open bundle, and ingestion never writes into it.
+            serving = service.vector_store
+            service.load()
+            self.assertIs(service.vector_store, serving)
+            self.assertEqual(service.pipeline.vector_store.config.index_path, root / "unused.faiss")
+            with self.assertRaises(BundleError):
+                service.ingest_pdf(root / "new.pdf")
+
+    def test_a_node_with_another_embedding_model_refuses_the_bundle(self):
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            store, _ = build_index(root)
+            export_bundle(store, EmbeddingConfig(model_name="intfloat/multilingual-e5-large"), ChunkingConfig(), root / "e5.tar")
+            install_bundle(root / "e5.tar", root / "bundles")
+            config = ChatbotConfig()
+            config.pipeline.vector_store = VectorStoreConfig(bundle=root / "bundles")
+            with self.assertRaises(BundleMismatchError) as ctx:
+                ChatbotService(config).load()
+            self.assertIn("multilingual-e5-large", str(ctx.exception))
+
+    def test_corrupted_or_unsafe_archives_are_rejected_and_current_is_kept(self):
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            store, _ = build_index(root)
+            good = export_bundle(store, EmbeddingConfig(), ChunkingConfig(), root / "good.tar")
+            install_bundle(root / "good.tar", root / "bundles")
+
+            with tarfile.open(root / "good.tar") as source, tarfile.open(root / "bad.tar", "w") as target:
+                for member in source.getmembers():
+                    data = source.extractfile(member).read()
+                    if member.name == "meta.json":
+                        data = data.replace(b"chunk 1", b"chunk X")
+                    target.addfile(member, io.BytesIO(data))
+            with self.assertRaises(BundleError):
+                install_bundle(root / "bad.tar", root / "bundles")
+
+            with tarfile.open(root / "evil.tar", "w") as archive:
+                info = tarfile.TarInfo("../escape.txt")
+                archive.addfile(info, io.BytesIO(b""))
+            with self.assertRaises(BundleError):
+                install_bundle(root / "evil.tar", root / "bundles")
+
+            self.assertFalse((root / "escape.txt").exists())
+            self.assertEqual(read_manifest(root / "bundles" / "current").version, good.version)
+            self.assertEqual([p.name for p in (root / "bundles").iterdir() if p.name.startswith(".")], [])
+            with self.assertRaises(FileNotFoundError):
+                activate_bundle(root / "bundles", "0123456789ab")
+
+
+if __name__ == "__main__":
+    unittest.main()
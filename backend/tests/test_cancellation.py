@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from fastapi.testclient import TestClient
+
+from rag import server
+from rag.cancellation import (
+    CancellationToken,
+    DeadlineExceeded,
+    cancellation_scope,
+    check_deadline,
+    current_token,
+    remaining_timeout,
+)
+from rag.config import ChatbotConfig, ProfilingConfig
+from rag.metrics import request_metrics
+from rag.profiling import Profiler
+from rag.service import ChatbotService
+
+
+class CutOffLLM:
+    """Returns ``text`` and lets the request deadline expire while "generating"."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def generate(self, prompt, max_new_tokens=None):
+        current_token().cancel("deadline")
+        return self.text
+
+
+class CancellationTokenTests(unittest.TestCase):
+    def test_deadline_expires_and_shortens_timeouts(self):
+        self.assertFalse(CancellationToken().cancelled)
+        self.assertEqual(remaining_timeout(0.5), 0.5)
+        token = CancellationToken.after(60)
+        with cancellation_scope(token):
+            self.assertLessEqual(remaining_timeout(300), 60)
+            self.assertEqual(remaining_timeout(0.5), 0.5)
+        expired = CancellationToken.after(0)
+        self.assertTrue(expired.cancelled)
+        self.assertEqual(expired.reason, "deadline")
+        with cancellation_scope(expired), self.assertRaises(DeadlineExceeded):
+            check_deadline("retrieval")
+
+    def test_cancel_callbacks_fire_once_and_through_links(self):
+        first, second, shared = CancellationToken(), CancellationToken(), CancellationToken()
+        shared.link(first)
+        shared.link(second)
+        calls = []
+        shared.on_cancel(lambda: calls.append("shared"))
+        unsubscribe = first.on_cancel(lambda: calls.append("removed"))
+        unsubscribe()
+
+        first.cancel("disconnect")
+        self.assertEqual(calls, [])
+        second.cancel("disconnect")
+        second.cancel("disconnect")
+        self.assertEqual(calls, ["shared"])
+        self.assertEqual(shared.reason, "disconnect")
+        shared.on_cancel(lambda: calls.append("late"))  # already cancelled: runs at once
+        self.assertEqual(calls, ["shared", "late"])
+
+    def test_cut_off_generation_is_partial_or_a_timeout(self):
+        service = ChatbotService(ChatbotConfig())
+        service.llm = CutOffLLM("Điểm chuẩn là")  # type: ignore
+        with request_metrics() as metrics, cancellation_scope(CancellationToken()):
+            self.assertEqual(service._generate("prompt", ("v1", "q", "c")), "Điểm chuẩn là")
+        self.assertTrue(metrics.partial)
+
+        service.llm = CutOffLLM("")  # type: ignore
+        with cancellation_scope(CancellationToken()), self.assertRaises(DeadlineExceeded):
+            service._generate("prompt", ("v1", "q", "c"))
+
+    def test_chat_returns_504_when_the_deadline_passes_before_an_answer(self):
+        class SlowService:
+            profiler = Profiler(ProfilingConfig())
+
+            def load(self):
+                pass
+
+            def chat(self, messages, k=6, diversity=None):
+                check_deadline("retrieval")
+                raise AssertionError("deadline should have expired")
+
+        original = server.service
+        server.service = SlowService()  # type: ignore
+        try:
+            response = TestClient(server.app).post(
+                "/chat", json={"messages": [{"role": "user", "content": "Hi"}], "deadline_ms": 0}
+            )
+        finally:
+            server.service = original
+        self.assertEqual(response.status_code, 504)
+        self.assertIn("deadline", response.json()["detail"])
+
+
+if __name__ == "__main__":
+    unittest.main()
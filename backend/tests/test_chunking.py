@@ -1,11 +1,24 @@
+import json
 import sys
 from pathlib import Path
+from tempfile import TemporaryDirectory
 import unittest
 
 sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
 
+import numpy as np
+
 from rag.chunking import ChunkBuilder
-from rag.config import ChunkingConfig, DocumentMetadata
+from rag.compression import split_units
+from rag.config import Chunk, ChunkingConfig, DocumentMetadata, VectorStoreConfig
+from rag.vector_store import FaissVectorStore
+
+PADDED_TABLE = (
+    "| Ngành              | Mã ngành   |   Điểm chuẩn |\n"
+    "|:-------------------|:-----------|-------------:|\n"
+    "| Công nghệ thông tin | QHT01     |        26.5  |\n"
+    "| Toán, tin          | QHT02      |        24    |"
+)
 
 
 class ChunkingTests(unittest.TestCase):
@@ -33,5 +46,42 @@ class ChunkingTests(unittest.TestCase):
             self.assertEqual(chunk.metadata.table_index, 1)
 
 
+class TableFormatTests(unittest.TestCase):
+    def render(self, table_format: str) -> Chunk:
+        builder = ChunkBuilder(ChunkingConfig(table_embed_format="records", table_prompt_format=table_format))
+        return builder.build_table_chunks(PADDED_TABLE, DocumentMetadata(source="quy_che", table_index=1))[0]
+
+    def test_compact_renderings_drop_pipes_and_padding(self):
+        self.assertEqual(
+            self.render("csv").text,
+            'Ngành,Mã ngành,Điểm chuẩn\nCông nghệ thông tin,QHT01,26.5\n"Toán, tin",QHT02,24',
+        )
+        self.assertEqual(self.render("tsv").text.splitlines()[1], "Công nghệ thông tin\tQHT01\t26.5")
+        records = self.render("records")
+        self.assertEqual(records.text.splitlines()[0], "- Ngành: Công nghệ thông tin; Mã ngành: QHT01; Điểm chuẩn: 26.5")
+        self.assertIsNone(records.embed_text)
+        markdown = self.render("markdown")
+        self.assertEqual(markdown.text, PADDED_TABLE)
+        self.assertTrue(markdown.embed_text.startswith("- Ngành: Công nghệ thông tin;"))
+        for table_format in ("csv", "records"):
+            units = split_units(self.render(table_format))
+            self.assertEqual(len(units.units), 2, table_format)
+        with self.assertRaises(ValueError):
+            ChunkBuilder(ChunkingConfig(table_prompt_format="html"))
+
+    def test_the_chunk_store_keeps_both_forms(self):
+        chunk = self.render("markdown")
+        with TemporaryDirectory() as tmp:
+            config = VectorStoreConfig(index_path=Path(tmp) / "i.faiss", metadata_path=Path(tmp) / "m.json")
+            FaissVectorStore(config).build(np.ones((1, 4), dtype="float32"), [chunk])
+            entry = json.loads(config.metadata_path.read_text(encoding="utf-8"))[0]
+            self.assertEqual((entry["text"], entry["embed_text"]), (chunk.text, chunk.embed_text))
+            store = FaissVectorStore(config)
+            store.load()
+            loaded = store.search(np.ones((1, 4), dtype="float32"), k=1)[0].chunk
+            self.assertEqual((loaded.text, loaded.embed_text), (PADDED_TABLE, chunk.embed_text))
+            self.assertEqual(loaded.embedding_input(), chunk.embedding_input())
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,11 @@
 """Ensure CLI entry points resolve to the packaged modules."""
+import os
+import subprocess
+import sys
 from importlib import import_module
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
 
 
 def test_ingest_cli_importable():
@@ -10,3 +16,16 @@ def test_ingest_cli_importable():
 def test_query_cli_importable():
     module = import_module("rag.cli.query")
     assert hasattr(module, "main"), "query CLI should expose a main() function"
+
+
+def test_entry_points_do_not_import_heavy_dependencies():
+    probe = (
+        "import sys, rag.cli.ingest, rag.cli.query, rag.server, rag.model_server, rag.remote, rag.shard_server; "
+        "print(','.join(m for m in ('torch', 'transformers', 'sentence_transformers', 'faiss') "
+        "if m in sys.modules))"
+    )
+    env = dict(os.environ, PYTHONPATH=str(SRC_DIR))
+    completed = subprocess.run(
+        [sys.executable, "-c", probe], env=env, capture_output=True, text=True, check=True
+    )
+    assert completed.stdout.strip() == "", f"heavy modules imported: {completed.stdout.strip()}"
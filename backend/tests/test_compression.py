@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+
+from rag.compression import ContextCompressor, select_units, split_units
+from rag.config import ChatbotConfig, Chunk, CompressionConfig, DocumentMetadata, SearchResult
+from rag.evaluation import GoldExample, evaluate_compression
+from rag.metrics import request_metrics
+from rag.service import ChatbotService
+
+VOCABULARY = ["hoc", "phi", "diem", "chuan", "cntt", "toan", "ly", "ktx"]
+
+TABLE = (
+    "| Nganh | Diem chuan | Hoc phi |\n"
+    "|:------|-----------:|--------:|\n"
+    "| CNTT | 26 | 450 |\n"
+    "| Toan | 24 | 400 |\n"
+    "| Vat ly | 22 | 380 |"
+)
+PROSE = (
+    "Truong tuyen sinh nam 2026. Diem chuan nganh CNTT la 26 diem. "
+    "Ky tuc xa KTX co 2000 cho. Hoc phi nganh Toan la 400 nghin."
+)
+
+
+def keyword_embed(texts):
+    rows = []
+    for text in texts:
+        words = text.lower().replace("|", " ").split()
+        rows.append([float(words.count(term)) + 0.01 for term in VOCABULARY])
+    return np.asarray(rows, dtype="float32")
+
+
+def results():
+    table = Chunk(TABLE, DocumentMetadata(source="quy_che", page=3, chunk_type="table", table_index=1))
+    text = Chunk(PROSE, DocumentMetadata(source="quy_che", page=1))
+    return [SearchResult(score=0.9, chunk=table), SearchResult(score=0.8, chunk=text)]
+
+
+class SplitTests(unittest.TestCase):
+    def test_tables_split_into_header_and_rows_and_prose_into_sentences(self):
+        table, text = (split_units(result.chunk) for result in results())
+        self.assertEqual(len(table.header), 2)
+        self.assertEqual(len(table.units), 3)
+        self.assertEqual(text.units[1], "Diem chuan nganh CNTT la 26 diem.")
+        long = Chunk(" ".join(["tu"] * 25), DocumentMetadata(source="s"))
+        self.assertEqual([len(unit.split()) for unit in split_units(long, max_unit_words=10).units], [10, 10, 5])
+
+    def test_every_chunk_keeps_its_best_units(self):
+        scores = np.array([0.1, 0.3, 0.2, 0.9, 0.05, 0.04], dtype="float32")
+        owners = np.array([0, 0, 0, 1, 2, 2])
+        self.assertEqual(select_units(scores, owners, 0.8, 1).tolist(), [False, True, False, True, True, False])
+        self.assertEqual(select_units(scores, owners, 0.8, 2).tolist(), [False, True, True, True, True, True])
+        self.assertEqual(select_units(scores, owners, 0.8, 0).tolist(), [False, False, False, True, False, False])
+
+
+class CompressorTests(unittest.TestCase):
+    def test_keeps_the_matching_rows_with_their_header_and_the_matching_sentence(self):
+        compressor = ContextCompressor(CompressionConfig(enabled=True), keyword_embed)
+        with request_metrics() as metrics:
+            table, text = compressor.compress("diem chuan cntt", results())
+        self.assertEqual(table.chunk.text, "\n".join(TABLE.splitlines()[:3]))
+        self.assertEqual(text.chunk.text, "Diem chuan nganh CNTT la 26 diem.")
+        self.assertEqual((table.score, text.chunk.metadata.page), (0.9, 1))
+        self.assertLess(metrics.stats["compressed_context_words"], metrics.stats["context_words"])
+
+    def test_chat_prompts_carry_the_compressed_context(self):
+        config = ChatbotConfig()
+        config.compression.enabled = True
+        service = ChatbotService(config)
+        service.table_store = None
+        service.embedding_batcher = None
+        prompts = []
+
+        class Embedding:
+            def embed(self, texts):
+                return keyword_embed(texts)
+
+        class VectorStore:
+            version = "v1"
+
+            def search(self, vector, k=6):
+                return results()
+
+        class LLM:
+            def generate(self, prompt, max_new_tokens=None):
+                prompts.append(prompt)
+                return "26 diem"
+
+        service.embedding_model, service.vector_store, service.llm = Embedding(), VectorStore(), LLM()  # type: ignore
+        answer, context = service.chat([{"role": "user", "content": "diem chuan cntt"}])
+        self.assertEqual(answer, "26 diem")
+        self.assertIn("[quy_che - Trang 3 - Bảng #1]\n| Nganh | Diem chuan | Hoc phi |", context)
+        self.assertNotIn("Vat ly", context)
+        self.assertNotIn("KTX", prompts[0])
+
+        examples = [GoldExample(question="diem chuan cntt", answer="26"), GoldExample(question="hoc phi toan")]
+        compressor = ContextCompressor(config.compression, keyword_embed)
+        report = evaluate_compression(service, examples, compressor, generate=True).to_dict()
+        self.assertEqual((report["questions"], report["scored"]), (2, 1))
+        self.assertGreater(report["token_reduction"], 0.2)
+        self.assertEqual(report["context_answer_delta"], 0.0)
+        self.assertEqual(report["answer_accuracy"], {"full": 1.0, "compressed": 1.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
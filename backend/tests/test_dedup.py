@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from rag.config import Chunk, DedupConfig, DocumentMetadata
+from rag.dedup import ChunkDeduplicator
+from rag.document_parsers import ParsedDocument, ParsedTable
+
+PROSE = (
+    "Trường Đại học Khoa học Tự nhiên tuyển sinh đại học chính quy năm 2025 theo các phương thức "
+    "xét tuyển thẳng, xét kết quả thi tốt nghiệp THPT và xét kết quả đánh giá năng lực. Thí sinh "
+    "cần đọc kỹ quy chế, chỉ tiêu và tổ hợp môn xét tuyển của từng ngành trước khi đăng ký."
+)
+TABLE = """| Tên ngành | Mã ngành | Điểm chuẩn |
+| --- | --- | --- |
+| Công nghệ thông tin | QHT40 | 26.10 |
+| Khoa học máy tính | QHT41 | 25.75 |
+| Toán học | QHT01 | 22.50 |
+"""
+
+
+def text_chunk(text: str) -> Chunk:
+    return Chunk(text=text, metadata=DocumentMetadata(source="tuyen_sinh_2025"))
+
+
+def table_chunk(text: str) -> Chunk:
+    return Chunk(text=text, metadata=DocumentMetadata(source="tuyen_sinh_2025", chunk_type="table"))
+
+
+class DedupTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dedup = ChunkDeduplicator(DedupConfig())
+
+    def test_text_already_in_a_table_chunk_keeps_the_table(self):
+        flattened = "\n".join(cell.strip() for line in TABLE.splitlines() for cell in line.split("|") if cell.strip())
+        kept = self.dedup.deduplicate([text_chunk(flattened), table_chunk(TABLE)])
+        self.assertEqual([chunk.metadata.chunk_type for chunk in kept], ["table"])
+        self.assertEqual(self.dedup.last_report.table_covered, 1)
+
+    def test_table_lines_are_removed_from_the_prose_before_windowing(self):
+        cells = [cell.strip() for line in TABLE.splitlines() for cell in line.split("|") if cell.strip("- \n")]
+        mention = "Ngành Toán học có chỉ tiêu 80 sinh viên và điểm chuẩn năm trước là 22.50."
+        document = ParsedDocument("\n".join([PROSE, *cells, "", mention]), [ParsedTable(TABLE, page=1)])
+        stripped = self.dedup.strip_table_text(document)
+        self.assertEqual(stripped.text, "\n".join([PROSE, "", mention]))
+        self.assertIs(stripped.tables, document.tables)
+        self.dedup.deduplicate([text_chunk(stripped.text)])
+        self.assertEqual(self.dedup.last_report.table_lines, len(cells))
+
+    def test_chunks_are_compared_on_their_embedded_rendering(self):
+        records = "- Tên ngành: Toán học; Mã ngành: QHT01; Điểm chuẩn: 22.50"
+        table = Chunk(text=TABLE, metadata=table_chunk(TABLE).metadata, embed_text=records)
+        kept = self.dedup.deduplicate([text_chunk(records), table])
+        self.assertEqual(kept, [table])
+
+    def test_near_duplicates_keep_the_longer_copy(self):
+        footer = PROSE + " Liên hệ phòng đào tạo."
+        kept = self.dedup.deduplicate([text_chunk(PROSE.upper()), text_chunk("Mục 1. " + footer)])
+        self.assertEqual([chunk.text for chunk in kept], ["Mục 1. " + footer])
+        self.assertEqual(self.dedup.last_report.near_duplicates, 1)
+
+    def test_distinct_chunks_and_order_are_preserved(self):
+        chunks = [text_chunk(PROSE), table_chunk(TABLE), text_chunk("Học phí được tính theo tín chỉ.")]
+        kept = self.dedup.deduplicate(chunks)
+        self.assertEqual(kept, chunks)
+        report = self.dedup.last_report
+        self.assertEqual((report.dropped, report.reduction), (0, 0.0))
+        self.assertEqual(report.vector_bytes_saved(1024), 0)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from rag import server
+from rag.config import ChatbotConfig, Chunk, DocumentMetadata, ShardingConfig, VectorStoreConfig
+from rag.diversity import mmr
+from rag.service import ChatbotService
+from rag.sharding import ShardedVectorStore
+from rag.vector_store import FaissVectorStore
+
+
+def reference_mmr(query, candidates, k, diversity):
+    candidates = candidates / np.linalg.norm(candidates, axis=1, keepdims=True)
+    query = query / np.linalg.norm(query)
+    selected = []
+    while len(selected) < k:
+        best, best_score = None, -np.inf
+        for index, vector in enumerate(candidates):
+            if index in selected:
+                continue
+            redundancy = max((float(vector @ candidates[other]) for other in selected), default=0.0)
+            score = (1 - diversity) * float(vector @ query) - diversity * redundancy
+            if score > best_score:
+                best, best_score = index, score
+        selected.append(best)
+    return selected
+
+
+def overlapping_corpus():
+    """A query, three near-identical windows of one passage, then two other passages."""
+    vectors = np.zeros((5, 8), dtype="float32")
+    vectors[:3, 0], vectors[:3, 1] = 1.0, [0.3, 0.32, 0.28]
+    vectors[3, :3] = [0.7, -0.3, 0.65]
+    vectors[4, [0, 1, 3]] = [0.6, -0.3, 0.74]
+    query = np.eye(1, 8, dtype="float32")[0]
+    chunks = [Chunk(text=name, metadata=DocumentMetadata(source="doc")) for name in ("a1", "a2", "a3", "b", "c")]
+    return query, vectors, chunks
+
+
+class MMRTests(unittest.TestCase):
+    def test_matches_the_greedy_definition(self):
+        rng = np.random.default_rng(1)
+        query = rng.standard_normal(32).astype("float32")
+        candidates = rng.standard_normal((40, 32)).astype("float32")
+        for diversity in (0.0, 0.3, 0.7, 1.0):
+            self.assertEqual(mmr(query, candidates, 8, diversity).tolist(), reference_mmr(query, candidates, 8, diversity))
+        self.assertEqual(len(mmr(query, candidates[:3], 6, 0.5)), 3)
+        with self.assertRaises(ValueError):
+            mmr(query, candidates, 3, 1.5)
+
+    def test_near_duplicate_windows_give_way_to_other_passages(self):
+        passage, vectors, chunks = overlapping_corpus()
+        self.assertEqual(sorted(mmr(passage, vectors, 3, 0.0).tolist()), [0, 1, 2])
+        self.assertEqual(mmr(passage, vectors, 3, 0.5).tolist()[1:], [3, 4])
+
+
+class ReconstructTests(unittest.TestCase):
+    def test_vectors_come_back_from_flat_ivf_and_sidecar_indexes(self):
+        rng = np.random.default_rng(2)
+        vectors = rng.standard_normal((300, 16)).astype("float32")
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        chunks = [Chunk(text=str(i), metadata=DocumentMetadata(source="doc")) for i in range(300)]
+        ids = np.array([4, 150, 299])
+        with TemporaryDirectory() as tmp:
+            for name, factory, storage in (("flat", "Flat", "float32"), ("ivf", "IVF8,Flat", "float32"), ("sq", "Flat", "sq8")):
+                config = VectorStoreConfig(
+                    index_path=Path(tmp) / f"{name}.faiss",
+                    metadata_path=Path(tmp) / f"{name}.json",
+                    index_factory=factory,
+                    storage=storage,
+                    mmap=True,
+                )
+                FaissVectorStore(config).build(vectors.copy(), chunks)
+                store = FaissVectorStore(config)
+                store.load()
+                np.testing.assert_allclose(store.reconstruct(ids), normalized[ids], atol=1e-5, err_msg=name)
+                results, found = store.search_with_vectors(vectors[7].copy(), k=4)
+                self.assertEqual(results[0].chunk.text, "7")
+                self.assertEqual(found.shape, (4, 16))
+
+
+class DiversifiedSearchTests(unittest.TestCase):
+    def setUp(self):
+        self.passage, vectors, chunks = overlapping_corpus()
+        self.tmp = TemporaryDirectory()
+        config = ChatbotConfig()
+        config.warmup.enabled = False
+        config.pipeline.vector_store = VectorStoreConfig(
+            index_path=Path(self.tmp.name) / "i.faiss", metadata_path=Path(self.tmp.name) / "m.json"
+        )
+        self.service = ChatbotService(config)
+        self.service.vector_store.build(vectors.copy(), chunks)
+        passage = self.passage
+
+        class Embedding:
+            def embed(self, texts):
+                return np.stack([passage for _ in texts])
+
+        self.service.embedding_model = Embedding()  # type: ignore
+        self.service.embedding_batcher = None
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_diversity_is_a_search_option_with_a_config_default(self):
+        texts = lambda results: [result.chunk.text for result in results]  # noqa: E731
+        self.assertEqual(sorted(texts(self.service.search("q", k=3))), ["a1", "a2", "a3"])
+        diverse = texts(self.service.search("q", k=3, diversity=0.5))
+        self.assertEqual(diverse[1:], ["b", "c"])
+        self.service.config.retrieval.diversity = 0.5
+        self.assertEqual(texts(self.service.search("q", k=3)), diverse)
+
+    def test_sharded_stores_return_vectors_instead_of_re_embedding(self):
+        query, vectors, chunks = overlapping_corpus()
+        sharded = ShardedVectorStore(
+            ShardingConfig(enabled=True, num_shards=2, directory=Path(self.tmp.name) / "shards")
+        )
+        sharded.build(vectors.copy(), chunks)
+        embedded = []
+
+        class Embedding:
+            def embed(self, texts):
+                embedded.extend(texts)
+                return np.stack([query for _ in texts])
+
+        self.service.vector_store = sharded
+        self.service.embedding_model = Embedding()  # type: ignore
+        results = self.service.search("q", k=3, diversity=0.5)
+        self.assertEqual([result.chunk.text for result in results[1:]], ["b", "c"])
+        self.assertEqual(embedded, ["q"])
+
+    def test_query_endpoint_validates_and_forwards_diversity(self):
+        original, server.service = server.service, self.service
+        try:
+            client = TestClient(server.app)
+            self.assertEqual(client.post("/query", json={"question": "q", "diversity": 1.5}).status_code, 422)
+            response = client.post("/query", json={"question": "q", "k": 3, "diversity": 0.5})
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("b", response.json()["answer_context"].split())
+        finally:
+            server.service = original
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import sys
+import time
+import unittest
+from dataclasses import dataclass
+from pathlib import Path
+from typing import ClassVar
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from rag.chunking import ChunkBuilder
+from rag.config import ChunkingConfig, DocumentMetadata
+from rag.document_parsers import (
+    CompositeParser,
+    DocumentParser,
+    DocumentParsingError,
+    NoTablesFound,
+    ParsedDocument,
+    ParsedTable,
+)
+
+TUITION_TABLE = "| Ngành | Học phí |\n| --- | --- |\n| CNTT | 450000 |\n| Toán | 380000 |"
+QUOTA_TABLE = "| Ngành | Chỉ tiêu |\n| --- | --- |\n| CNTT | 200 |"
+
+
+@dataclass(slots=True)
+class TextParser(DocumentParser):
+    name: ClassVar[str] = "text"
+
+    def extract(self, path: Path) -> ParsedDocument:
+        return ParsedDocument(
+            text="Quy chế tuyển sinh năm 2026",
+            tables=[ParsedTable(TUITION_TABLE, page=2, table_index=1, parser=self.name)],
+        )
+
+
+@dataclass(slots=True)
+class TableParser(DocumentParser):
+    name: ClassVar[str] = "tables"
+    provides_text: ClassVar[bool] = False
+
+    def extract(self, path: Path) -> ParsedDocument:
+        tables = [
+            ParsedTable(TUITION_TABLE.replace("| --- |", "|:---|"), page=2, table_index=1),
+            ParsedTable(QUOTA_TABLE, page=3, table_index=2),
+        ]
+        return ParsedDocument(text=TUITION_TABLE + "\n" + QUOTA_TABLE, tables=tables)
+
+
+@dataclass(slots=True)
+class FailingParser(DocumentParser):
+    name: ClassVar[str] = "failing"
+
+    def extract(self, path: Path) -> ParsedDocument:
+        raise DocumentParsingError("boom")
+
+
+@dataclass(slots=True)
+class NoTablesParser(DocumentParser):
+    name: ClassVar[str] = "no-tables"
+    provides_text: ClassVar[bool] = False
+
+    def extract(self, path: Path) -> ParsedDocument:
+        raise NoTablesFound("no tables")
+
+
+@dataclass(slots=True)
+class SlowParser(DocumentParser):
+    name: ClassVar[str] = "slow"
+
+    def extract(self, path: Path) -> ParsedDocument:
+        time.sleep(30)
+        return ParsedDocument(text="too late")
+
+
+class CompositeParserTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.builder = ChunkBuilder(ChunkingConfig())
+        self.metadata = DocumentMetadata(source="quy_che")
+
+    def composite(self, *parsers: type[DocumentParser], **kwargs) -> CompositeParser:
+        return CompositeParser(
+            chunk_builder=self.builder,
+            parsers=[parser(self.builder) for parser in parsers],
+            **kwargs,
+        )
+
+    def test_sequential_mode_returns_first_success(self):
+        parser = self.composite(FailingParser, TextParser, TableParser)
+        chunks = parser.parse(Path("doc.pdf"), self.metadata)
+
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(chunks[1].metadata.page, 2)
+        self.assertEqual([run.status for run in parser.last_report.runs], ["failed", "ok"])
+
+    def test_concurrent_mode_merges_and_deduplicates_tables(self):
+        parser = self.composite(TableParser, FailingParser, TextParser, concurrent=True)
+        document = parser.extract(Path("doc.pdf"))
+        report = parser.last_report
+
+        self.assertEqual(document.text, "Quy chế tuyển sinh năm 2026")
+        self.assertEqual(report.text_parser, "text")
+        self.assertEqual([table.page for table in document.tables], [2, 3])
+        self.assertEqual([table.table_index for table in document.tables], [1, 2])
+        self.assertEqual([table.parser for table in document.tables], ["tables", "tables"])
+        self.assertEqual(report.duplicates_dropped, 1)
+        self.assertEqual(
+            {run.parser: run.status for run in report.runs},
+            {"tables": "ok", "failing": "failed", "text": "ok"},
+        )
+
+    def test_a_pdf_without_tables_is_an_empty_result_not_a_failure(self):
+        parser = self.composite(TextParser, NoTablesParser, concurrent=True)
+        document = parser.extract(Path("doc.pdf"))
+
+        self.assertEqual(document.text, "Quy chế tuyển sinh năm 2026")
+        self.assertEqual([run.status for run in parser.last_report.runs], ["ok", "empty"])
+        self.assertFalse(parser.last_report.degraded)
+        self.assertTrue(parser.last_extract_complete())
+
+        sequential = self.composite(NoTablesParser, TextParser)
+        sequential.extract(Path("doc.pdf"))
+        self.assertEqual([run.status for run in sequential.last_report.runs], ["empty", "ok"])
+        self.assertFalse(sequential.last_report.degraded)
+
+    def test_concurrent_mode_enforces_per_parser_timeout(self):
+        parser = self.composite(SlowParser, TableParser, concurrent=True, timeouts={"slow": 0.5})
+        start = time.perf_counter()
+        document = parser.extract(Path("doc.pdf"))
+
+        self.assertLess(time.perf_counter() - start, 10)
+        self.assertEqual(len(document.tables), 2)
+        statuses = {run.parser: run.status for run in parser.last_report.runs}
+        self.assertEqual(statuses, {"slow": "timeout", "tables": "ok"})
+
+    def test_concurrent_mode_raises_when_all_parsers_fail(self):
+        parser = self.composite(FailingParser, concurrent=True)
+        with self.assertRaises(DocumentParsingError):
+            parser.extract(Path("doc.pdf"))
+
+
+if __name__ == "__main__":
+    unittest.main()
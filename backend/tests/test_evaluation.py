@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+
+from rag.config import ChatbotConfig, Chunk, DocumentMetadata
+from rag.document_parsers import ParsedDocument, ParsedTable
+from rag.evaluation import (
+    GoldExample,
+    IndexSetting,
+    RetrievalEvaluator,
+    cheapest_meeting,
+    chunking_grid,
+)
+from rag.service import ChatbotService
+
+VOCABULARY = ["hoc", "phi", "diem", "chuan", "chi", "tieu", "cntt", "toan"]
+
+
+class KeywordEmbedding:
+    def embed(self, texts):
+        rows = []
+        for text in texts:
+            words = text.lower().replace("|", " ").split()
+            rows.append([float(words.count(term)) + 0.01 for term in VOCABULARY])
+        return np.asarray(rows, dtype="float32")
+
+
+class EvaluationTests(unittest.TestCase):
+    def test_gold_example_requires_every_given_criterion(self):
+        example = GoldExample(question="?", pages=[3], tables=[2])
+        table = Chunk("| x |", DocumentMetadata(source="s", page=3, chunk_type="table", table_index=2))
+        text = Chunk("x", DocumentMetadata(source="s", page=3))
+
+        self.assertTrue(example.matches(table))
+        self.assertFalse(example.matches(text))
+        self.assertFalse(GoldExample(question="?").matches(table))
+
+    def test_grid_reports_recall_mrr_and_cost(self):
+        document = ParsedDocument(
+            text="gioi thieu truong",
+            tables=[
+                ParsedTable("| Nganh | Hoc phi |\n| --- | --- |\n| CNTT | hoc phi 450 |", page=2, table_index=1),
+                ParsedTable("| Nganh | Diem chuan |\n| --- | --- |\n| Toan | diem chuan 26 |", page=5, table_index=2),
+            ],
+        )
+        examples = [
+            GoldExample(question="hoc phi cntt", pages=[2]),
+            GoldExample(question="diem chuan toan", tables=[2]),
+        ]
+        service = ChatbotService(ChatbotConfig())
+        service.embedding_model = KeywordEmbedding()  # type: ignore
+
+        with TemporaryDirectory() as tmp:
+            results = RetrievalEvaluator(service, examples, Path(tmp)).evaluate(
+                document,
+                DocumentMetadata(source="quy_che"),
+                chunking_grid([50, 100], [10], [40]),
+                [IndexSetting.parse("Flat"), IndexSetting.parse("HNSW8|efSearch=16")],
+                ks=(1, 2),
+            )
+
+        self.assertEqual(len(results), 4)
+        for result in results:
+            self.assertEqual(result.recall, {1: 1.0, 2: 1.0})
+            self.assertEqual(result.mrr, 1.0)
+            self.assertGreater(result.index_bytes, 0)
+        self.assertEqual(results[1].to_dict()["index"], "HNSW8|efSearch=16")
+        best = cheapest_meeting(results, min_recall=1.0, k=1)
+        self.assertEqual(best.index.factory, "Flat")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import contextlib
+import sys
+import threading
+import unittest
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Iterator, Optional
+from unittest import mock
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from rag.config import LLMConfig
+from rag.llm import (
+    _count_step,
+    _counting_steps,
+    LanguageModel,
+    LlamaCppLM,
+    LocalCausalLM,
+    SpeculativeStats,
+    create_llm,
+    format_chat_prompt,
+)
+
+
+@dataclass(slots=True)
+class EchoModel(LanguageModel):
+    def stream(self, prompt: str, max_new_tokens: Optional[int] = None) -> Iterator[str]:
+        for word in prompt.split()[: max_new_tokens or self.config.max_new_tokens]:
+            yield word + " "
+
+
+class LanguageModelTests(unittest.TestCase):
+    def test_create_llm_selects_backend(self):
+        self.assertIsInstance(create_llm(LLMConfig()), LocalCausalLM)
+        self.assertIsInstance(create_llm(LLMConfig(backend="int8")), LocalCausalLM)
+        self.assertIsInstance(create_llm(LLMConfig(backend="llama-cpp")), LlamaCppLM)
+        with self.assertRaises(ValueError):
+            create_llm(LLMConfig(backend="tpu"))
+        with self.assertRaises(ValueError):
+            create_llm(LLMConfig(speculative="medusa"))
+
+    def test_speculative_stats_derive_acceptance_from_forward_passes(self):
+        # 40 tokens from 10 verification passes -> 30 accepted out of 50 drafted.
+        stats = SpeculativeStats(generated_tokens=40, main_steps=10, draft_steps=50)
+        self.assertEqual(stats.tokens_per_step, 4.0)
+        self.assertAlmostEqual(stats.acceptance_rate, 0.6)
+        self.assertIsNone(SpeculativeStats(generated_tokens=40, main_steps=10).acceptance_rate)
+
+    def test_forward_steps_are_counted_per_call(self):
+        hook = _count_step("main")  # one hook on a model shared by concurrent calls
+        barrier, counts = threading.Barrier(2), {}
+
+        def call(name: str, passes: int) -> None:
+            with _counting_steps() as steps:
+                barrier.wait()
+                for _ in range(passes):
+                    hook()
+                counts[name] = dict(steps)
+
+        threads = [threading.Thread(target=call, args=args) for args in (("a", 3), ("b", 5))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        hook()  # outside any generation: ignored
+        self.assertEqual(counts, {"a": {"main": 3, "draft": 0}, "b": {"main": 5, "draft": 0}})
+
+    def test_stream_raises_the_generation_error_instead_of_hanging(self):
+        class BrokenModel:
+            def generate(self, **kwargs):
+                raise RuntimeError("out of memory")
+
+        tokenizer = SimpleNamespace(pad_token_id=0, eos_token_id=1)
+        prepared = (tokenizer, BrokenModel(), {"input_ids": SimpleNamespace(shape=(1, 3))})
+        torch = SimpleNamespace(no_grad=contextlib.nullcontext)
+        llm = LocalCausalLM(LLMConfig())
+        with mock.patch("rag.llm._require_torch", return_value=torch), mock.patch.object(
+            LocalCausalLM, "_prepare", return_value=prepared
+        ), mock.patch.object(LocalCausalLM, "_generation_kwargs", return_value={"max_new_tokens": 8}):
+            result: dict = {}
+
+            def consume() -> None:
+                try:
+                    list(llm.stream("prompt"))
+                except RuntimeError as exc:
+                    result["error"] = str(exc)
+
+            consumer = threading.Thread(target=consume, daemon=True)
+            consumer.start()
+            consumer.join(timeout=10)
+        self.assertFalse(consumer.is_alive())
+        self.assertEqual(result, {"error": "out of memory"})
+
+    def test_generate_defaults_to_joined_stream(self):
+        model = EchoModel(LLMConfig(max_new_tokens=2))
+        self.assertEqual(model.generate("một hai ba"), "một hai ")
+
+    def test_models_are_not_loaded_on_construction(self):
+        self.assertFalse(create_llm(LLMConfig()).is_loaded)
+        self.assertFalse(create_llm(LLMConfig(backend="llama-cpp")).is_loaded)
+
+    def test_format_chat_prompt_skips_system_messages(self):
+        prompt = format_chat_prompt(
+            [{"role": "system", "content": "ẩn"}, {"role": "user", "content": "Học phí?"}],
+            "ngữ cảnh",
+            "Học phí?",
+        )
+        self.assertIn("USER: Học phí?", prompt)
+        self.assertNotIn("ẩn", prompt)
+        self.assertIn("CONTEXT:\nngữ cảnh", prompt)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from rag.metrics import (
+    MetricsRegistry,
+    STAGE_SECONDS,
+    record_generation,
+    request_metrics,
+    span,
+)
+
+
+class MetricsTests(unittest.TestCase):
+    def test_span_records_into_histogram_and_request(self):
+        before = STAGE_SECONDS.count("unit_test_stage")
+        with request_metrics() as metrics:
+            with span("unit_test_stage"):
+                pass
+            with span("unit_test_stage"):
+                pass
+            record_generation(prompt_tokens=120, generated_tokens=30, seconds=2.0)
+
+        self.assertEqual(STAGE_SECONDS.count("unit_test_stage"), before + 2)
+        self.assertEqual(set(metrics.timings), {"unit_test_stage"})
+        self.assertEqual(metrics.stats["prompt_tokens"], 120)
+        self.assertEqual(metrics.stats["tokens_per_second"], 15.0)
+
+    def test_spans_outside_a_request_are_not_collected(self):
+        with request_metrics() as metrics:
+            pass
+        with span("unit_test_stage"):
+            pass
+        self.assertEqual(metrics.timings, {})
+
+    def test_render_uses_prometheus_text_format(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("demo_seconds", "Demo.", ("stage",), buckets=(0.1, 1.0))
+        counter = registry.counter("demo_total", "Demo.", ("status",))
+        histogram.observe(0.05, "embed")
+        histogram.observe(0.5, "embed")
+        counter.inc("200", amount=3)
+
+        text = registry.render()
+
+        self.assertIn("# TYPE demo_seconds histogram", text)
+        self.assertIn('demo_seconds_bucket{stage="embed",le="0.1"} 1', text)
+        self.assertIn('demo_seconds_bucket{stage="embed",le="+Inf"} 2', text)
+        self.assertIn('demo_seconds_count{stage="embed"} 2', text)
+        self.assertIn('demo_total{status="200"} 3', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from rag import model_server
+from rag.cancellation import CancellationToken, DeadlineExceeded, cancellation_scope, current_token
+from rag.config import ChatbotConfig, EmbeddingConfig, LLMConfig, ModelServerConfig
+from rag.embedding import EmbeddingModel
+from rag.llm import LanguageModel
+from rag.metrics import record_generation, request_metrics
+from rag.remote import ModelServerClient, RemoteEmbeddingModel, RemoteLLM
+from rag.service import ChatbotService
+
+
+class CountingEmbedder(EmbeddingModel):
+    def embed(self, texts):
+        texts = list(texts)
+        return np.array([[len(text), 1.0, 0.5] for text in texts], dtype="float32")
+
+
+class EchoLLM(LanguageModel):
+    @property
+    def is_loaded(self) -> bool:
+        return True
+
+    def load(self) -> None:
+        pass
+
+    def stream(self, prompt, max_new_tokens=None):
+        words = prompt.split()[: max_new_tokens or 3]
+        record_generation(len(prompt.split()), len(words), 0.5)
+        for word in words:
+            yield word + " "
+
+
+class EndlessLLM(EchoLLM):
+    def stream(self, prompt, max_new_tokens=None):
+        token = current_token()
+        for _ in range(1000):
+            if token is not None and token.cancelled:
+                return
+            time.sleep(0.01)
+            yield "x"
+
+
+class ModelServerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.original_host = model_server.host
+        model_server.host = model_server.ModelHost(
+            embedding_model=CountingEmbedder(EmbeddingConfig()), llm=EchoLLM(LLMConfig())
+        )
+        self.http = TestClient(model_server.app)
+        self.client = ModelServerClient(ModelServerConfig(url="http://testserver"), http=self.http)
+
+    def tearDown(self) -> None:
+        model_server.host = self.original_host
+
+    def test_remote_embeddings_round_trip_as_float32(self):
+        remote = RemoteEmbeddingModel(EmbeddingConfig(), client=self.client)
+        vectors = remote.embed(["ab", "abcd"])
+
+        self.assertEqual(vectors.dtype, np.float32)
+        np.testing.assert_array_equal(vectors, [[2.0, 1.0, 0.5], [4.0, 1.0, 0.5]])
+        self.assertTrue(remote.is_loaded)
+
+    def test_remote_generation_forwards_server_timings(self):
+        remote = RemoteLLM(LLMConfig(), client=self.client)
+        with request_metrics() as metrics:
+            answer = remote.generate("một hai ba bốn", max_new_tokens=2)
+
+        self.assertEqual(answer, "một hai ")
+        self.assertEqual(metrics.stats["generated_tokens"], 2)
+        self.assertEqual(metrics.stats["tokens_per_second"], 4.0)
+        self.assertIn("generate", metrics.timings)
+        self.assertEqual("".join(remote.stream("một hai ba", max_new_tokens=3)), "một hai ba ")
+
+    def test_client_cancellation_stops_remote_generation(self):
+        model_server.host.llm = EndlessLLM(LLMConfig())
+        token = CancellationToken()
+        threading.Timer(0.2, token.cancel).start()
+        started = time.monotonic()
+        with cancellation_scope(token):
+            try:
+                text = self.client.generate("prompt", max_new_tokens=None)["text"]
+            except DeadlineExceeded:  # the shared flight noticed the cancellation first
+                text = ""
+        self.assertLess(len(text), 1000)
+
+        self.assertLess(time.monotonic() - started, 5.0)
+        self.assertEqual(model_server.host._requests, {})
+        self.assertFalse(self.http.post("/generate/unknown/cancel").json()["cancelled"])
+
+    def test_embeddings_only_server_rejects_generation(self):
+        model_server.host.llm = None
+        response = self.http.post("/generate", json={"prompt": "x"})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.http.get("/readyz").status_code, 200)
+
+    def test_service_uses_remote_models_when_url_is_configured(self):
+        config = ChatbotConfig(model_server=ModelServerConfig(url="unix:///tmp/rag-models.sock"))
+        service = ChatbotService(config)
+
+        self.assertIsInstance(service.embedding_model, RemoteEmbeddingModel)
+        self.assertIs(service.pipeline.embedding_model, service.embedding_model)
+        self.assertIsInstance(service.llm, RemoteLLM)
+
+
+if __name__ == "__main__":
+    unittest.main()
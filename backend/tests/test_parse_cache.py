@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import unittest
+from dataclasses import dataclass
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import ClassVar
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from rag.chunking import ChunkBuilder
+from rag.config import ChunkingConfig, ParseCacheConfig
+from rag.document_parsers import (
+    CompositeParser,
+    DocumentParser,
+    DocumentParsingError,
+    ParsedDocument,
+    ParsedTable,
+    ParserUnavailable,
+)
+from rag.parse_cache import ParseCache
+
+
+@dataclass(slots=True)
+class CountingParser(DocumentParser):
+    name: ClassVar[str] = "counting"
+
+    calls: int = 0
+
+    def extract(self, path: Path) -> ParsedDocument:
+        self.calls += 1
+        return ParsedDocument(
+            text="Điểm chuẩn năm 2025",
+            tables=[ParsedTable("| A |\n| --- |\n| 1 |", page=4, table_index=1, parser=self.name)],
+        )
+
+
+@dataclass(slots=True)
+class FailingParser(DocumentParser):
+    name: ClassVar[str] = "failing"
+
+    error: type = DocumentParsingError
+
+    def extract(self, path: Path) -> ParsedDocument:
+        raise self.error("no luck")
+
+
+class ParseCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.pdf = self.root / "quy_che.pdf"
+        self.pdf.write_bytes(b"%PDF-1.4 fake")
+        self.parser = CountingParser(ChunkBuilder(ChunkingConfig()))
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_second_extract_is_served_from_disk(self):
+        cache = ParseCache(ParseCacheConfig(directory=self.root / "cache"))
+        first = cache.get_or_extract(self.pdf, self.parser)
+        second = ParseCache(ParseCacheConfig(directory=self.root / "cache")).get_or_extract(
+            self.pdf, self.parser
+        )
+
+        self.assertEqual(self.parser.calls, 1)
+        self.assertEqual(second, first)
+        self.assertEqual(second.tables[0].page, 4)
+
+    def test_key_changes_with_pdf_content(self):
+        cache = ParseCache(ParseCacheConfig(directory=self.root / "cache"))
+        before = cache.key(self.pdf, self.parser)
+        self.pdf.write_bytes(b"%PDF-1.4 edited")
+
+        self.assertNotEqual(cache.key(self.pdf, self.parser), before)
+
+    def test_degraded_parses_are_not_cached(self):
+        builder = ChunkBuilder(ChunkingConfig())
+        cache = ParseCache(ParseCacheConfig(directory=self.root / "cache"))
+        crashed = CompositeParser(builder, parsers=[FailingParser(builder), self.parser])
+        cache.get_or_extract(self.pdf, crashed)
+        cache.get_or_extract(self.pdf, crashed)
+        self.assertEqual(self.parser.calls, 2)
+
+        # A missing library fails on every run, and the key records the installed versions.
+        missing = CompositeParser(builder, parsers=[FailingParser(builder, error=ParserUnavailable), self.parser])
+        cache.get_or_extract(self.pdf, missing)
+        cache.get_or_extract(self.pdf, missing)
+        self.assertEqual(self.parser.calls, 3)
+
+    def test_key_changes_with_table_merge_threshold(self):
+        builder = ChunkBuilder(ChunkingConfig())
+        cache = ParseCache(ParseCacheConfig(directory=self.root / "cache"))
+        keys = {
+            cache.key(self.pdf, CompositeParser(builder, parsers=[self.parser], concurrent=True, similarity_threshold=value))
+            for value in (0.85, 0.9)
+        }
+        self.assertEqual(len(keys), 2)
+
+    def test_evicts_least_recently_used_entries(self):
+        config = ParseCacheConfig(directory=self.root / "cache", max_bytes=13_000)
+        cache = ParseCache(config)
+        document = ParsedDocument(text="x" * 4_000)
+        for age, key in enumerate(["old", "middle", "newest"]):
+            cache.put(key, document)
+            stamp = 1_000_000 + age
+            os.utime(config.directory / f"{key}.json", (stamp, stamp))
+        cache.get("old")  # touching an entry makes it the most recently used
+        cache.put("extra", document)
+
+        remaining = sorted(path.stem for path in config.directory.glob("*.json"))
+        self.assertEqual(remaining, ["extra", "newest", "old"])
+
+    def test_concurrent_writers_do_not_share_a_temp_file(self):
+        cache = ParseCache(ParseCacheConfig(directory=self.root / "cache"))
+        documents = [ParsedDocument(text=str(i) * 20_000) for i in range(8)]
+        threads = [threading.Thread(target=cache.put, args=("same", document)) for document in documents]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIn(cache.get("same"), documents)
+        self.assertEqual([path.name for path in (self.root / "cache").iterdir()], ["same.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import cProfile
+import sys
+import time
+import tracemalloc
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from fastapi.testclient import TestClient
+
+from rag import server
+from rag.config import ChatbotConfig, Chunk, DocumentMetadata, PipelineConfig, ProfilingConfig, SearchResult
+from rag.pipeline import IngestionPipeline, IngestReport
+from rag.profiling import Profiler, fold_cprofile
+from rag.service import ChatbotService
+
+
+def parse():
+    time.sleep(0.02)
+
+
+def embed():
+    sum(i * i for i in range(20000))
+
+
+def ingest():
+    parse()
+    embed()
+
+
+class FoldTests(unittest.TestCase):
+    def test_cprofile_calls_fold_into_rooted_stacks(self):
+        profile = cProfile.Profile()
+        profile.enable()
+        ingest()
+        profile.disable()
+        stacks = fold_cprofile(profile, "ingest")
+
+        paths = [stack.split(";") for stack in stacks]
+        self.assertTrue(all(path[0] == "ingest" for path in paths))
+        by_leaf = {path[-1].split(" ")[0]: path for path in paths if "test_profiling.py" in path[-1]}
+        self.assertEqual([frame.split(" ")[0] for frame in by_leaf["embed"][-2:]], ["ingest", "embed"])
+        sleep = sum(seconds for stack, seconds in stacks.items() if "time.sleep" in stack)
+        self.assertGreater(sleep, 0.015)
+
+
+class ProfilerTests(unittest.TestCase):
+    def test_only_the_armed_number_of_requests_is_captured(self):
+        profiler = Profiler(ProfilingConfig(max_requests=5))
+        with profiler.capture("chat") as capture:
+            self.assertIsNone(capture)
+        profiler.arm(2)
+        for _ in range(3):
+            with profiler.capture("chat"):
+                embed()
+        self.assertEqual(len(profiler.captures), 2)
+        self.assertEqual(profiler.remaining, 0)
+        self.assertIn("chat;", profiler.folded())
+        with self.assertRaises(ValueError):
+            profiler.arm(6)
+        with self.assertRaises(ValueError):
+            profiler.arm(1, engine="perf")
+
+
+class AdminEndpointTests(unittest.TestCase):
+    def setUp(self):
+        config = ChatbotConfig()
+        config.profiling.admin_token = "s3cret"
+        service = ChatbotService(config)
+        service.table_store = None
+        chunk = Chunk(text="Điểm chuẩn ngành CNTT là 26", metadata=DocumentMetadata(source="doc"))
+
+        class Embedding:
+            def embed(self, texts):
+                return [[1.0]]
+
+        class VectorStore:
+            version = "v1"
+
+            def load(self):
+                pass
+
+            def search(self, vector, k=6):
+                return [SearchResult(score=1.0, chunk=chunk)]
+
+        class LLM:
+            def generate(self, prompt, max_new_tokens=None):
+                embed()
+                return "26 điểm"
+
+        service.embedding_model, service.vector_store, service.llm = Embedding(), VectorStore(), LLM()  # type: ignore
+        self.original, server.service = server.service, service
+        self.client = TestClient(server.app)
+
+    def tearDown(self):
+        server.service = self.original
+
+    def test_profile_the_next_chat_request(self):
+        self.assertEqual(self.client.post("/admin/profile", json={"requests": 1}).status_code, 403)
+        headers = {"X-Admin-Token": "s3cret"}
+        armed = self.client.post("/admin/profile", json={"requests": 1}, headers=headers).json()
+        self.assertEqual(armed["remaining"], 1)
+
+        chat = {"messages": [{"role": "user", "content": "Điểm chuẩn CNTT?"}]}
+        self.assertEqual(self.client.post("/chat", json=chat).status_code, 200)
+        folded = self.client.get("/admin/profile", params={"format": "folded"}, headers=headers).text
+
+        lines = folded.splitlines()
+        self.assertTrue(lines and all(line.startswith("chat;") for line in lines))
+        self.assertTrue(all(line.rsplit(" ", 1)[1].isdigit() for line in lines))
+        # The single-flight leader generates inline, so generation is in the request's own stacks.
+        self.assertTrue(any("generate" in line and "single-flight" not in line for line in lines))
+        status = self.client.get("/admin/profile", headers=headers).json()
+        self.assertEqual([capture["endpoint"] for capture in status["captured"]], ["chat"])
+
+    def test_admin_endpoints_are_hidden_without_a_token(self):
+        server.service.config.profiling.admin_token = None
+        self.assertEqual(self.client.get("/admin/profile", headers={"X-Admin-Token": ""}).status_code, 404)
+
+
+class IngestMemoryTests(unittest.TestCase):
+    def test_stage_reports_peak_allocation(self):
+        pipeline = IngestionPipeline(PipelineConfig(track_memory=True))
+        report = IngestReport(source="doc")
+        tracemalloc.start()
+        try:
+            with pipeline._stage(report, "chunk"):
+                buffer = bytearray(4_000_000)
+                del buffer
+        finally:
+            tracemalloc.stop()
+        stage = report.stages["chunk"]
+        self.assertGreaterEqual(stage.peak_bytes, 4_000_000)
+        self.assertLess(stage.retained_bytes, 1_000_000)
+        self.assertEqual(report.to_dict()["stages"]["chunk"]["peak_bytes"], stage.peak_bytes)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,15 +1,23 @@
 from __future__ import annotations
 
+import asyncio
 import sys
+import threading
+import time
 import unittest
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
 sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
 
-from fastapi import HTTPException
+from fastapi import HTTPException, Response
 
 from rag import server
+from rag.config import ChatbotConfig, ProfilingConfig
+from rag.metrics import mark_partial, record_value, span
+from rag.pipeline import IngestReport
+from rag.profiling import Profiler
+from rag.sessions import SessionNotFound
 
 
 class DummyService:
@@ -18,24 +26,29 @@ class DummyService:
         self.load_calls: int = 0
         self.search_calls: list[tuple[str, int]] = []
         self.chat_payloads: list[tuple[list[dict], int]] = []
+        self.profiler = Profiler(ProfilingConfig())
 
     def ingest_pdf(self, pdf_path, metadata=None):
         self.ingest_calls.append(Path(pdf_path))
+        return IngestReport(source=Path(pdf_path).stem)
 
     def load(self):
         self.load_calls += 1
 
-    def search(self, question: str, k: int = 6):
+    def search(self, question: str, k: int = 6, diversity=None):
         self.search_calls.append((question, k))
         return []
 
     def format_context(self, results):
         return ""
 
-    def chat(self, messages, k=6):
+    def chat(self, messages, k=6, diversity=None):
         self.chat_payloads.append((messages, k))
         raise LookupError("No relevant context found")
 
+    def readiness(self):
+        return {"ready": False, "warmup": {"done": False}}
+
 
 def with_dummy_service(testcase):
     original_service = server.service
@@ -57,7 +70,7 @@ class ServerTests(unittest.TestCase):
                 request = server.IngestRequest(pdf_path=str(pdf_path))
                 response = server.ingest(request)
 
-                self.assertEqual(response, {"status": "ok"})
+                self.assertEqual(response, {"status": "ok", "report": {"source": "doc", "chunks": 0, "stages": {}}})
                 self.assertEqual(dummy.ingest_calls, [pdf_path])
 
         with_dummy_service(run)
@@ -80,7 +93,7 @@ class ServerTests(unittest.TestCase):
             request = server.ChatRequest(messages=[server.ChatMessage(role="user", content="Hi")], k=3)
 
             with self.assertRaises(HTTPException) as ctx:
-                server.chat(request)
+                server._chat(request, server.CancellationToken())
 
             self.assertEqual(ctx.exception.status_code, 404)
             self.assertEqual(dummy.chat_payloads[0][1], 3)
@@ -88,6 +101,83 @@ class ServerTests(unittest.TestCase):
 
         with_dummy_service(run)
 
+    def test_only_missing_sessions_map_to_session_404(self):
+        def run(dummy: DummyService):
+            request = server.ChatRequest(messages=[server.ChatMessage(role="user", content="Hi")], session_id="s")
+            dummy.sessions = object()
+            dummy.chat_session = lambda *args, **kwargs: (_ for _ in ()).throw(SessionNotFound("s"))  # type: ignore
+            with self.assertRaises(HTTPException) as ctx:
+                server._chat(request, server.CancellationToken())
+            self.assertEqual(ctx.exception.detail, "Session not found or expired")
+
+            dummy.chat_session = lambda *args, **kwargs: {}["missing"]  # type: ignore
+            with self.assertRaises(KeyError):
+                server._chat(request, server.CancellationToken())
+
+        with_dummy_service(run)
+
+    def test_chat_keeps_latencies_and_counters_apart(self):
+        def run(dummy: DummyService):
+            def chat(messages, k=6, diversity=None):
+                with span("generate"):
+                    record_value("generated_tokens", 4)
+                    mark_partial()
+                return "Điểm chuẩn là", "ctx"
+
+            dummy.chat = chat  # type: ignore
+            request = server.ChatRequest(messages=[server.ChatMessage(role="user", content="Hi")])
+            response = server._chat(request, server.CancellationToken())
+
+            self.assertEqual(set(response.timings), {"generate"})
+            self.assertEqual(response.stats, {"generated_tokens": 4})
+            self.assertTrue(response.partial)
+
+        with_dummy_service(run)
+
+    def test_healthz_is_always_ok(self):
+        self.assertEqual(server.healthz(), {"status": "ok"})
+
+    def test_readyz_returns_503_until_warm(self):
+        def run(dummy: DummyService):
+            response = Response()
+            payload = server.readyz(response)
+
+            self.assertEqual(response.status_code, 503)
+            self.assertFalse(payload["ready"])
+
+        with_dummy_service(run)
+
+    def test_lifespan_logs_warmup_failures_and_cancels_on_shutdown(self):
+        release = threading.Event()
+
+        def run(dummy: DummyService):
+            dummy.config = ChatbotConfig()
+
+            def failing():
+                raise RuntimeError("no index")
+
+            async def cycle():
+                async with server.lifespan(server.app):
+                    await asyncio.sleep(0.05)
+                    started = time.perf_counter()
+                elapsed = time.perf_counter() - started
+                release.set()  # let asyncio.run's executor shutdown finish
+                return elapsed
+
+            dummy.warm_up = failing  # type: ignore
+            with self.assertLogs("rag.server", level="ERROR") as logs:
+                asyncio.run(cycle())
+            self.assertIn("no index", "\n".join(logs.output))
+
+            release.clear()
+            dummy.warm_up = lambda: release.wait(5)  # type: ignore
+            self.assertLess(asyncio.run(cycle()), 1.0)
+
+        try:
+            with_dummy_service(run)
+        finally:
+            release.set()
+
 
 if __name__ == "__main__":
     unittest.main()
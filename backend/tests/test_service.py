@@ -62,6 +62,8 @@ class ChatbotServiceTests(unittest.TestCase):
                 return [[0.0]]
 
         class DummyVectorStore:
+            version = "abc123"
+
             def search(self, vector, k=6):
                 return [SearchResult(score=0.9, chunk=chunk)]
 
@@ -76,6 +78,74 @@ class ChatbotServiceTests(unittest.TestCase):
         self.assertTrue(self.service.llm.prompts)  # type: ignore
         self.assertIn("CONTEXT:\n", self.service.llm.prompts[0])  # type: ignore
 
+    def test_warm_up_loads_models_and_records_timings(self):
+        calls: list[str] = []
+
+        class DummyEmbedding:
+            is_loaded = False
+
+            def load(self):
+                calls.append("embedder_load")
+                self.is_loaded = True
+
+            def embed(self, texts):
+                calls.append("embed")
+                return [[0.0]]
+
+        class DummyVectorStore:
+            is_loaded = False
+            version = "abc123"
+
+            def load(self):
+                calls.append("index_load")
+                self.is_loaded = True
+
+            def search(self, vector, k=6):
+                calls.append("search")
+                return []
+
+        class DummyLLM:
+            is_loaded = False
+
+            def load(self):
+                calls.append("llm_load")
+                self.is_loaded = True
+
+            def generate(self, prompt, max_new_tokens=None):
+                calls.append("generate")
+                return ""
+
+        self.service.embedding_model = DummyEmbedding()  # type: ignore
+        self.service.vector_store = DummyVectorStore()  # type: ignore
+        self.service.llm = DummyLLM()  # type: ignore
+
+        self.assertFalse(self.service.readiness()["ready"])
+        self.service.warm_up()
+        status = self.service.readiness()
+
+        self.assertEqual(
+            calls, ["index_load", "embedder_load", "embed", "search", "llm_load", "generate"]
+        )
+        self.assertTrue(status["ready"])
+        self.assertEqual(status["index_version"], "abc123")
+        self.assertEqual(set(status["warmup"]["timings"]), set(calls))
+        self.assertTrue(all(status["models"].values()))
+
+    def test_warm_up_failure_keeps_service_not_ready(self):
+        class MissingIndex:
+            is_loaded = False
+            version = None
+
+            def load(self):
+                raise FileNotFoundError("FAISS index file not found")
+
+        self.service.vector_store = MissingIndex()  # type: ignore
+        self.service.warm_up()
+        status = self.service.readiness()
+
+        self.assertFalse(status["ready"])
+        self.assertIn("FileNotFoundError", status["warmup"]["error"])
+
 
 if __name__ == "__main__":
     unittest.main()
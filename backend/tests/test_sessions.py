@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import sys
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from rag.config import ChatbotConfig, Chunk, DocumentMetadata, SearchResult, SessionConfig
+from rag.service import ChatbotService
+from rag.sessions import (
+    InMemorySessionStore,
+    Session,
+    SessionNotFound,
+    SQLiteSessionStore,
+    compact,
+    condense_question,
+)
+
+
+class SessionTests(unittest.TestCase):
+    def test_compaction_summarizes_old_turns_and_keeps_recent_ones(self):
+        session = Session(session_id="s")
+        for turn in range(6):
+            session.add({"role": "user", "content": f"Điểm chuẩn ngành số {turn} là bao nhiêu?"})
+            session.add({"role": "assistant", "content": f"Điểm chuẩn là {20 + turn}. " + "Chi tiết " * 20})
+        rendered = session.history
+        session.render()
+        self.assertEqual(session.history, rendered)
+
+        config = SessionConfig(history_budget_chars=800, keep_recent_messages=2)
+        self.assertTrue(compact(session, config))
+        self.assertEqual(len(session.messages), 2)
+        self.assertIn("- Hỏi: Điểm chuẩn ngành số 0", session.summary)
+        self.assertIn("→ Đáp: Điểm chuẩn là 20.", session.summary)
+        self.assertLessEqual(len(session.summary), 400)
+        self.assertIn("ngành số 5", session.history)
+
+    def test_follow_up_questions_are_prefixed_with_the_topic(self):
+        session = Session(session_id="s", topic="Điểm chuẩn ngành Công nghệ thông tin năm 2024?")
+        self.assertEqual(
+            condense_question("còn ngành đó thì sao?", session),
+            "Điểm chuẩn ngành Công nghệ thông tin năm 2024? còn ngành đó thì sao?",
+        )
+        standalone = "Học phí ngành Toán học năm 2025 là bao nhiêu?"
+        self.assertEqual(condense_question(standalone, session), standalone)
+
+    def test_stores_expire_idle_sessions(self):
+        with TemporaryDirectory() as tmp:
+            for store in (
+                InMemorySessionStore(SessionConfig(ttl_seconds=60, max_sessions=2)),
+                SQLiteSessionStore(SessionConfig(ttl_seconds=60, max_sessions=2, path=Path(tmp) / "s.db")),
+            ):
+                session = store.create()
+                session.add({"role": "user", "content": "Xin chào"})
+                store.save(session)
+                self.assertEqual(store.get(session.session_id).messages[0]["content"], "Xin chào")
+
+                store.config.ttl_seconds = -1
+                self.assertIsNone(store.get(session.session_id))
+                store.config.ttl_seconds = 60
+                for _ in range(3):
+                    store.create()
+                self.assertEqual(len(store), 2)
+
+    def test_in_memory_turns_work_on_their_own_copy(self):
+        store = InMemorySessionStore(SessionConfig())
+        session_id = store.create().session_id
+        first, second = store.get(session_id), store.get(session_id)
+        first.add({"role": "user", "content": "Điểm chuẩn CNTT?"})
+        self.assertEqual(second.messages, [])
+        self.assertEqual(second.history, "")
+        store.save(first)
+        first.add({"role": "assistant", "content": "26.1"})
+        self.assertEqual(len(store.get(session_id).messages), 1)
+
+
+class SessionChatTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.service = ChatbotService(ChatbotConfig())
+        self.queries: list[str] = []
+        self.prompts: list[str] = []
+        chunk = Chunk(text="| CNTT | 26.1 |", metadata=DocumentMetadata(source="quy_che", page=2))
+        test = self
+
+        class DummyEmbedding:
+            def embed(self, texts):
+                test.queries.extend(texts)
+                return [[0.0]]
+
+        class DummyVectorStore:
+            version = "abc123"
+
+            def search(self, vector, k=6):
+                return [SearchResult(score=0.9, chunk=chunk)]
+
+        class DummyLLM:
+            def generate(self, prompt, max_new_tokens=None):
+                test.prompts.append(prompt)
+                return f"Trả lời {len(test.prompts)}"
+
+        self.service.embedding_model = DummyEmbedding()  # type: ignore
+        self.service.vector_store = DummyVectorStore()  # type: ignore
+        self.service.llm = DummyLLM()  # type: ignore
+
+    def test_follow_up_uses_stored_history_and_condensed_query(self):
+        first = [
+            {"role": "assistant", "content": "Xin chào!"},
+            {"role": "user", "content": "Điểm chuẩn ngành Công nghệ thông tin năm 2024?"},
+        ]
+        answer, _, session_id = self.service.chat_session(first)
+        self.assertEqual(answer, "Trả lời 1")
+        self.assertIn("ASSISTANT: Xin chào!", self.prompts[0])
+
+        answer, _, same_id = self.service.chat_session(
+            [{"role": "user", "content": "còn ngành đó thì sao?"}], session_id
+        )
+        self.assertEqual(same_id, session_id)
+        self.assertEqual(self.queries[-1], "Điểm chuẩn ngành Công nghệ thông tin năm 2024? còn ngành đó thì sao?")
+        self.assertIn("ASSISTANT: Trả lời 1", self.prompts[1])
+        self.assertTrue(self.prompts[1].endswith("USER QUESTION: còn ngành đó thì sao?"))
+
+    def test_unknown_session_raises_session_not_found(self):
+        with self.assertRaises(SessionNotFound):
+            self.service.chat_session([{"role": "user", "content": "Học phí?"}], "missing")
+
+
+if __name__ == "__main__":
+    unittest.main()
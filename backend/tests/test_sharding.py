@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import sys
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from rag import shard_server
+from rag.config import Chunk, DocumentMetadata, ShardingConfig, VectorStoreConfig
+from rag.metrics import request_metrics
+from rag.sharding import RemoteShard, ShardedVectorStore
+from rag.vector_store import FaissVectorStore
+
+
+def make_corpus(count: int = 60, dim: int = 16, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(count, dim)).astype("float32")
+    chunks = [
+        Chunk(
+            text=f"chunk {i}",
+            metadata=DocumentMetadata(source=f"doc{i % 3}", page=i, year=str(2024 + i % 2)),
+        )
+        for i in range(count)
+    ]
+    return vectors, chunks
+
+
+class SlowShard:
+    name = "slow"
+
+    def search(self, query, k):
+        time.sleep(0.5)
+        return []
+
+
+class ShardedVectorStoreTests(unittest.TestCase):
+    def test_hash_shards_return_the_same_top_k_as_one_index(self):
+        vectors, chunks = make_corpus()
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            single = FaissVectorStore(VectorStoreConfig(index_path=root / "i.faiss", metadata_path=root / "m.json"))
+            single.build(vectors.copy(), chunks)
+            sharded = ShardedVectorStore(ShardingConfig(enabled=True, num_shards=4, directory=root / "shards"))
+            sharded.build(vectors.copy(), chunks)
+
+            self.assertEqual(len(sharded._shards), 4)
+            for query in vectors[:5]:
+                expected = [result.chunk.text for result in single.search(query.copy(), k=5)]
+                actual = [result.chunk.text for result in sharded.search(query, k=5)]
+                self.assertEqual(actual, expected)
+                results, found = sharded.search_with_vectors(query, k=5)
+                self.assertEqual([result.chunk.text for result in results], expected)
+                np.testing.assert_allclose(found, single.search_with_vectors(query.copy(), k=5)[1], atol=1e-6)
+
+    def test_source_partition_only_rewrites_the_ingested_source(self):
+        vectors, chunks = make_corpus()
+        with TemporaryDirectory() as tmp:
+            config = ShardingConfig(enabled=True, partition_by="source", directory=Path(tmp))
+            store = ShardedVectorStore(config)
+            first = [i for i, chunk in enumerate(chunks) if chunk.metadata.source == "doc0"]
+            second = [i for i, chunk in enumerate(chunks) if chunk.metadata.source == "doc1"]
+            store.build(vectors[first], [chunks[i] for i in first])
+            store.build(vectors[second], [chunks[i] for i in second])
+
+            self.assertEqual(store._read_manifest(), {"source-doc0": len(first), "source-doc1": len(second)})
+            top = store.search(vectors[first[0]], k=1)
+            self.assertEqual(top[0].chunk.text, chunks[first[0]].text)
+
+    def test_slow_shard_is_skipped_after_the_deadline(self):
+        vectors, chunks = make_corpus()
+        with TemporaryDirectory() as tmp:
+            store = ShardedVectorStore(ShardingConfig(enabled=True, num_shards=2, directory=Path(tmp), deadline=0.1))
+            store.build(vectors.copy(), chunks)
+            store._shards.append(SlowShard())  # type: ignore[arg-type]
+
+            start = time.perf_counter()
+            with request_metrics() as metrics:
+                results = store.search(vectors[0], k=3)
+            self.assertLess(time.perf_counter() - start, 0.4)
+            self.assertEqual(len(results), 3)
+            self.assertEqual(metrics.stats["shards_skipped"], 1)
+
+    def test_remote_shard_round_trip(self):
+        vectors, chunks = make_corpus(count=20)
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            local = FaissVectorStore(VectorStoreConfig(index_path=root / "i.faiss", metadata_path=root / "m.json"))
+            local.build(vectors.copy(), chunks)
+            original = shard_server.store
+            shard_server.store = local
+            try:
+                remote = RemoteShard("http://testserver", TestClient(shard_server.app))
+                query = vectors[3:4] / np.linalg.norm(vectors[3])
+                results = remote.search(query, k=2)
+                with_vectors, found = remote.search_with_vectors(query, k=2)
+            finally:
+                shard_server.store = original
+
+            self.assertEqual(results[0].chunk.text, "chunk 3")
+            self.assertEqual([result.chunk.text for result in with_vectors], [result.chunk.text for result in results])
+            np.testing.assert_allclose(found[0], query[0], atol=1e-6)
+            self.assertEqual(results[0].chunk.metadata.source, "doc0")
+            self.assertAlmostEqual(results[0].score, 1.0, places=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from rag.cancellation import CancellationToken, DeadlineExceeded, cancellation_scope, check_deadline, current_token
+from rag.config import ChatbotConfig, Chunk, DocumentMetadata, SearchResult
+from rag.metrics import record_value, request_metrics
+from rag.service import ChatbotService
+from rag.single_flight import SingleFlight, normalize_question
+
+
+class SingleFlightTests(unittest.TestCase):
+    def test_concurrent_callers_share_one_computation(self):
+        flights = SingleFlight("generation")
+        release, calls = threading.Event(), []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return "answer"
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = [pool.submit(flights.do, "key", compute) for _ in range(8)]
+            while flights.leaders + flights.followers < 8:
+                threading.Event().wait(0.01)
+            release.set()
+            results = [future.result()[0] for future in futures]
+
+        self.assertEqual(results, ["answer"] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((flights.leaders, flights.followers), (1, 7))
+        self.assertAlmostEqual(flights.coalescing_ratio, 7 / 8)
+
+    def test_errors_reach_every_caller_and_the_next_call_recomputes(self):
+        flights = SingleFlight("retrieval")
+
+        def fail():
+            raise LookupError("No relevant context found")
+
+        with self.assertRaises(LookupError):
+            flights.do("key", fail)
+        self.assertEqual(flights.do("key", lambda: 42)[0], 42)
+        self.assertEqual(flights.leaders, 2)
+
+    def test_a_follower_gives_up_at_its_own_deadline(self):
+        flights = SingleFlight("generation")
+        release = threading.Event()
+        leader = threading.Thread(target=flights.do, args=("key", lambda: release.wait(5)))
+        leader.start()
+        while not flights.leaders:
+            threading.Event().wait(0.01)
+        with cancellation_scope(CancellationToken.after(0.1)), self.assertRaises(DeadlineExceeded):
+            flights.do("key", lambda: self.fail("followers never compute"))
+        release.set()
+        leader.join()
+
+    def test_a_new_caller_does_not_join_a_cancelled_flight(self):
+        flights = SingleFlight("generation")
+        release, errors = threading.Event(), []
+        gone = CancellationToken()
+
+        def work():
+            while not release.wait(0.01):
+                check_deadline("work")
+
+        def abandoned():
+            with cancellation_scope(gone):
+                try:
+                    flights.do("key", work)
+                except DeadlineExceeded as exc:
+                    errors.append(exc)
+
+        first = threading.Thread(target=abandoned)
+        first.start()
+        while not flights.leaders:
+            threading.Event().wait(0.01)
+        gone.cancel("disconnect")
+        first.join(5)
+        self.assertEqual(len(errors), 1)
+
+        value, token = flights.do("key", lambda: "fresh")
+        release.set()
+        self.assertEqual(value, "fresh")
+        self.assertFalse(token.cancelled)
+        self.assertEqual((flights.leaders, flights.followers), (2, 0))
+
+    def test_stream_producer_runs_in_the_leaders_context(self):
+        flights = SingleFlight("generation")
+        token = CancellationToken()
+        seen = []
+
+        def produce():
+            seen.append(current_token())
+            record_value("produced", 1)
+            yield "x"
+
+        with request_metrics() as metrics, cancellation_scope(token):
+            self.assertEqual("".join(flights.stream("key", produce)), "x")
+        self.assertIn(token, seen[0].linked)
+        self.assertIn("produced", metrics.stats)
+
+    def test_stream_subscribers_replay_and_follow_the_shared_output(self):
+        flights = SingleFlight("generation")
+        calls = []
+
+        def produce():
+            calls.append(current_token())
+            yield "Điểm "
+            yield "chuẩn"
+
+        first = flights.stream("key", produce)
+        self.assertEqual(next(first), "Điểm ")
+        second = flights.stream("key", produce)
+        self.assertEqual(next(second), "Điểm ")
+        self.assertEqual("".join(first), "chuẩn")
+        self.assertEqual("".join(second), "chuẩn")
+        self.assertEqual(len(calls), 1)
+
+    def test_leaders_compute_inline_without_a_thread(self):
+        flights = SingleFlight("retrieval")
+        caller = threading.get_ident()
+        self.assertEqual(flights.do("key", threading.get_ident)[0], caller)
+        threads = []
+        self.assertEqual(list(flights.stream("key", lambda: iter([threads.append(threading.get_ident())]))), [None])
+        self.assertEqual(threads, [caller])
+
+    def test_followers_keep_the_stream_when_the_leader_leaves(self):
+        flights = SingleFlight("generation")
+        release = threading.Event()
+
+        def produce():
+            yield "Điểm "
+            release.wait(5)
+            yield "chuẩn"
+
+        first = flights.stream("key", produce)
+        self.assertEqual(next(first), "Điểm ")
+        with cancellation_scope(CancellationToken()):
+            second = flights.stream("key", produce)
+            self.assertEqual(next(second), "Điểm ")
+        first.close()
+        release.set()
+        self.assertEqual("".join(second), "chuẩn")
+
+    def test_questions_are_normalised(self):
+        self.assertEqual(normalize_question("  Điểm chuẩn  CNTT? "), normalize_question("điểm chuẩn cntt"))
+
+
+class ServiceCoalescingTests(unittest.TestCase):
+    def test_identical_concurrent_chats_share_one_generation(self):
+        service = ChatbotService(ChatbotConfig())
+        service.table_store = None
+        chunk = Chunk(text="Điểm chuẩn ngành CNTT là 26", metadata=DocumentMetadata(source="doc"))
+        release, counts = threading.Event(), {"generate": 0}
+
+        class Embedding:
+            def embed(self, texts):
+                return [[1.0]]
+
+        class VectorStore:
+            version = "v1"
+
+            def search(self, vector, k=6):
+                return [SearchResult(score=1.0, chunk=chunk)]
+
+        class LLM:
+            def generate(self, prompt, max_new_tokens=None):
+                counts["generate"] += 1
+                release.wait(5)
+                return "26 điểm"
+
+        service.embedding_model, service.vector_store, service.llm = Embedding(), VectorStore(), LLM()  # type: ignore
+        questions = ["Điểm chuẩn CNTT?", "điểm chuẩn cntt", "Điểm chuẩn  CNTT"]
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(service.chat, [{"role": "user", "content": q}]) for q in questions]
+            while service.generation_flights.leaders + service.generation_flights.followers < 3:
+                threading.Event().wait(0.01)
+            release.set()
+            answers = [future.result()[0] for future in futures]
+
+        self.assertEqual(answers, ["26 điểm"] * 3)
+        self.assertEqual(counts["generate"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
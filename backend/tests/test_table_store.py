@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from rag.config import ChatbotConfig, DocumentMetadata, ParseCacheConfig, PipelineConfig, TableStoreConfig
+from rag.document_parsers import ParsedDocument, ParsedTable
+from rag.pipeline import IngestionPipeline
+from rag.service import ChatbotService
+from rag.table_store import TableStore, normalize_header
+
+TABLE = """| Tên ngành | Mã ngành | Chỉ tiêu | Điểm chuẩn | Học phí/tín chỉ |
+| --- | --- | --- | --- | --- |
+| Công nghệ thông tin | QHT40 | 200 | 26.10 | 450000 |
+| Khoa học máy tính | QHT41 | 120 | 25.75 | 450000 |
+| Toán học | QHT01 | 80 | 22.50 | 380000 |
+"""
+
+
+class TableStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.store = TableStore(TableStoreConfig(path=Path(self.tmp.name) / "tables.sqlite3"))
+        metadata = DocumentMetadata(source="tuyen_sinh_2025")
+        self.assertEqual(self.store.replace(metadata, [ParsedTable(TABLE, page=4, table_index=2)]), 3)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_headers_are_normalised_to_canonical_keys(self):
+        self.assertEqual(normalize_header("Điểm trúng tuyển"), "diem_chuan")
+        self.assertEqual(normalize_header("Học phí/tín chỉ"), "hoc_phi")
+        self.assertEqual(normalize_header("Ghi chú"), "ghi_chu")
+
+    def test_lookup_answers_a_single_cell_with_citation(self):
+        hit = self.store.lookup("Điểm chuẩn ngành Công nghệ thông tin năm 2025 là bao nhiêu?")
+        self.assertIsNotNone(hit)
+        self.assertEqual(hit.confidence, 1.0)
+        self.assertIn("26.10", hit.answer)
+        self.assertIn("(tuyen_sinh_2025 - Trang 4 - Bảng #2)", hit.answer)
+        self.assertIn("| Công nghệ thông tin | QHT40 |", hit.context)
+
+        by_code = self.store.lookup("Học phí mã ngành QHT01?")
+        self.assertIn("380000", by_code.answer)
+        # A multi-word label matches as one n-gram of the question.
+        self.assertIn("25.75", self.store.lookup("Điểm chuẩn ngành Khoa học máy tính?").answer)
+
+    def test_ambiguous_or_unmatched_questions_fall_through(self):
+        self.assertIsNone(self.store.lookup("Điểm chuẩn ngành Công nghệ thông tin năm 2024?"))
+        self.assertIsNone(self.store.lookup("Điểm chuẩn và học phí ngành Toán học?"))
+        self.assertIsNone(self.store.lookup("Điểm chuẩn ngành Vật lý?"))
+        self.assertIsNone(self.store.lookup("Ngành Toán học học những gì?"))
+
+    def test_ingestion_replaces_the_store_only_after_the_index_is_built(self):
+        pipeline = IngestionPipeline(
+            PipelineConfig(parse_cache=ParseCacheConfig(enabled=False), tables=self.store.config)
+        )
+        other = TABLE.replace("Toán học", "Vật lý")
+        pipeline.parser = mock.Mock(extract=lambda path: ParsedDocument(tables=[ParsedTable(other, page=1)]))
+        pipeline.parser.build_chunks.return_value = []
+        pipeline.embedding_model = mock.Mock()
+        pipeline.vector_store = mock.Mock()
+        pipeline.vector_store.build.side_effect = RuntimeError("index build failed")
+        metadata = DocumentMetadata(source="tuyen_sinh_2026")
+        with self.assertRaises(RuntimeError):
+            pipeline.ingest(Path("unused.pdf"), metadata)
+        self.assertEqual({row.source for row in self.store.rows()}, {"tuyen_sinh_2025"})
+
+        pipeline.vector_store.build.side_effect = None
+        pipeline.ingest(Path("unused.pdf"), metadata)
+        self.assertEqual({row.source for row in self.store.rows()}, {"tuyen_sinh_2026"})
+        self.assertIn("Vật lý", {row.label for row in self.store.rows()})
+
+    def test_chat_fast_path_skips_retrieval_and_generation(self):
+        config = ChatbotConfig()
+        config.pipeline.tables.fast_path = True
+        service = ChatbotService(config)
+        service.table_store = self.store
+
+        class Unused:
+            def __getattr__(self, name):
+                raise AssertionError(f"{name} should not be called")
+
+        service.llm = Unused()  # type: ignore
+        service.embedding_model = Unused()  # type: ignore
+        answer, context = service.chat([{"role": "user", "content": "Chỉ tiêu ngành Toán học?"}])
+
+        self.assertTrue(answer.startswith("Chỉ tiêu của Toán học năm 2025 là 80"))
+        self.assertIn("[tuyen_sinh_2025 - Trang 4 - Bảng #2]", context)
+
+
+if __name__ == "__main__":
+    unittest.main()
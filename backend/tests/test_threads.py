@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import faiss
+
+from rag import threads
+from rag.config import ThreadBudgetConfig
+from rag.threads import ThreadBudget, parse_cpu_list, thread_scope, threads_for
+
+
+class ThreadBudgetTests(unittest.TestCase):
+    def tearDown(self):
+        threads.configure(ThreadBudgetConfig(enabled=False))
+
+    def test_serving_splits_cores_between_embedding_and_generation(self):
+        budget = ThreadBudget(ThreadBudgetConfig(), cpus=16)
+        self.assertEqual(
+            {role: budget.threads(role) for role in threads.ROLES},
+            {"ingest": 16, "embed": 4, "generate": 12, "search": 1},
+        )
+        pinned = ThreadBudget(ThreadBudgetConfig(generate_threads=6, search_threads=2), cpus=16)
+        self.assertEqual((pinned.threads("generate"), pinned.threads("search")), (6, 2))
+        self.assertEqual(ThreadBudget(ThreadBudgetConfig(), cpus=1).threads("generate"), 1)
+        with self.assertRaises(ValueError):
+            budget.threads("rerank")
+
+    def test_pools_are_sized_once_for_the_process_role(self):
+        before = faiss.omp_get_max_threads()
+        threads.configure(ThreadBudgetConfig(search_threads=2, embed_threads=3))
+        self.assertEqual(os.environ["TOKENIZERS_PARALLELISM"], "false")
+        with thread_scope("embed") as count:
+            self.assertEqual(count, 3)
+            self.assertEqual(faiss.omp_get_max_threads(), 2)
+        faiss.omp_set_num_threads(before)
+        with thread_scope("search"):  # already sized in this thread: left alone
+            self.assertEqual(faiss.omp_get_max_threads(), before)
+
+        seen = []
+
+        def search_in_new_thread():
+            with thread_scope("search"):
+                seen.append(faiss.omp_get_max_threads())
+
+        worker = threading.Thread(target=search_in_new_thread)
+        worker.start()
+        worker.join()
+        self.assertEqual(seen, [2])  # OpenMP counts are per thread, so each new thread is sized once
+
+        threads.configure(ThreadBudgetConfig(process="ingest", ingest_threads=4, search_threads=2))
+        self.assertEqual(os.environ["TOKENIZERS_PARALLELISM"], "true")
+        with thread_scope("embed") as count:
+            self.assertEqual(count, 4)
+            self.assertEqual(faiss.omp_get_max_threads(), 4)
+        with self.assertRaises(ValueError):
+            threads.configure(ThreadBudgetConfig(process="batch"))
+        self.assertEqual(threads.configure(ThreadBudgetConfig(), generate_threads=6).threads("generate"), 6)
+
+    def test_torch_is_sized_per_role_and_restored(self):
+        pool = [8]
+        torch = SimpleNamespace(get_num_threads=lambda: pool[0], set_num_threads=lambda n: pool.__setitem__(0, n))
+        threads.configure(ThreadBudgetConfig(embed_threads=2, generate_threads=6))
+        with mock.patch.dict(sys.modules, {"torch": torch}):
+            with thread_scope("embed"):
+                self.assertEqual(pool, [2])
+                with thread_scope("generate"):  # overlapping scopes take the largest share
+                    self.assertEqual(pool, [6])
+                    with thread_scope("search"):  # FAISS only
+                        self.assertEqual(pool, [6])
+                self.assertEqual(pool, [2])
+            self.assertEqual(pool, [8])
+            threads.configure(ThreadBudgetConfig(enabled=False))
+            with thread_scope("generate", threads=3):
+                self.assertEqual(pool, [3])
+            self.assertEqual(pool, [8])
+
+    def test_disabled_budget_leaves_libraries_alone(self):
+        self.assertIsNone(threads.configure(ThreadBudgetConfig(enabled=False)))
+        before = faiss.omp_get_max_threads()
+        with thread_scope("search") as count:
+            self.assertIsNone(count)
+            self.assertEqual(faiss.omp_get_max_threads(), before)
+        self.assertIsNone(threads_for("generate"))
+        with thread_scope("generate", threads=3) as count:  # LLMConfig.n_threads still applies to torch
+            self.assertEqual(count, 3)
+        self.assertEqual(faiss.omp_get_max_threads(), before)
+
+    def test_cpu_lists_use_taskset_syntax(self):
+        self.assertEqual(parse_cpu_list("0-3, 8,2"), [0, 1, 2, 3, 8])
+
+
+if __name__ == "__main__":
+    unittest.main()
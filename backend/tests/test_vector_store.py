@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+
+from rag.config import Chunk, DocumentMetadata, VectorStoreConfig
+from rag.vector_store import FaissVectorStore, resolve_index_factory
+
+
+def corpus(count: int = 300, dim: int = 32):
+    rng = np.random.default_rng(3)
+    vectors = rng.standard_normal((count, dim), dtype="float32")
+    chunks = [Chunk(text=str(i), metadata=DocumentMetadata(source="doc", page=i)) for i in range(count)]
+    return vectors, chunks
+
+
+class VectorCompressionTests(unittest.TestCase):
+    def test_storage_codec_replaces_flat_in_the_factory(self):
+        self.assertEqual(resolve_index_factory(VectorStoreConfig()), "Flat")
+        self.assertEqual(resolve_index_factory(VectorStoreConfig(storage="fp16")), "SQfp16")
+        self.assertEqual(resolve_index_factory(VectorStoreConfig(index_factory="IVF64,Flat", storage="sq8")), "IVF64,SQ8")
+        self.assertEqual(resolve_index_factory(VectorStoreConfig(index_factory="HNSW32", storage="pq", pq_m=8)), "HNSW32,PQ8")
+        with self.assertRaises(ValueError):
+            resolve_index_factory(VectorStoreConfig(index_factory="IVF64,PQ8", storage="sq8"))
+
+    def test_rescoring_restores_exact_scores_after_reload(self):
+        vectors, chunks = corpus()
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            exact = FaissVectorStore(VectorStoreConfig(index_path=root / "f.faiss", metadata_path=root / "f.json"))
+            exact.build(vectors.copy(), chunks)
+            config = VectorStoreConfig(
+                index_path=root / "sq.faiss", metadata_path=root / "sq.json", storage="sq8", rescore_candidates=30
+            )
+            FaissVectorStore(config).build(vectors.copy(), chunks)
+            self.assertEqual(config.index_path.with_suffix(".f32").stat().st_size, vectors.nbytes)
+
+            compressed = FaissVectorStore(config)
+            compressed.load()
+            for query in vectors[:10]:
+                expected = exact.search(query.copy(), k=5)
+                actual = compressed.search(query.copy(), k=5)
+                self.assertEqual([r.chunk.text for r in actual], [r.chunk.text for r in expected])
+                np.testing.assert_allclose([r.score for r in actual], [r.score for r in expected], rtol=1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,15 +1,15 @@
 import { NextRequest } from "next/server";
-import { chatWithBackend } from "@/lib/backend";
+import { BackendError, chatWithSession } from "@/lib/backend";
 
 export async function POST(request: NextRequest) {
-  const { messages } = await request.json();
+  const { messages, sessionId } = await request.json();
 
   if (!Array.isArray(messages) || messages.length === 0) {
     return new Response("Missing chat history", { status: 400 });
   }
 
   try {
-    const data = await chatWithBackend(messages);
+    const data = await chatWithSession(messages, sessionId, request.signal);
     return Response.json(data);
   } catch (error) {
     console.error("Failed to call backend chat", error);
@@ -17,6 +17,7 @@ export async function POST(request: NextRequest) {
       error instanceof Error && error.message
         ? error.message
         : "Không thể kết nối tới backend.";
-    return new Response(message, { status: 502 });
+    const status = error instanceof BackendError && error.status === 504 ? 504 : 502;
+    return new Response(message, { status });
   }
 }
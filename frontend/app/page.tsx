@@ -22,6 +22,7 @@ export default function HomePage() {
   ]);
   const [input, setInput] = useState("");
   const [isLoading, setIsLoading] = useState(false);
+  const [sessionId, setSessionId] = useState<string | undefined>(undefined);
 
   const lastAnswer = useMemo(
     () => messages.filter((msg) => msg.role === "assistant").at(-1),
@@ -53,14 +54,20 @@ export default function HomePage() {
         headers: {
           "Content-Type": "application/json",
         },
-        body: JSON.stringify({ messages: nextMessages }),
+        body: JSON.stringify({
+          messages: nextMessages.map(({ role, content }) => ({ role, content })),
+          sessionId,
+        }),
       });
 
       if (!response.ok) {
         throw new Error(await response.text());
       }
 
-      const payload = (await response.json()) as { answer: string };
+      const payload = (await response.json()) as { answer: string; session_id?: string | null };
+      if (payload.session_id) {
+        setSessionId(payload.session_id);
+      }
       const assistantMessage: ChatMessage = {
         id: `assistant-${Date.now()}`,
         role: "assistant",
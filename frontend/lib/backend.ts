@@ -1,4 +1,6 @@
 const DEFAULT_BACKEND_URL = process.env.BACKEND_URL ?? "http://localhost:8000";
+// Time budget for one answer; the backend returns a partial answer or a 504 when it runs out.
+const CHAT_DEADLINE_MS = Number(process.env.CHAT_DEADLINE_MS ?? 60000);
 
 export type RetrievedContext = {
   answer_context: string;
@@ -12,8 +14,16 @@ export type ChatMessage = {
 export type ChatResponse = {
   answer: string;
   context: string;
+  session_id?: string | null;
+  partial?: boolean;
 };
 
+export class BackendError extends Error {
+  constructor(message: string, readonly status: number) {
+    super(message);
+  }
+}
+
 export async function retrieveContext(question: string, k = 6): Promise<RetrievedContext> {
   const response = await fetch(`${DEFAULT_BACKEND_URL}/query`, {
     method: "POST",
@@ -32,20 +42,59 @@ export async function retrieveContext(question: string, k = 6): Promise<Retrieve
   return (await response.json()) as RetrievedContext;
 }
 
-export async function chatWithBackend(messages: ChatMessage[], k = 6): Promise<ChatResponse> {
+export async function createSession(): Promise<string> {
+  const response = await fetch(`${DEFAULT_BACKEND_URL}/sessions`, { method: "POST" });
+
+  if (!response.ok) {
+    throw new BackendError(`Backend session failed: ${response.statusText}`, response.status);
+  }
+
+  const payload = (await response.json()) as { session_id: string };
+  return payload.session_id;
+}
+
+export async function chatWithBackend(
+  messages: ChatMessage[],
+  k = 6,
+  sessionId?: string,
+  signal?: AbortSignal,
+): Promise<ChatResponse> {
+  // Aborting (the browser tab closed) drops the connection, which stops generation on the backend.
   const response = await fetch(`${DEFAULT_BACKEND_URL}/chat`, {
     method: "POST",
     headers: {
       "Content-Type": "application/json",
     },
-    body: JSON.stringify({ messages, k }),
+    body: JSON.stringify({ messages, k, session_id: sessionId ?? null, deadline_ms: CHAT_DEADLINE_MS }),
+    signal,
   });
 
   if (!response.ok) {
     const detail = await response.json().catch(() => ({}));
     const message = detail?.detail ?? response.statusText;
-    throw new Error(`Backend chat failed: ${message}`);
+    throw new BackendError(`Backend chat failed: ${message}`, response.status);
   }
 
   return (await response.json()) as ChatResponse;
 }
+
+/**
+ * Chat through a server-side session so that only the newest message is sent.
+ * A new or expired session is seeded once with the full history.
+ */
+export async function chatWithSession(
+  messages: ChatMessage[],
+  sessionId?: string,
+  signal?: AbortSignal,
+): Promise<ChatResponse> {
+  if (sessionId) {
+    try {
+      return await chatWithBackend(messages.slice(-1), 6, sessionId, signal);
+    } catch (error) {
+      if (!(error instanceof BackendError && error.status === 404 && error.message.includes("Session"))) {
+        throw error;
+      }
+    }
+  }
+  return chatWithBackend(messages, 6, await createSession(), signal);
+}